@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic import make_roster, make_shards
+from bench_storage import timed
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from lootLedger import CLASS_ICONS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_icon_cache():
+    # Fresh placeholders in ./icon_cache, so the tracker never starts downloads
+    # that would run alongside the timings
+    from iconCache import make_placeholder
+    os.makedirs("icon_cache", exist_ok=True)
+    for cls in CLASS_ICONS:
+        make_placeholder(cls).save(os.path.join("icon_cache", f"{cls}.png"))
+
+
+def settle(app):
+    app.processEvents()
+
+
+def paint_column(w, column):
+    # The delegate's paint for one column of every row, twinks included, into an
+    # offscreen image: the per-cell cost without the view skipping hidden rows
+    model, tree = w.model, w.tree
+    delegate = tree.itemDelegate()
+    option = tree.viewOptions()
+    width = tree.columnWidth(column)
+    image = QtGui.QImage(width, w.row_height_parent, QtGui.QImage.Format_ARGB32_Premultiplied)
+    painter = QtGui.QPainter(image)
+    parent_rect = QtCore.QRect(0, 0, width, w.row_height_parent)
+    child_rect = QtCore.QRect(0, 0, width, w.row_height_child)
+    for row in range(model.rowCount()):
+        option.rect = parent_rect
+        delegate.paint(painter, option, model.index(row, column))
+        parent = model.index(row, 0)
+        option.rect = child_rect
+        for crow in range(model.rowCount(parent)):
+            delegate.paint(painter, option, model.index(crow, column, parent))
+    painter.end()
+
+
+def bench_raid_tracker(app, size, args):
+    from raidTracker import RaidTracker
+    with open("raid_data.json", "w", encoding="utf-8") as f:
+        json.dump(make_roster(size, args.twink_ratio, args.inactive_ratio, seed=size), f, indent=2)
+    results = {}
+    # lazy: the shown window stays empty until the calls timed below build the
+    # roster, same order as the real start (first paint, load, build)
+    w = RaidTracker(storage=args.storage, lazy=True)
+    w._build_scheduled = True
+    w.resize(1300, 700)
+    w.show()
+    settle(app)
+
+    def load():
+        w.store.close()
+        w._load_data()
+    results["_load_data"] = timed(load, args.repeat)
+    results["refresh_view"] = timed(w.refresh_view, args.repeat)
+    w._roster_built = True
+    w.centralWidget().setEnabled(True)
+    settle(app)
+
+    # Debounced save plus the write it schedules, i.e. until the file is on disk
+    def save():
+        w._save_data()
+        w.flush_data()
+    results["_save_data"] = timed(save, args.repeat)
+
+    def apply_filter(text):
+        w.filter_input.setText(text)
+        return timed(w._apply_filter)
+    results["_apply_filter"] = min(apply_filter("r012") + apply_filter("") for _ in range(args.repeat))
+    results["populate_db_combo"] = timed(w.populate_db_combo, args.repeat)
+
+    names = [e["Name"] for e in w.ledger.active()][:args.edits]
+    t = time.perf_counter()
+    for i, name in enumerate(names):
+        w._on_counter(name, "Helmet", 1 if i % 2 == 0 else -1)
+    results["_on_counter"] = (time.perf_counter() - t) * 1000 / max(1, len(names))
+
+    # Class icons: rendering the icon set, then painting the icon column of the
+    # whole roster and one repaint of the visible rows
+    results["set_icons"] = timed(lambda: w.model.set_icons(w.icon_map), args.repeat)
+    w.tree.expandAll()
+    settle(app)
+    results["paint_icons"] = timed(lambda: paint_column(w, 0), args.repeat)
+    results["paint_viewport"] = timed(w.tree.viewport().repaint, args.repeat)
+    # Frame time: the whole window rendered (header, buttons, visible rows with grid)
+    results["paint_window"] = timed(w.grab, args.repeat)
+
+    w.close()
+    w.deleteLater()
+    settle(app)
+    return results
+
+
+def bench_shard_track(app, size, args):
+    from shardTrack import MainWindow
+    # Shard groups scale with the roster, one group per 20 characters
+    names = [f"Char{i:05d}" for i in range(size)]
+    with open("shard_count.json", "w", encoding="utf-8") as f:
+        json.dump(make_shards(max(1, size // 20), names, seed=size), f, indent=2, ensure_ascii=False)
+    # The window loads once, from its constructor before it is shown. Each run
+    # gets a fresh empty window (constructed while the file is moved aside);
+    # reloading into a used or shown tree is not a path the tracker takes.
+    def empty_window():
+        os.replace("shard_count.json", "shard_count.json.bak")
+        try:
+            return MainWindow()
+        finally:
+            os.replace("shard_count.json.bak", "shard_count.json")
+    best = None
+    for _ in range(args.repeat):
+        w = empty_window()
+        ms = timed(w._load_data)
+        best = ms if best is None else min(best, ms)
+        w.deleteLater()
+        settle(app)
+    results = {"shardTrack._load_data": best}
+    w = MainWindow()
+    w.show()
+    settle(app)
+    results["shardTrack._save_data"] = timed(w._save_data, args.repeat)
+    w.tree.expandAll()
+    settle(app)
+    results["shardTrack.paint_window"] = timed(w.grab, args.repeat)
+    w.close()
+    w.deleteLater()
+    settle(app)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    # Prints the change against an earlier result file, same sizes only
+    for size, metrics in new["results"].items():
+        before = old.get("results", {}).get(size)
+        if not before:
+            continue
+        print(f"{size} characters vs {old.get('commit')}")
+        for name, ms in metrics.items():
+            if name in before and before[name] > 0:
+                print(f"  {name:<24}{before[name]:10.2f} ->{ms:10.2f} ms  {(ms / before[name] - 1) * 100:+6.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timings of the tracker GUI hot paths on synthetic rosters")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    parser.add_argument("--edits", type=int, default=50, help="counter clicks averaged for _on_counter")
+    parser.add_argument("--twink-ratio", type=float, default=0.3)
+    parser.add_argument("--inactive-ratio", type=float, default=0.2)
+    parser.add_argument("--output", default="bench_gui.json", help="machine readable results")
+    parser.add_argument("--compare", metavar="OLD.json", help="earlier result file to compare against")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    old = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    report = {"commit": git_commit(), "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(), "qt": QtCore.QT_VERSION_STR,
+              "platform": f"{platform.system()} {platform.machine()} ({os.environ['QT_QPA_PLATFORM']})",
+              "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+              "unit": "ms", "results": {}}
+    cwd = os.getcwd()
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as d:
+            os.chdir(d)
+            try:
+                seed_icon_cache()
+                results = bench_raid_tracker(app, size, args)
+                results.update(bench_shard_track(app, size, args))
+            finally:
+                os.chdir(cwd)
+        report["results"][str(size)] = results
+        print(f"{size} characters")
+        for name, ms in results.items():
+            print(f"  {name:<24}{ms:10.2f} ms")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    if old is not None:
+        compare(old, report)
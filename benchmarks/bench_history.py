@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import tempfile
+
+from synthetic import make_roster
+from bench_storage import timed
+
+from lootLedger import LootLedger, COUNTER_COLS
+from quotientHistory import QuotientHistory
+
+
+def simulate(size, weeks, per_raid, keyframe_every):
+    # A season of weekly raids with a few manual clicks in between; returns the
+    # history plus the expected counters/quotients after every raid
+    rng = random.Random(size)
+    ledger = LootLedger(make_roster(size, seed=size))
+    d = tempfile.mkdtemp()
+    history = QuotientHistory(os.path.join(d, "raid_data.json"), keyframe_every)
+    names = [e["Name"] for e in ledger.active()]
+    expected = []
+    for week in range(weeks):
+        for _ in range(rng.randint(0, 5)):
+            ledger.increment(ledger.get(rng.choice(names)), rng.choice(COUNTER_COLS), rng.choice([-1, 1]))
+        people = rng.sample(names, per_raid)
+        drops = [(rng.choice(people), rng.choice(COUNTER_COLS[1:])) for _ in range(rng.randint(2, 6))]
+        raid = ledger.commit_raid(people, drops, f"week {week + 1}")
+        history.record(ledger, raid["id"], raid["date"])
+        expected.append(({e["Name"]: [e.get(k, 0) for k in COUNTER_COLS] for e in ledger.active()},
+                         {m["Name"]: ledger.quotient(m) for m in ledger.mains()}))
+    return history, expected, ledger
+
+
+def bench(size, weeks, per_raid, keyframe_every):
+    history, expected, ledger = simulate(size, weeks, per_raid, keyframe_every)
+    for frame, (counters, quotients) in enumerate(expected):
+        state = history.state_at(frame)
+        if any(state[n] != row for n, row in counters.items()):
+            raise AssertionError(f"counters differ at frame {frame}")
+    mains = [m["Name"] for m in ledger.mains()]
+    for name in mains[:20]:
+        series = history.series(name)
+        if [p["quotient"] for p in series] != [q[name] for _, q in expected]:
+            raise AssertionError(f"quotient series of {name} differs")
+    if [q for _, q in history.quotient_table()] != [q for _, q in expected]:
+        raise AssertionError("quotient table differs")
+    # Reloading from disk gives the same frames
+    if QuotientHistory(os.path.join(os.path.dirname(history.path), "raid_data.json")).frames != history.frames:
+        raise AssertionError("reloaded history differs")
+    last = len(history.frames) - 1
+    return {
+        "file size (KB)": os.path.getsize(history.path) / 1024,
+        "state at last raid (ms)": timed(lambda: history.state_at(last), 5),
+        "one quotient (ms)": timed(lambda: history.quotient(mains[0], last), 5),
+        "full season series (ms)": timed(lambda: history.series(mains[0]), 5),
+        "all mains, full season (ms)": timed(history.quotient_table, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Size and query cost of the per-raid quotient history")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--participants", type=int, default=24)
+    parser.add_argument("--keyframe-every", type=int, default=8)
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(f"{size} characters, {args.weeks} raids")
+        for name, value in bench(size, args.weeks, args.participants, args.keyframe_every).items():
+            print(f"  {name:<30}{value:10.2f}")
@@ -0,0 +1,34 @@
+import argparse
+
+from synthetic import make_roster
+from bench_storage import timed
+
+from lootLedger import LootLedger
+from quotientEngine import QuotientEngine, load_numpy
+
+
+def bench(size):
+    ledger = LootLedger(make_roster(size, seed=size))
+    per_row = lambda: {m["Name"]: ledger.quotient(m) for m in ledger.mains()}
+    expected = per_row()
+    results = {"per-row": timed(per_row, 5)}
+    for label, min_rows in (("python", None), ("numpy", 0)):
+        if min_rows == 0 and load_numpy() is None:
+            continue
+        engine = QuotientEngine(ledger, numpy_min_rows=min_rows)
+        results[f"{label} rebuild"] = timed(engine.rebuild, 3)
+        if engine.quotients() != expected:
+            raise AssertionError(f"{label} quotients differ from LootLedger.quotient")
+        results[f"{label} batch"] = timed(engine.quotients, 5)
+        results[f"{label} ranking"] = timed(engine.ranking, 5)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quotient ranking: per-row vs. the column store engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(f"{size} characters")
+        for name, ms in bench(size).items():
+            print(f"  {name:<18}{ms:10.2f} ms")
@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from synthetic import make_roster
+
+from lootLedger import LootLedger
+from lootJournal import JournalStore
+from sqliteStore import SqliteStore
+
+
+def timed(fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    return best * 1000
+
+
+def bench(size, edits):
+    results = {}
+    with tempfile.TemporaryDirectory() as d:
+        data_file = os.path.join(d, "raid_data.json")
+        with open(data_file, "w") as f:
+            json.dump(make_roster(size), f, indent=2)
+
+        ledger = LootLedger()
+        store = JournalStore(data_file)
+        results["json first load"] = timed(lambda: store.load(ledger))
+        results["json full save"] = timed(lambda: store.write_snapshot(store.snapshot(ledger)), 3)
+        store.close()
+        # The save moved the inactive characters to raid_data.archive.jsonl; from
+        # now on a start reads the active roster only
+        ledger = LootLedger()
+        store = JournalStore(data_file)
+        results["json load"] = timed(lambda: store.load(ledger))
+        results["json archive load"] = timed(ledger.load_archive)
+        ledger.listeners.append(store.record)
+        mains = ledger.mains()
+        results["json per edit"] = timed(lambda: [ledger.increment(mains[i % len(mains)], "Raids", 1)
+                                                  for i in range(edits)]) / edits
+        store.close()
+
+        # First load migrates raid_data.json (journal tail included) into raid_data.db
+        ledger = LootLedger()
+        store = SqliteStore(data_file)
+        results["sqlite migrate"] = timed(lambda: store.load(ledger))
+        store.close()
+        ledger = LootLedger()
+        store = SqliteStore(data_file)
+        results["sqlite load"] = timed(lambda: store.load(ledger))
+        results["sqlite archive load"] = timed(ledger.load_archive)
+        results["sqlite full save"] = timed(lambda: store.import_entries(ledger.all_entries()), 3)
+        ledger.listeners.append(store.record)
+        mains = ledger.mains()
+        results["sqlite per edit"] = timed(lambda: [ledger.increment(mains[i % len(mains)], "Raids", 1)
+                                                    for i in range(edits)]) / edits
+        store.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load/save timings of the json and sqlite storage backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(f"{size} characters")
+        for name, ms in bench(size, args.edits).items():
+            print(f"  {name:<18}{ms:10.2f} ms")
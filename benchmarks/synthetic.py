@@ -0,0 +1,43 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lootLedger import COUNTER_COLS
+
+CLASSES = ["Burglar", "Captain", "Champion", "Guardian", "Hunter", "Loremaster", "Minstrel"]
+
+
+def make_roster(n, twink_ratio=0.3, inactive_ratio=0.2, seed=1):
+    # Entries in raid_data.json layout: about twink_ratio of the characters are twinks
+    # of a random earlier main, inactive_ratio of them sit in the archive
+    rng = random.Random(seed)
+    entries, mains = [], []
+    for i in range(n):
+        e = {" ": 0}
+        raids = rng.randint(0, 40)
+        e["Raids"] = raids
+        for col in COUNTER_COLS[1:]:
+            e[col] = rng.randint(0, max(1, raids // 8))
+        e.update({"Class": rng.choice(CLASSES), "Name": f"Char{i:05d}", "Quotient": 1.0,
+                  "active": rng.random() >= inactive_ratio})
+        if mains and rng.random() < twink_ratio:
+            main = rng.choice(mains)
+            e.update({"is_main": False, "is_twink": True, "Main": main["Name"]})
+            main["Twinks"].append(e["Name"])
+        else:
+            e.update({"is_main": True, "is_twink": False, "Twinks": []})
+            mains.append(e)
+        entries.append(e)
+    return entries
+
+
+def make_shards(n_groups, names, seed=1):
+    # shard_count.json layout: groups of 2-6 players (the tracker's limits) drawn
+    # from the roster names, about a third of them already holding a shard
+    rng = random.Random(seed)
+    return [{"group": f"Group {g + 1}",
+             "players": [{"name": name, "shards": int(rng.random() < 0.35)}
+                         for name in rng.sample(names, min(len(names), rng.randint(2, 6)))]}
+            for g in range(n_groups)]
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import re
+
+from dataStore import write_json_atomic
+
+# Reads LOTRO chat logs (/chatlog) and turns loot and raid lines into raid
+# sessions: everybody seen in the raid gets Raids +1, every recognized award +1
+# on its slot. Logs are read in chunks from where the last run stopped, so a log
+# of a whole season costs no more than its new part. The offset is kept in the
+# recorded raid itself (raid["source"], journaled with it) and in
+# raid_data.chatlog.json for runs that found nothing to record.
+CHUNK = 1 << 20
+HEAD = 1024  # bytes hashed to tell a log from a new file under the same name
+
+# Cheap test on the raw bytes (bytes.find, much faster than one regex over the
+# chunk); only lines containing one of these are decoded and run through the
+# matchers below
+_KEYWORDS = (b"acquired", b"received", b" won ", b"raid", b"Raid")
+
+_STAMP = r"^(?:\[\d{1,2}:\d{2}(?::\d{2})?(?: ?[AP]M)?\] ?)?"   # optional [8:15 PM] time stamp
+_NAME = r"(?P<name>You|[^\W\d_][\w'-]*)"
+LOOT = re.compile(_STAMP + r"(?:\[Loot\] ?)?" + _NAME + r" (?:has |have )?(?:acquired|received|won)"
+                  r"(?: (?P<count>\d+))? ?\[(?P<item>[^\]]+)\]")
+JOIN = re.compile(_STAMP + _NAME + r" (?:has |have )?joined (?:your|the|a) raid")
+RAID_CHAT = re.compile(_STAMP + r"\[Raid\] (?P<name>[^\W\d_][\w'-]*):")
+END = re.compile(_STAMP + r"(?:Your raid has been disbanded|The raid has been disbanded|"
+                 r"You (?:have )?left (?:your|the) raid|You leave your raid)")
+
+# Item name -> tracker counter, first match wins. The named drops go first, the
+# set pieces are recognized by the usual words for their slot.
+ITEM_SLOTS = [
+    ("Storvâgûn Qitems", r"storv[aâ]g[uû]n"),
+    ("Zaudru Qitem", r"zaudru"),
+    ("Mírdanant", r"m[ií]rdanant"),
+    ("Beryl shard", r"beryl shard"),
+    ("Helmet", r"\b(?:helm|helmet|hat|hood|cowl|circlet|crown|mask)\b"),
+    ("Shoulder", r"\b(?:shoulders?|shoulder-guards|pauldrons|mantle|epaulets?|spaulders)\b"),
+    ("Gloves", r"\b(?:gloves|gauntlets|grips|hand-wraps|mitts)\b"),
+    ("Breast", r"\b(?:breastplate|chest|jacket|robe|coat|hauberk|tunic|cuirass|jerkin|vest)\b"),
+    ("Legs", r"\b(?:leggings|legs|trousers|breeches|greaves|leg-guards|chausses)\b"),
+    ("Boots", r"\b(?:boots|shoes|sabatons|footwraps|treads)\b"),
+]
+
+
+def state_file_for(data_file):
+    return os.path.splitext(data_file)[0] + ".chatlog.json"
+
+
+def _decode(raw):
+    # The game writes UTF-8, older logs may be Windows-1252
+    try:
+        return raw.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return raw.decode("cp1252", errors="replace").rstrip("\r")
+
+
+def _candidate_lines(buf, end):
+    # (start, end) of the lines in buf[:end] that contain a keyword, in order
+    lines = {}
+    for kw in _KEYWORDS:
+        i = buf.find(kw, 0, end)
+        while i != -1:
+            stop = buf.find(b"\n", i, end)
+            lines[buf.rfind(b"\n", 0, i) + 1] = stop
+            i = buf.find(kw, stop + 1, end)
+    return sorted(lines.items())
+
+
+class ChatLogReader:
+    # The complete lines appended since `offset`, read CHUNK bytes at a time.
+    # candidates() yields (offset after the line, text) for the lines that pass
+    # the prefilter and leaves `offset` after the last complete line, so calling
+    # it again later picks up what the game wrote meanwhile.
+    def __init__(self, path, offset=0, chunk_size=CHUNK):
+        self.path = path
+        self.offset = offset
+        self.chunk_size = chunk_size
+
+    def candidates(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            buf = b""
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                buf += chunk
+                end = buf.rfind(b"\n") + 1
+                if not end:
+                    continue  # one line longer than a chunk
+                for start, stop in _candidate_lines(buf, end):
+                    yield self.offset + stop + 1, _decode(buf[start:stop])
+                self.offset += end
+                buf = buf[end:]
+
+
+class ChatLogParser:
+    # Collects one raid session from log lines: participants (raid joins, raid
+    # chat and everybody who got loot) and drops, names mapped onto the active
+    # roster case-insensitively. Unknown names and items are counted, not fatal.
+    def __init__(self, ledger, me=None, item_slots=ITEM_SLOTS):
+        self.ledger = ledger
+        self.me = me                  # the logging character, for the "You ..." lines
+        self._slots = [(slot, re.compile(pattern, re.IGNORECASE)) for slot, pattern in item_slots]
+        self._roster = {}
+        self.unknown = {}             # name -> lines skipped
+        self.unmatched = {}           # item -> awards not tracked
+        self.reset()
+
+    def reset(self):
+        self.in_raid = False          # loot only counts between a raid line and the end of the raid
+        self.participants = {}        # name -> None, insertion ordered
+        self.drops = []               # [(name, slot)]
+
+    def refresh_roster(self):
+        self._roster = {e.name.lower(): e.name for e in self.ledger.active()}
+
+    def has_session(self):
+        return bool(self.participants or self.drops)
+
+    def _name(self, name):
+        if name == "You":
+            name = self.me or name
+        found = self._roster.get(name.lower())
+        if found is None:
+            self.unknown[name] = self.unknown.get(name, 0) + 1
+        return found
+
+    def slot_of(self, item):
+        for slot, pattern in self._slots:
+            if pattern.search(item):
+                return slot
+        return None
+
+    def feed(self, line):
+        # True if the line ends the raid
+        m = LOOT.match(line)
+        if m is not None:
+            if not self.in_raid:
+                return False
+            name = self._name(m["name"])
+            if name is None:
+                return False
+            self.participants[name] = None
+            slot = self.slot_of(m["item"])
+            if slot is None:
+                self.unmatched[m["item"]] = self.unmatched.get(m["item"], 0) + 1
+            else:
+                self.drops += [(name, slot)] * int(m["count"] or 1)
+            return False
+        m = JOIN.match(line) or RAID_CHAT.match(line)
+        if m is not None:
+            self.in_raid = True
+            name = self._name(m["name"])
+            if name is not None:
+                self.participants[name] = None
+            return False
+        if END.match(line) is not None:
+            self.in_raid = False
+            return True
+        return False
+
+
+class ChatLogIngest:
+    # One log file: where to resume, reading, and recording the sessions found.
+    # poll() can be called repeatedly while the game keeps writing (--follow).
+    def __init__(self, ledger, path, state_file, me=None, from_start=False, item_slots=ITEM_SLOTS):
+        self.ledger = ledger
+        self.path = os.path.abspath(path)
+        self.state_file = state_file
+        self.state = self._load_state()
+        self.parser = ChatLogParser(ledger, me if me is not None else self.state.get("me"), item_slots)
+        self.head = self._head()
+        offset = 0 if from_start else self.resume_offset()
+        self.reader = ChatLogReader(self.path, offset)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _head(self, length=HEAD):
+        with open(self.path, "rb") as f:
+            data = f.read(length)
+        return {"head": hashlib.sha1(data).hexdigest(), "head_len": len(data)}
+
+    def resume_offset(self):
+        # The furthest offset recorded for this very file (same first bytes);
+        # a log that was replaced or cut starts over
+        size = os.path.getsize(self.path)
+        marks = [r["source"] for r in self.ledger.raids if (r.get("source") or {}).get("file") == self.path]
+        saved = self.state.get("files", {}).get(self.path)
+        if saved:
+            marks.append(saved)
+        best = 0
+        heads = {}
+        for mark in marks:
+            length = mark.get("head_len", HEAD)
+            if length not in heads:
+                heads[length] = self._head(length)["head"]
+            if mark.get("head") == heads[length] and mark.get("offset", 0) <= size:
+                best = max(best, mark["offset"])
+        return best
+
+    def poll(self, date, final=True, dry_run=False, note=None):
+        # Reads what is new. A session is recorded when the raid is disbanded or
+        # left, and, if final, whatever is still open at the end. Returns the
+        # recorded raids (the would-be sessions with dry_run).
+        parser = self.parser
+        parser.refresh_roster()
+        found = []
+        for end, line in self.reader.candidates():
+            if parser.feed(line) and parser.has_session():
+                found.append(self._close(end, date, dry_run, note))
+        if final and parser.has_session():
+            found.append(self._close(self.reader.offset, date, dry_run, note))
+        if not dry_run and not parser.has_session():
+            self.save_state()
+        return found
+
+    def _close(self, end, date, dry_run, note):
+        parser = self.parser
+        participants, drops = list(parser.participants), list(parser.drops)
+        parser.reset()
+        if dry_run:
+            return {"date": date, "participants": participants, "drops": [list(d) for d in drops]}
+        source = dict(self.head, file=self.path, offset=end)
+        note = note if note is not None else f"chat log {os.path.basename(self.path)}"
+        return self.ledger.commit_raid(participants, drops, date, note, source=source)
+
+    def save_state(self):
+        # Only called with no session open, so everything read is accounted for
+        state = dict(self.state)
+        files = dict(state.get("files", {}))
+        files[self.path] = dict(self.head, offset=self.reader.offset)
+        state["files"] = files
+        if self.parser.me:
+            state["me"] = self.parser.me
+        write_json_atomic(self.state_file, state, ensure_ascii=False, indent=1)
+        self.state = state
@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+
+
+def write_text_atomic(path, text, encoding="utf-8"):
+    # Write next to the target and rename over it, so a crash mid-write never
+    # leaves a truncated file behind.
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    write_text_atomic(path, json.dumps(data, **dump_kwargs))
+
+
+class BackgroundWriter:
+    # Single worker thread running write(data) off the caller's thread.
+    # Only the newest pending snapshot is kept, so bursts collapse into one write.
+    def __init__(self, write, on_error=None):
+        self.write = write
+        self.on_error = on_error
+        self.last_error = None
+        self._cond = threading.Condition()
+        self._pending = None
+        self._has_pending = False
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="BackgroundWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, data):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            self._pending = data
+            self._has_pending = True
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        # Block until everything submitted so far is on disk; returns the error of
+        # the last write (None on success).
+        with self._cond:
+            self._cond.wait_for(lambda: not self._has_pending and not self._writing, timeout)
+            return self.last_error
+
+    def close(self, timeout=None):
+        error = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._has_pending or self._closed)
+                if not self._has_pending:
+                    return
+                data, self._pending, self._has_pending = self._pending, None, False
+                self._writing = True
+            error = None
+            try:
+                self.write(data)
+            except Exception as exc:
+                error = exc
+            with self._cond:
+                self.last_error = error
+                self._writing = False
+                self._cond.notify_all()
+            if error is not None and self.on_error is not None:
+                self.on_error(error)
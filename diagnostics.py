@@ -0,0 +1,78 @@
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from perfStats import ENV_VAR
+
+
+class DiagnosticsDialog(QtWidgets.QDialog):
+    # The PerfStats report, refreshed every second while open, so the numbers
+    # can be watched during a raid and copied into a bug report
+    def __init__(self, stats, log_file, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"{title} Diagnostics")
+        self.stats = stats
+        self.log_file = log_file
+        self.title = title
+        self.resize(820, 420)
+        layout = QtWidgets.QVBoxLayout(self)
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.text.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        layout.addWidget(self.text)
+        btn_h = QtWidgets.QHBoxLayout()
+        reset_btn = QtWidgets.QPushButton("Reset")
+        reset_btn.clicked.connect(self._reset)
+        save_btn = QtWidgets.QPushButton("Append to log")
+        save_btn.clicked.connect(self._save)
+        close_btn = QtWidgets.QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        btn_h.addWidget(reset_btn)
+        btn_h.addWidget(save_btn)
+        btn_h.addStretch()
+        btn_h.addWidget(close_btn)
+        layout.addLayout(btn_h)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        self.text.setPlainText(self.stats.report(self.title))
+
+    def _reset(self):
+        self.stats.reset()
+        self.refresh()
+
+    def _save(self):
+        try:
+            self.stats.dump(self.log_file, self.title)
+        except OSError as exc:
+            QtWidgets.QMessageBox.warning(self, "Save Failed", f"Could not write {self.log_file}:\n{exc}")
+            return
+        QtWidgets.QMessageBox.information(self, "Saved", f"Report appended to {self.log_file}.")
+
+
+def install_diagnostics(window, stats, log_file, title):
+    # Hidden panel on Ctrl+Shift+D. Without instrumentation it only says how to
+    # turn it on.
+    def show():
+        if stats is None:
+            QtWidgets.QMessageBox.information(
+                window, "Diagnostics", f"Timing is off. Start with --perf or set {ENV_VAR}=1 to record it.")
+            return
+        dlg = getattr(window, "_diagnostics", None)
+        if dlg is None:
+            dlg = window._diagnostics = DiagnosticsDialog(stats, log_file, title, window)
+        dlg.show()
+        dlg.raise_()
+    shortcut = QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+Shift+D"), window)
+    shortcut.activated.connect(show)
+    return shortcut
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lootLedger import COUNTER_COLS
+from lootFormula import DEFAULT_FORMULA, CLASSES, load_formulas, find_formula, formulas_file_for
+from priorityIndex import LOOT_SLOTS
+from quotientEngine import load_numpy
+
+# Monte-Carlo comparison of loot rules on synthetic seasons. Every policy plays
+# the same seasons (roster, attendance and drops come from one random stream,
+# tie-breaks from another), a batch of seasons is one set of numpy arrays
+# stepped raid by raid, and batches run in a process pool.
+#
+# "quotient" is the tracker's rule: a drop goes to the participant whose main
+# has the lowest quotient over main and twinks, same order as the priority
+# index (then more raids, then fewer of that slot). The quotient is the one of
+# a lootFormula formula (the standard one unless --formula picks another), which
+# also scores the loot per raid reported for every policy.
+# Qt-free; numpy is required here.
+POLICIES = ("quotient", "dkp", "rotation", "random")
+SET_SLOTS = ["Helmet", "Shoulder", "Gloves", "Breast", "Legs", "Boots"]
+ATTENDANCE = {"steady": (18, 2), "mixed": (4, 2), "casual": (2, 2)}  # Beta(a, b) of each player's attendance
+
+DEFAULTS = {
+    "raids": 40,            # raid nights per season
+    "players": 24,
+    "raid_size": 12,
+    "max_twinks": 2,
+    "twink_ratio": 0.3,     # chance of each of a player's max_twinks twinks to exist
+    "twink_play": 0.25,     # chance a player with twinks brings one instead of the main
+    "attendance": "mixed",  # ATTENDANCE name or [a, b]
+    "drops": {              # mean drops per raid night, Poisson
+        "Helmet": 0.5, "Shoulder": 0.5, "Gloves": 0.5, "Breast": 0.5, "Legs": 0.5, "Boots": 0.5,
+        "Storvâgûn Qitems": 1.0, "Zaudru Qitem": 1.0, "Mírdanant": 0.25, "Beryl shard": 1.0,
+    },
+    "dkp_earn": 10,         # points per raid attended
+    "dkp_price": 20,        # points paid per item
+}
+
+_COL = {key: i for i, key in enumerate(COUNTER_COLS)}
+_RAIDS = _COL["Raids"]
+_SETIDX = [_COL[key] for key in SET_SLOTS]
+
+
+def load_config(path=None, **overrides):
+    cfg = json.loads(json.dumps(DEFAULTS))
+    if path:
+        with open(path, encoding="utf-8") as f:
+            user = json.load(f)
+        cfg["drops"].update(user.pop("drops", {}))
+        cfg.update(user)
+    cfg.update({k: v for k, v in overrides.items() if v is not None})
+    validate_config(cfg)
+    return cfg
+
+
+def validate_config(cfg):
+    unknown = set(cfg["drops"]) - set(LOOT_SLOTS)
+    if unknown:
+        raise ValueError(f"unknown drop slot(s): {', '.join(sorted(unknown))}")
+    if isinstance(cfg["attendance"], str) and cfg["attendance"] not in ATTENDANCE:
+        raise ValueError(f"attendance must be one of {', '.join(ATTENDANCE)} or [a, b]")
+    if cfg["players"] < 1 or cfg["raid_size"] < 1 or cfg["raids"] < 1 or cfg["max_twinks"] < 0:
+        raise ValueError("players, raid_size and raids must be positive, max_twinks not negative")
+    if any(v < 0 for v in cfg["drops"].values()):
+        raise ValueError("drop rates must not be negative")
+
+
+def _scores(np, formula, branch, cls_rows):
+    # Formula quotients of branch totals (... x COUNTER_COLS), same shape minus the last axis
+    shape = branch.shape[:-1]
+    flat = branch.reshape(-1, branch.shape[-1])
+    return formula.values(np, flat[:, formula.col_index], flat[:, _RAIDS], cls_rows.reshape(-1)).reshape(shape)
+
+
+def simulate(cfg, policy, seeds, seasons, formula=DEFAULT_FORMULA):
+    # One batch: `seasons` seasons side by side, seeds = (environment, tie-breaks)
+    # SeedSequences. Returns per player arrays (seasons x players) plus the Gini
+    # coefficient of each season.
+    np = load_numpy()
+    env_seed, pick_seed = seeds
+    env, pick = np.random.default_rng(env_seed), np.random.default_rng(pick_seed)
+    S, P, T, R = seasons, cfg["players"], cfg["max_twinks"], cfg["raids"]
+    a, b = ATTENDANCE[cfg["attendance"]] if isinstance(cfg["attendance"], str) else cfg["attendance"]
+    slots = [slot for slot in LOOT_SLOTS if cfg["drops"].get(slot, 0) > 0]
+    rates = np.array([cfg["drops"][slot] for slot in slots])
+
+    # The season's environment, drawn up front so it does not depend on the policy
+    has = np.ones((S, P, 1 + T), dtype=bool)
+    has[:, :, 1:] = env.random((S, P, T)) < cfg["twink_ratio"]
+    p_att = env.beta(a, b, (S, P))
+    attend = env.random((R, S, P)) < p_att
+    order = env.random((R, S, P))
+    twink_roll = env.random((R, S, P))
+    twink_pick = env.random((R, S, P))
+    drops = env.poisson(rates, (R, S, len(slots)))
+    # each player's class, for formulas with per class rules
+    cls_rows = np.array([formula.class_row(c) for c in CLASSES], dtype=np.intp)[env.integers(len(CLASSES), size=(S, P))]
+
+    s_idx = np.arange(S)[:, None]
+    p_idx = np.arange(P)[None, :]
+    counts = np.zeros((S, P, 1 + T, len(COUNTER_COLS)), dtype=np.int64)  # per character
+    branch = np.zeros((S, P, len(COUNTER_COLS)), dtype=np.int64)         # main plus twinks
+    n_twinks = has[:, :, 1:].sum(axis=2)
+    twink_rank = np.cumsum(has[:, :, 1:], axis=2)
+    dkp = np.zeros((S, P))
+    last_won = -pick.random((S, P))  # rotation: random start order, then whoever waited longest
+    full_at = np.full((S, P), -1)
+    step = 0
+
+    for r in range(R):
+        att = attend[r]
+        if cfg["raid_size"] < P:
+            first = np.argsort(np.where(att, order[r], 2.0), axis=1)[:, :cfg["raid_size"]]
+            seated = np.zeros_like(att)
+            np.put_along_axis(seated, first, True, axis=1)
+            att &= seated
+        use_twink = (twink_roll[r] < cfg["twink_play"]) & (n_twinks > 0)
+        k = (twink_pick[r] * n_twinks).astype(np.int64) + 1
+        char = np.where(use_twink, 1 + np.argmax(twink_rank >= k[:, :, None], axis=2), 0) if T else \
+            np.zeros((S, P), dtype=np.int64)
+        counts[s_idx, p_idx, char, _RAIDS] += att
+        branch[:, :, _RAIDS] += att
+        dkp += cfg["dkp_earn"] * att
+        in_raid = att.any(axis=1)
+        mine = counts[s_idx, p_idx, char]  # counters of the character each player brought
+        tie = pick.random((S, P))          # tie-break order for this raid (random rolls per drop)
+        if policy == "quotient":
+            q = _scores(np, formula, branch, cls_rows)
+            fewer_raids = -branch[:, :, _RAIDS]
+
+        for j, slot in enumerate(slots):
+            col = _COL[slot]
+            scored = col in formula.col_index
+            for i in range(int(drops[r, :, j].max())):
+                live = (drops[r, :, j] > i) & in_raid
+                if slot in SET_SLOTS:
+                    # set pieces go to whoever still lacks that slot, else to anybody
+                    need = att & (mine[:, :, col] == 0)
+                    elig = np.where(need.any(axis=1)[:, None], need, att)
+                else:
+                    elig = att
+                if policy == "quotient":
+                    keys = (q, fewer_raids, branch[:, :, col], tie)
+                elif policy == "dkp":
+                    keys = (-dkp, tie)
+                elif policy == "rotation":
+                    keys = (last_won,)
+                else:
+                    keys = (pick.random((S, P)),)
+                s = np.flatnonzero(live)
+                w = pick_first(elig, keys)[s]
+                counts[s, w, char[s, w], col] += 1
+                mine[s, w, col] += 1
+                branch[s, w, col] += 1
+                if scored and policy == "quotient":
+                    q[s, w] = _scores(np, formula, branch[s, w], cls_rows[s, w])
+                dkp[s, w] -= cfg["dkp_price"]
+                step += 1
+                last_won[s, w] = step
+
+        done = (counts[:, :, 0, _SETIDX] > 0).all(axis=2) & (full_at < 0)
+        full_at[done] = branch[:, :, _RAIDS][done]
+
+    raids = branch[:, :, _RAIDS]
+    per_raid = np.where(raids > 0, _scores(np, formula, branch, cls_rows), np.nan)
+    items = np.where(raids > 0, per_raid, 0.0) * raids  # the formula's weighted loot
+    gini = np.array([gini_of(row[~np.isnan(row)]) for row in per_raid])
+    return {"per_raid": per_raid, "raids": raids, "items": items, "full_at": full_at, "gini": gini}
+
+
+def pick_first(elig, keys):
+    # Per season the eligible player that comes first by keys (most significant
+    # first, the last one must break every tie). Narrowing the candidates key
+    # by key costs a few row minimums, a full sort per row would cost more.
+    np = load_numpy()
+    cand = elig
+    for key in keys[:-1]:
+        masked = np.where(cand, key, np.inf)
+        cand = cand & (masked == masked.min(axis=1, keepdims=True))
+    return np.argmin(np.where(cand, keys[-1], np.inf), axis=1)
+
+
+def gini_of(values):
+    np = load_numpy()
+    if len(values) < 2 or values.sum() == 0:
+        return 0.0
+    x = np.sort(values)
+    n = len(x)
+    return float((2 * np.arange(1, n + 1) - n - 1).dot(x) / (n * x.sum()))
+
+
+def _run(args):
+    cfg, policy, seeds, seasons, formula = args
+    return policy, simulate(cfg, policy, seeds, seasons, formula)
+
+
+def run(cfg, seasons, policies=POLICIES, seed=1, batch=250, workers=None, formula=DEFAULT_FORMULA):
+    # Splits the seasons into batches (each batch seeded once and played by
+    # every policy) and runs them in a process pool; workers=0 runs inline
+    np = load_numpy()
+    sizes = [min(batch, seasons - i) for i in range(0, seasons, batch)]
+    seeds = [s.spawn(2) for s in np.random.SeedSequence(seed).spawn(len(sizes))]
+    tasks = [(cfg, policy, s, n, formula) for s, n in zip(seeds, sizes) for policy in policies]
+    parts = {policy: [] for policy in policies}
+    if workers == 0:
+        results = map(_run, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_run, tasks)
+    try:
+        for policy, part in results:
+            parts[policy].append(part)
+    finally:
+        if workers != 0:
+            pool.shutdown()
+    return {policy: {key: np.concatenate([p[key] for p in ps]) for key in ps[0]} for policy, ps in parts.items()}
+
+
+def summarize(result):
+    np = load_numpy()
+    per_raid = result["per_raid"][~np.isnan(result["per_raid"])]
+    full = result["full_at"][result["full_at"] >= 0]
+    p10, p50, p90 = np.percentile(per_raid, [10, 50, 90]) if len(per_raid) else (0.0, 0.0, 0.0)
+    return {
+        "loot_per_raid": {"mean": float(per_raid.mean()) if len(per_raid) else 0.0,
+                          "p10": float(p10), "p50": float(p50), "p90": float(p90),
+                          "cv": float(per_raid.std() / per_raid.mean()) if len(per_raid) and per_raid.mean() else 0.0},
+        "full_set": {"share": len(full) / result["full_at"].size,
+                     "median_raids": float(np.median(full)) if len(full) else None,
+                     "p90_raids": float(np.percentile(full, 90)) if len(full) else None},
+        "gini": float(result["gini"].mean()),
+    }
+
+
+def report(summary):
+    lines = [f"{'policy':<10}{'loot/raid':>10}{'p10':>7}{'p50':>7}{'p90':>7}{'cv':>7}{'gini':>7}"
+             f"{'full set':>10}{'raids p50':>11}{'p90':>6}"]
+    for policy, s in summary.items():
+        lr, fs = s["loot_per_raid"], s["full_set"]
+        med = f"{fs['median_raids']:.0f}" if fs["median_raids"] is not None else "-"
+        p90 = f"{fs['p90_raids']:.0f}" if fs["p90_raids"] is not None else "-"
+        lines.append(f"{policy:<10}{lr['mean']:>10.3f}{lr['p10']:>7.3f}{lr['p50']:>7.3f}{lr['p90']:>7.3f}"
+                     f"{lr['cv']:>7.2f}{s['gini']:>7.3f}{fs['share'] * 100:>9.0f}%{med:>11}{p90:>6}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare loot rules on simulated raid seasons")
+    parser.add_argument("--config", help="JSON with any of the DEFAULTS keys, e.g. {\"drops\": {\"Helmet\": 1}}")
+    parser.add_argument("--seasons", type=int, default=2000)
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--raids", type=int)
+    parser.add_argument("--players", type=int)
+    parser.add_argument("--raid-size", type=int)
+    parser.add_argument("--twink-ratio", type=float)
+    parser.add_argument("--attendance", choices=sorted(ATTENDANCE))
+    parser.add_argument("--formula", help="loot value formula from the formulas file, default the standard quotient")
+    parser.add_argument("--data-file", default="raid_data.json", help="the formulas are read from its .formulas.json")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=250, help="seasons per numpy batch / pool task")
+    parser.add_argument("--workers", type=int, help="processes, default one per core, 0 runs inline")
+    parser.add_argument("--json", action="store_true", help="machine readable output")
+    args = parser.parse_args()
+    if load_numpy() is None:
+        sys.exit("fairnessSim needs numpy (pip install numpy)")
+    try:
+        cfg = load_config(args.config, raids=args.raids, players=args.players, raid_size=args.raid_size,
+                          twink_ratio=args.twink_ratio, attendance=args.attendance)
+        formula = DEFAULT_FORMULA
+        if args.formula:
+            formula = find_formula(load_formulas(formulas_file_for(args.data_file)), args.formula)
+    except (OSError, ValueError) as exc:
+        sys.exit(f"error: {exc}")
+    procs = 1 if args.workers == 0 else args.workers or os.cpu_count()
+    t = time.perf_counter()
+    results = run(cfg, args.seasons, args.policies, args.seed, args.batch, args.workers, formula)
+    summary = {policy: summarize(r) for policy, r in results.items()}
+    if args.json:
+        json.dump({"config": cfg, "formula": formula.spec, "seasons": args.seasons, "summary": summary}, sys.stdout, ensure_ascii=False, indent=1)
+        sys.stdout.write("\n")
+    else:
+        print(f"{args.seasons} seasons of {cfg['raids']} raids, {cfg['players']} players, "
+              f"{cfg['attendance']} attendance, {time.perf_counter() - t:.1f} s on {procs} "
+              f"process{'es' if procs != 1 else ''}, formula {formula.name}")
+        print(report(summary))
+        print("loot/raid: the formula's quotient at the end of the season (main and twinks), "
+              "full set: mains with all six set slots, raids attended until then")
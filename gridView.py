@@ -0,0 +1,64 @@
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QLine
+from PyQt5.QtGui import QColor, QPen
+
+# Grid lines of the trackers' trees: a grey line right of every cell and a black
+# one under it. The view draws them per row after the row's cells, instead of
+# every delegate paint saving the painter and building pens for each cell.
+COLUMN_PEN = QPen(QColor(136, 136, 136), 2)
+ROW_PEN = QPen(QColor(0, 0, 0), 2)
+
+
+class _RowGrid:
+    # Lines at y = 0 for one paint event, per (row height, tree level), reused
+    # by every row of that height; the view translates them to the row.
+    def __init__(self, view):
+        self.view = view
+        header = view.header()
+        self.cols = [(header.sectionViewportPosition(c), header.sectionSize(c))
+                     for c in range(header.count()) if not header.isSectionHidden(c)]
+        self._lines = {}
+
+    def lines(self, height, level):
+        key = (height, level)
+        lines = self._lines.get(key)
+        if lines is None:
+            bottom = height - 1
+            # the first cell starts after the branch area, like the cell the delegate gets
+            x0, w0 = self.cols[0]
+            left = x0 + self.view.indentation() * (level + self.view.rootIsDecorated())
+            columns = [QLine(x + w - 1, 0, x + w - 1, bottom) for x, w in self.cols]
+            row = QLine(left, bottom, self.cols[-1][0] + self.cols[-1][1] - 1, bottom)
+            lines = self._lines[key] = (columns, row)
+        return lines
+
+    def draw(self, painter, option, index):
+        rect = option.rect
+        columns, row = self.lines(rect.height(), 1 if index.parent().isValid() else 0)
+        painter.save()
+        painter.translate(0, rect.top())
+        painter.setPen(COLUMN_PEN)
+        painter.drawLines(columns)
+        painter.setPen(ROW_PEN)
+        painter.drawLine(row)
+        painter.restore()
+
+
+class GridTreeView(QtWidgets.QTreeView):
+    def paintEvent(self, event):
+        self._grid = _RowGrid(self)
+        super().paintEvent(event)
+
+    def drawRow(self, painter, option, index):
+        super().drawRow(painter, option, index)
+        self._grid.draw(painter, option, index)
+
+
+class GridTreeWidget(QtWidgets.QTreeWidget):
+    def paintEvent(self, event):
+        self._grid = _RowGrid(self)
+        super().paintEvent(event)
+
+    def drawRow(self, painter, option, index):
+        super().drawRow(painter, option, index)
+        self._grid.draw(painter, option, index)
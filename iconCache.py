@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QIcon, QColor, QImage
+
+PLACEHOLDER_COLORS = {
+    "Burglar": QColor(90, 90, 90),
+    "Captain": QColor(40, 90, 160),
+    "Champion": QColor(170, 40, 40),
+    "Guardian": QColor(120, 100, 40),
+    "Hunter": QColor(40, 130, 60),
+    "Loremaster": QColor(110, 60, 150),
+    "Minstrel": QColor(190, 140, 30),
+}
+
+
+def bundled_icon_dir():
+    # "icons" next to the script, or inside the PyInstaller bundle
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, "icons")
+
+
+def make_placeholder(cls, size=64):
+    pix = QPixmap(size, size)
+    pix.fill(Qt.transparent)
+    painter = QtGui.QPainter(pix)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setBrush(PLACEHOLDER_COLORS.get(cls, QColor(128, 128, 128)))
+    painter.setPen(QtGui.QPen(QColor(40, 40, 40), 2))
+    painter.drawRoundedRect(2, 2, size - 4, size - 4, 8, 8)
+    font = painter.font()
+    font.setBold(True)
+    font.setPixelSize(size // 2)
+    painter.setFont(font)
+    painter.setPen(Qt.white)
+    painter.drawText(pix.rect(), Qt.AlignCenter, cls[:1])
+    painter.end()
+    return pix
+
+
+class IconAtlas:
+    # All class icons at the roster's two row sizes, normal and selected, rendered
+    # once into one pixmap. Every cell is `size` big; child rows get the `inner`
+    # icon centered in it, so names line up with the parents'. Rows and the
+    # delegate draw from here, nothing is scaled or allocated per paint.
+    MODES = (QIcon.Normal, QIcon.Selected)
+
+    def __init__(self, icon_map, size, inner):
+        self.size = size
+        w, h = size.width(), size.height()
+        classes = [cls for cls, icon in icon_map.items() if icon]
+        self.pixmap = QPixmap(max(1, w * len(classes)), h * 4)
+        self.pixmap.fill(Qt.transparent)
+        self._rects = {}  # (class, small, selected) -> QRect in pixmap
+        painter = QtGui.QPainter(self.pixmap)
+        for col, cls in enumerate(classes):
+            for row, (small, mode) in enumerate((s, m) for s in (False, True) for m in self.MODES):
+                cell = QtCore.QRect(col * w, row * h, w, h)
+                pix = icon_map[cls].pixmap(inner if small else size, mode)
+                painter.drawPixmap(cell.x() + (w - pix.width()) // 2, cell.y() + (h - pix.height()) // 2, pix)
+                self._rects[(cls, small, mode == QIcon.Selected)] = cell
+        painter.end()
+        self._icons = {}
+        for cls in classes:
+            for small in (False, True):
+                icon = QIcon()
+                for mode in self.MODES:
+                    icon.addPixmap(self.pixmap.copy(self._rects[(cls, small, mode == QIcon.Selected)]), mode)
+                self._icons[(cls, small)] = icon
+
+    def rect(self, cls, small, selected=False):
+        return self._rects.get((cls, small, selected))
+
+    def icon(self, cls, small):
+        return self._icons.get((cls, small))
+
+
+class IconCache(QtCore.QObject):
+    # Class icons for the roster. load() never touches the network: it returns the
+    # disk cache, bundled icons or a painted placeholder right away. refresh() fetches
+    # missing or stale icons in a thread pool and emits iconsChanged once one arrived.
+    iconsChanged = QtCore.pyqtSignal()
+    _fetched = QtCore.pyqtSignal(str, bytes)
+
+    def __init__(self, urls, cache_dir="icon_cache", max_age_days=30, timeout=5, parent=None):
+        super().__init__(parent)
+        self.urls = urls
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 24 * 3600
+        self.timeout = timeout
+        self.icon_map = {}
+        self._pool = None
+        self._fetched.connect(self._on_fetched)
+
+    def cache_path(self, cls):
+        return os.path.join(self.cache_dir, f"{cls}.png")
+
+    def load(self):
+        for cls in self.urls:
+            pix = QPixmap()
+            for path in (self.cache_path(cls), os.path.join(bundled_icon_dir(), f"{cls}.png")):
+                if os.path.exists(path) and pix.load(path):
+                    break
+            else:
+                pix = make_placeholder(cls)
+            self.icon_map[cls] = QIcon(pix)
+        return self.icon_map
+
+    def stale(self, cls):
+        try:
+            return time.time() - os.path.getmtime(self.cache_path(cls)) > self.max_age
+        except OSError:
+            return True
+
+    def refresh(self, force=False):
+        todo = [cls for cls in self.urls if force or self.stale(cls)]
+        if not todo:
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="IconCache")
+        for cls in todo:
+            self._pool.submit(self._fetch, cls, self.urls[cls])
+
+    def _fetch(self, cls, url):
+        # Runs on a pool thread: download, validate and store; QPixmap stays on the GUI thread
+        try:
+            data = urllib.request.urlopen(url, timeout=self.timeout).read()
+        except Exception:
+            return
+        if QImage.fromData(data).isNull():
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self.cache_path(cls) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.cache_path(cls))
+        except OSError:
+            pass
+        self._fetched.emit(cls, data)
+
+    def _on_fetched(self, cls, data):
+        pix = QPixmap()
+        if pix.loadFromData(data):
+            self.icon_map[cls] = QIcon(pix)
+            self.iconsChanged.emit()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
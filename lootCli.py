@@ -0,0 +1,458 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from lootLedger import LootLedger, Character, COUNTER_COLS, validate_entries
+from storage import open_store, BACKENDS
+from quotientEngine import QuotientEngine
+from priorityIndex import PriorityIndex, LOOT_SLOTS
+from quotientHistory import QuotientHistory
+from dataStore import write_json_atomic
+from rosterCsv import export_csv, import_csv
+from chatLog import ChatLogIngest, state_file_for
+from lootFormula import DEFAULT_FORMULA, load_formulas, find_formula, formulas_file_for
+
+# Headless access to raid_data.json / shard_count.json for scripts and bots.
+# Nothing here imports Qt. Don't run writing commands while a tracker window
+# has the same files open, the window would overwrite the changes on its
+# next save.
+
+
+class CliError(Exception):
+    pass
+
+
+def open_roster(args):
+    store = open_store(args.data_file, args.storage)
+    ledger = LootLedger()
+    store.load(ledger)
+    ledger.listeners.append(store.record)
+    return ledger, store
+
+
+def close_roster(ledger, store):
+    if store.needs_compaction():
+        store.write_snapshot(store.snapshot(ledger))
+    store.close()
+
+
+def emit(args, data, text):
+    # --json for scripts, otherwise the human readable lines
+    if args.json:
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=1)
+        sys.stdout.write("\n")
+    else:
+        for line in text:
+            print(line)
+
+
+def get_active(ledger, name):
+    e = ledger.get(name)
+    if e is None:
+        raise CliError(f"no active character '{name}'")
+    return e
+
+
+def counters_of(e):
+    return dict(zip(COUNTER_COLS, e.counts))
+
+
+def formula_of(args):
+    # --formula NAME from raid_data.formulas.json, the tracker's quotient by default
+    if not args.formula:
+        return DEFAULT_FORMULA
+    return find_formula(load_formulas(formulas_file_for(args.data_file)), args.formula)
+
+
+# --- raid tracker ---
+def cmd_rank(args):
+    formula = formula_of(args)
+    ledger, store = open_roster(args)
+    engine = QuotientEngine(ledger, formula=formula)
+    if args.slot:
+        rows = [{"name": n, "quotient": q, "raids": raids, "items": count}
+                for n, q, raids, count in PriorityIndex(ledger, engine).top(args.slot, args.top)]
+        text = [f"{i:3}. {r['name']:<20}{r['quotient']:6.2f}  {r['raids']:4} raids  {r['items']}x {args.slot}"
+                for i, r in enumerate(rows, 1)]
+    else:
+        totals = engine.all_branch_totals()
+        rows = [{"name": n, "quotient": q, "raids": totals[n][0]} for n, q in engine.ranking()[:args.top]]
+        text = [f"{i:3}. {r['name']:<20}{r['quotient']:6.2f}  {r['raids']:4} raids" for i, r in enumerate(rows, 1)]
+    store.close()
+    emit(args, rows, text)
+
+
+def cmd_formulas(args):
+    # Loading checks the file; any mistake ends up as error and exit code 1
+    formulas = load_formulas(formulas_file_for(args.data_file))
+    data = [f.spec for f in formulas]
+    text = []
+    for f in formulas:
+        base = f.weights[0]
+        text.append(f"{f.name}: " + " + ".join(
+            f"{base[key]}*{key}" + (f" (max {f.caps[0][key]})" if f.caps[0][key] is not None else "")
+            for key in f.columns if base[key]) + " / Raids")
+        text += [f"  {cls}: own weights/caps for {', '.join(sorted(set(o.get('weights', {})) | set(o.get('caps', {}))))}"
+                 for cls, o in f.spec.get("classes", {}).items()]
+    emit(args, data, text)
+
+
+def cmd_show(args):
+    formula = formula_of(args)
+    ledger, store = open_roster(args)
+    store.close()
+    e = get_active(ledger, args.name)
+    data = {"name": e.name, "class": e.cls, "is_main": e.is_main, "is_twink": e.is_twink,
+            "counters": counters_of(e)}
+    text = [f"{e.name} ({e.cls})"]
+    if e.is_main:
+        data["twinks"] = [t.name for t in ledger.twinks_of(e)]
+        data["quotient"] = QuotientEngine(ledger, formula=formula).quotient(e)
+        text.append(f"  Quotient {data['quotient']:.2f}, twinks: {', '.join(data['twinks']) or '-'}")
+    elif e.main:
+        data["main"] = e.main
+        text.append(f"  Twink of {e.main}")
+    text += [f"  {key:<18}{value}" for key, value in data["counters"].items()]
+    emit(args, data, text)
+
+
+def cmd_inc(args):
+    if args.key not in COUNTER_COLS:
+        raise CliError(f"unknown counter '{args.key}', choose from: {', '.join(COUNTER_COLS)}")
+    ledger, store = open_roster(args)
+    try:
+        e = get_active(ledger, args.name)
+        value = ledger.increment(e, args.key, args.delta)
+    finally:
+        close_roster(ledger, store)
+    emit(args, {"name": e.name, "key": args.key, "value": value}, [f"{e.name} {args.key}: {value}"])
+
+
+def cmd_raid(args):
+    drops = []
+    for d in args.drop:
+        name, _, slot = d.rpartition(":")
+        if not name or slot not in LOOT_SLOTS:
+            raise CliError(f"bad drop '{d}', expected NAME:SLOT with SLOT one of: {', '.join(LOOT_SLOTS)}")
+        drops.append((name, slot))
+    ledger, store = open_roster(args)
+    history = QuotientHistory(args.data_file)
+    try:
+        for name in list(args.participants) + [n for n, _ in drops]:
+            get_active(ledger, name)
+        date = args.date or time.strftime("%Y-%m-%d")
+        raid = ledger.commit_raid(args.participants, drops, date, args.note)
+        history.record(ledger, raid["id"], date)
+    finally:
+        close_roster(ledger, store)
+    emit(args, raid, [f"Raid {raid['id']} on {date}: {len(args.participants)} participants, {len(drops)} drops"])
+
+
+def cmd_ingest(args):
+    ledger, store = open_roster(args)
+    history = QuotientHistory(args.data_file)
+    date = args.date or time.strftime("%Y-%m-%d")
+    found = []
+    try:
+        ingest = ChatLogIngest(ledger, args.log, state_file_for(args.data_file), args.me, args.from_start)
+
+        def record(raids):
+            for raid in raids:
+                if not args.dry_run:
+                    history.record(ledger, raid["id"], date)
+                    print(f"Raid {raid['id']}: {len(raid['participants'])} participants, {len(raid['drops'])} drops",
+                          file=sys.stderr)
+            found.extend(raids)
+
+        if args.follow:
+            # Raids are recorded as they are disbanded; Ctrl+C records the open one
+            try:
+                while True:
+                    record(ingest.poll(date, final=False, dry_run=args.dry_run, note=args.note))
+                    time.sleep(args.interval)
+            except KeyboardInterrupt:
+                pass
+        record(ingest.poll(date, dry_run=args.dry_run, note=args.note))
+    finally:
+        close_roster(ledger, store)
+    parser = ingest.parser
+    text = [f"{len(found)} raid{'s' if len(found) != 1 else ''} {'found' if args.dry_run else 'recorded'}"
+            f" from {args.log}"]
+    for raid in found:
+        text.append(f"  {', '.join(raid['participants'])}")
+        text += [f"    {name}: {slot}" for name, slot in raid["drops"]]
+    if parser.unknown:
+        text.append(f"  not on the roster: {', '.join(sorted(parser.unknown))}")
+    if parser.unmatched:
+        text.append(f"  untracked items: {len(parser.unmatched)}")
+    emit(args, {"raids": found, "unknown": parser.unknown, "unmatched": parser.unmatched}, text)
+
+
+def cmd_history(args):
+    history = QuotientHistory(args.data_file)
+    if not history.frames:
+        raise CliError("no raid history yet (it starts with the first raid session)")
+    series = history.series(args.name, args.start, args.end)
+    text = []
+    for p in series:
+        c = p["counters"] or {}
+        q = f"{p['quotient']:.2f}" if p.get("quotient") is not None else "-"
+        text.append(f"{p['date']}  raid {p['raid']}{' (reverted)' if p['revert'] else '':<11}"
+                    f"  raids {c.get('Raids', '-'):>4}  quotient {q}")
+    emit(args, series, text)
+
+
+def is_csv(path):
+    return path.lower().endswith(".csv")
+
+
+def cmd_export(args):
+    ledger, store = open_roster(args)
+    if args.all:
+        ledger.load_archive()
+    store.close()
+    if is_csv(args.file):
+        count = export_csv(ledger, args.file, args.all, args.delimiter)
+        print(f"Exported {count} characters to {args.file}", file=sys.stderr)
+        return
+    entries = ledger.snapshot() + ([e.to_dict() for e in ledger.archived()] if args.all else [])
+    if args.file == "-":
+        json.dump(entries, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        write_json_atomic(args.file, entries, ensure_ascii=False, indent=2)
+        print(f"Exported {len(entries)} characters to {args.file}", file=sys.stderr)
+
+
+def cmd_import_csv(args):
+    mapping = {}
+    for m in args.map:
+        header, _, key = m.partition("=")
+        if not key:
+            raise CliError(f"bad mapping '{m}', expected HEADER=KEY")
+        mapping[header] = key
+    ledger, store = open_roster(args)
+    try:
+        added, updated, errors = import_csv(ledger, args.file, mapping)
+        if added:
+            store.write_snapshot(store.snapshot(ledger))  # keep the big import line out of the next startup
+    finally:
+        store.close()
+    for line, message in errors:
+        print(f"{args.file}:{line}: {message}", file=sys.stderr)
+    emit(args, {"added": added, "updated": updated, "errors": [list(err) for err in errors]},
+         [f"{added} added, {updated} updated, {len(errors)} rows with errors"])
+    return 1 if errors else 0
+
+
+def cmd_import(args):
+    if is_csv(args.file):
+        return cmd_import_csv(args)
+    # Entries in raid_data.json layout: counters of active names are set to the
+    # imported values, archived names are reactivated first (like import-csv),
+    # unknown names are added
+    with open(args.file, encoding="utf-8") if args.file != "-" else sys.stdin as f:
+        entries = json.load(f)
+    errors, warnings = validate_entries(entries)
+    if errors:
+        raise CliError("not imported:\n  " + "\n  ".join(errors))
+    ledger, store = open_roster(args)
+    added = updated = 0
+    try:
+        # Mains first, so new twinks find them
+        for e in sorted(entries, key=lambda e: not e.get("is_main")):
+            if not e.get("active", True):
+                continue
+            current = ledger.get(e["Name"])
+            revived = current is None and ledger.is_archived(e["Name"])
+            if revived:
+                current = ledger.reactivate(e["Name"])
+            if current is None:
+                entry = Character.from_dict(e)
+                if entry.is_main:
+                    entry.twinks = []  # linked again as their twinks get added
+                ledger.add(entry)
+                added += 1
+                continue
+            changed = False
+            for key in COUNTER_COLS:
+                if key in e and e[key] != current[key]:
+                    ledger.set_value(current, key, e[key])
+                    changed = True
+            updated += changed or revived
+    finally:
+        close_roster(ledger, store)
+    emit(args, {"added": added, "updated": updated}, [f"{added} added, {updated} updated"])
+
+
+def cmd_validate(args):
+    # Checks the current state, i.e. the snapshot plus the journal tail
+    ledger, store = open_roster(args)
+    entries = [e.to_dict() for e in ledger.all_entries()]
+    store.close()
+    errors, warnings = validate_entries(entries)
+    emit(args, {"errors": errors, "warnings": warnings},
+         [f"error: {m}" for m in errors] + [f"warning: {m}" for m in warnings]
+         + [f"{len(entries)} characters, {len(errors)} errors, {len(warnings)} warnings"])
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+# --- shard tracker (shard_count.json) ---
+def load_shards(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_group(groups, name):
+    group = next((g for g in groups if g.get("group") == name), None)
+    if group is None:
+        raise CliError(f"no group '{name}'")
+    return group
+
+
+def cmd_shards_list(args):
+    groups = load_shards(args.shard_file)
+    text = []
+    for g in groups:
+        players = g.get("players", [])
+        total = sum(p.get("shards", 0) for p in players)
+        text.append(f"{g.get('group')}: {total}/{len(players)}" + (" complete" if players and total == len(players) else ""))
+        text += [f"  {p.get('name'):<20}{p.get('shards', 0)}" for p in players]
+    emit(args, groups, text)
+
+
+def cmd_shards_set(args):
+    if args.value not in (0, 1):
+        raise CliError("shards are 0 or 1")
+    groups = load_shards(args.shard_file)
+    player = next((p for p in find_group(groups, args.group).get("players", []) if p.get("name") == args.name), None)
+    if player is None:
+        raise CliError(f"no player '{args.name}' in {args.group}")
+    player["shards"] = args.value
+    write_json_atomic(args.shard_file, groups, indent=2, ensure_ascii=False)
+    emit(args, player, [f"{args.group} / {args.name}: {args.value}"])
+
+
+def cmd_shards_validate(args):
+    groups = load_shards(args.shard_file)
+    errors = []
+    if not isinstance(groups, list):
+        errors.append("top level is not a list of groups")
+        groups = []
+    for i, g in enumerate(groups):
+        label = g.get("group") or f"group {i}" if isinstance(g, dict) else f"group {i}"
+        if not isinstance(g, dict) or not isinstance(g.get("players", []), list):
+            errors.append(f"{label}: malformed")
+            continue
+        players = [p for p in g.get("players", []) if isinstance(p, dict)]
+        for j, p in enumerate(g.get("players", [])):
+            if not isinstance(p, dict):
+                errors.append(f"{label}: player {j} is {p!r}, expected an object")
+        names = [p.get("name") for p in players]
+        for p in players:
+            if not p.get("name"):
+                errors.append(f"{label}: player without name")
+            if p.get("shards") not in (0, 1):
+                errors.append(f"{label} / {p.get('name')}: shards is {p.get('shards')!r}, expected 0 or 1")
+        for n in {n for n in names if names.count(n) > 1}:
+            errors.append(f"{label}: {n} listed twice")
+    emit(args, {"errors": errors}, [f"error: {m}" for m in errors] + [f"{len(groups)} groups, {len(errors)} errors"])
+    return 1 if errors else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="lootCli", description="Raid/shard tracker data without the GUI")
+    parser.add_argument("--data-file", default="raid_data.json")
+    parser.add_argument("--storage", choices=sorted(BACKENDS), default="json")
+    parser.add_argument("--shard-file", default="shard_count.json")
+    parser.add_argument("--json", action="store_true", help="machine readable output")
+    parser.add_argument("--formula", help="loot value formula for the quotients (see formulas)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("formulas", help="list the loot value formulas of raid_data.formulas.json")
+    p.set_defaults(func=cmd_formulas)
+
+    p = sub.add_parser("rank", help="mains by quotient, or who rolls next for a slot")
+    p.add_argument("--slot", choices=LOOT_SLOTS)
+    p.add_argument("--top", type=int, default=10)
+    p.set_defaults(func=cmd_rank)
+
+    p = sub.add_parser("show", help="counters of one character")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser("inc", help="change a counter (like the -/+ buttons)")
+    p.add_argument("name")
+    p.add_argument("key")
+    p.add_argument("delta", type=int, nargs="?", default=1)
+    p.set_defaults(func=cmd_inc)
+
+    p = sub.add_parser("raid", help="record a raid session")
+    p.add_argument("participants", nargs="+")
+    p.add_argument("--drop", action="append", default=[], metavar="NAME:SLOT")
+    p.add_argument("--date")
+    p.add_argument("--note", default="")
+    p.set_defaults(func=cmd_raid)
+
+    p = sub.add_parser("ingest", help="record raids from a LOTRO chat log (/chatlog), from where the last run stopped")
+    p.add_argument("log")
+    p.add_argument("--me", help="your character, for the 'You acquired ...' lines (remembered)")
+    p.add_argument("--date")
+    p.add_argument("--note", help="raid note, default 'chat log <file name>'")
+    p.add_argument("--follow", action="store_true", help="keep reading while the game writes, until Ctrl+C")
+    p.add_argument("--interval", type=float, default=2.0, help="seconds between reads with --follow")
+    p.add_argument("--from-start", action="store_true", help="ignore the remembered offset")
+    p.add_argument("--dry-run", action="store_true", help="only show what would be recorded")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("history", help="a character over the recorded raids")
+    p.add_argument("name")
+    p.add_argument("--start", type=int, default=0)
+    p.add_argument("--end", type=int)
+    p.set_defaults(func=cmd_history)
+
+    p = sub.add_parser("export", help="write the roster as raid_data.json style JSON, or CSV for *.csv")
+    p.add_argument("file", help="output file, - for stdout")
+    p.add_argument("--all", action="store_true", help="include archived characters")
+    p.add_argument("--delimiter", default=",", help="CSV separator, e.g. ';' for German Excel")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="add or update characters from JSON, or CSV for *.csv")
+    p.add_argument("file", help="input file, - for stdin (JSON only)")
+    p.add_argument("--map", action="append", default=[], metavar="HEADER=KEY",
+                   help="CSV column to tracker key, e.g. Spieler=Name")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("validate", help="check the roster for inconsistencies")
+    p.add_argument("--strict", action="store_true", help="fail on warnings too")
+    p.set_defaults(func=cmd_validate)
+
+    shards = sub.add_parser("shards", help="shard_count.json of the shard tracker")
+    shard_sub = shards.add_subparsers(dest="shard_command", required=True)
+    p = shard_sub.add_parser("list")
+    p.set_defaults(func=cmd_shards_list)
+    p = shard_sub.add_parser("set")
+    p.add_argument("group")
+    p.add_argument("name")
+    p.add_argument("value", type=int)
+    p.set_defaults(func=cmd_shards_set)
+    p = shard_sub.add_parser("validate")
+    p.set_defaults(func=cmd_shards_validate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args) or 0
+    except (CliError, ValueError, OSError, json.JSONDecodeError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
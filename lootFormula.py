@@ -0,0 +1,172 @@
+import json
+import os
+
+from lootLedger import QUOTIENT_COLS, COUNTER_COLS, CLASS_ICONS
+
+# Loot value formulas: the quotient's numerator as a weighted sum of a branch's
+# counters (main + linked twinks), optionally capped per column, divided by the
+# raids attended. A formula file holds a list of
+#   {"name": "...", "weights": {column: weight}, "caps": {column: max},
+#    "classes": {class: {"weights": {...}, "caps": {...}}}}
+# Columns without a weight count 0; a class override replaces only the columns
+# it names (a cap of null lifts the base cap). The main's class decides for the
+# whole branch. Each formula is checked and turned into per class weight/cap
+# tables once, evaluating it is then a lookup per main or one array expression
+# for the whole roster.
+_COL = {key: i for i, key in enumerate(COUNTER_COLS)}
+_RAIDS = _COL["Raids"]
+VALUE_COLS = COUNTER_COLS[1:]  # Raids is the divisor
+CLASSES = list(CLASS_ICONS)
+_NO_CAP = 1 << 62
+
+
+def formulas_file_for(data_file):
+    return os.path.splitext(data_file)[0] + ".formulas.json"
+
+
+def _check_columns(where, values, caps):
+    errors = []
+    if not isinstance(values, dict):
+        return [f"{where}: expected an object of column: value"]
+    for key, value in values.items():
+        if key not in _COL or key == "Raids":
+            errors.append(f"{where}: unknown column '{key}'")
+        elif caps and value is None:
+            continue
+        elif isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            errors.append(f"{where}: {key} must be a number >= 0{' or null' if caps else ''}, not {value!r}")
+        elif caps and value != int(value):
+            errors.append(f"{where}: cap of {key} must be a whole number, not {value!r}")
+    return errors
+
+
+def validate_formula(spec):
+    # Returns the list of mistakes, empty if the spec compiles
+    if not isinstance(spec, dict):
+        return ["formula is not an object"]
+    name = spec.get("name")
+    where = f"formula '{name}'" if isinstance(name, str) and name else "formula"
+    errors = [] if where != "formula" else ["formula without name"]
+    unknown = set(spec) - {"name", "weights", "caps", "classes"}
+    if unknown:
+        errors.append(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+    errors += _check_columns(f"{where} weights", spec.get("weights", {}), False)
+    errors += _check_columns(f"{where} caps", spec.get("caps", {}), True)
+    classes = spec.get("classes", {})
+    if not isinstance(classes, dict):
+        return errors + [f"{where}: classes must be an object of class: override"]
+    for cls, override in classes.items():
+        if cls not in CLASS_ICONS:
+            errors.append(f"{where}: unknown class '{cls}'")
+        elif not isinstance(override, dict) or set(override) - {"weights", "caps"}:
+            errors.append(f"{where} {cls}: expected an object with weights and/or caps")
+        else:
+            errors += _check_columns(f"{where} {cls} weights", override.get("weights", {}), False)
+            errors += _check_columns(f"{where} {cls} caps", override.get("caps", {}), True)
+    return errors
+
+
+class LootFormula:
+    # A compiled formula. Row 0 of the tables is the base rule, row 1 + i the
+    # rule of CLASSES[i] (a copy of the base where the class has no override).
+    def __init__(self, spec):
+        errors = validate_formula(spec)
+        if errors:
+            raise ValueError("; ".join(errors))
+        self.name = spec["name"]
+        self.spec = spec
+        base_w = dict.fromkeys(VALUE_COLS, 0)
+        base_w.update(spec.get("weights", {}))
+        base_c = dict.fromkeys(VALUE_COLS)
+        base_c.update(spec.get("caps", {}))
+        self.weights, self.caps = [base_w], [base_c]
+        for cls in CLASSES:
+            override = spec.get("classes", {}).get(cls, {})
+            self.weights.append(dict(base_w, **override.get("weights", {})))
+            self.caps.append(dict(base_c, **override.get("caps", {})))
+        self._class_row = {cls: 1 + i for i, cls in enumerate(CLASSES)}
+        # Columns that count for any class, the only ones worth summing
+        self.columns = [key for key in VALUE_COLS if any(w[key] for w in self.weights)]
+        self.col_index = [_COL[key] for key in self.columns]
+        # Per table row: [(counter index, weight, cap or None)] of its nonzero columns
+        self._terms = [[(_COL[key], w[key], None if c[key] is None else int(c[key]))
+                        for key in self.columns if w[key]]
+                       for w, c in zip(self.weights, self.caps)]
+        # No caps and the same rule for every class: the score is linear in the
+        # counters of each character, so it can be summed per branch afterwards
+        self.per_row = all(c[key] is None for c in self.caps for key in self.columns) and \
+            all(w == base_w for w in self.weights)
+        self._arrays = None
+
+    def __repr__(self):
+        return f"LootFormula({self.name!r})"
+
+    def class_row(self, cls):
+        return self._class_row.get(cls, 0)
+
+    def value(self, totals, cls=None):
+        # Quotient of one branch from its totals in COUNTER_COLS order
+        raids = totals[_RAIDS]
+        if raids <= 0:
+            return 1.0
+        score = 0
+        for c, w, cap in self._terms[self.class_row(cls)]:
+            v = totals[c]
+            score += w * (v if cap is None or v < cap else cap)
+        return score / raids
+
+    def _tables(self, np):
+        if self._arrays is None:
+            self._arrays = (
+                np.array([[w[key] for key in self.columns] for w in self.weights], dtype=np.float64),
+                np.array([[_NO_CAP if c[key] is None else int(c[key]) for key in self.columns] for c in self.caps],
+                         dtype=np.int64))
+        return self._arrays
+
+    def row_scores(self, np, counts):
+        # per_row formulas only: the weighted sum of every counter row (rows x COUNTER_COLS)
+        return counts[:, self.col_index] @ self._tables(np)[0][0]
+
+    def values(self, np, totals, raids, class_rows):
+        # Quotients of many branches at once: totals is rows x self.columns,
+        # raids and class_rows one entry per row
+        weights, caps = self._tables(np)
+        # Counters and caps are ints, the products of small ints and the
+        # weights summed in float64, same as the plain Python path for integral weights
+        score = (np.minimum(totals, caps[class_rows]) * weights[class_rows]).sum(axis=1)
+        q = np.ones(len(raids))
+        np.divide(score, raids, out=q, where=raids > 0)
+        return q
+
+
+# The tracker's rule: set pieces and the Zaudru item, one each, no caps
+DEFAULT_FORMULA = LootFormula({"name": "Quotient", "weights": dict.fromkeys(QUOTIENT_COLS, 1)})
+
+
+def load_formulas(path):
+    # [DEFAULT_FORMULA] + the formulas of `path` (a missing file is fine).
+    # Mistakes raise ValueError naming all of them.
+    formulas = [DEFAULT_FORMULA]
+    if not os.path.exists(path):
+        return formulas
+    with open(path, encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError(f"{path}: expected a list of formulas")
+    errors = []
+    for spec in specs:
+        errors += validate_formula(spec)
+        if not errors:
+            formulas.append(LootFormula(spec))
+    names = [f.name for f in formulas]
+    errors += [f"formula '{n}' defined twice" for n in sorted({n for n in names if names.count(n) > 1})]
+    if errors:
+        raise ValueError(f"{path}: " + "; ".join(errors))
+    return formulas
+
+
+def find_formula(formulas, name):
+    for formula in formulas:
+        if formula.name == name:
+            return formula
+    raise ValueError(f"unknown formula '{name}', choose from: {', '.join(f.name for f in formulas)}")
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from dataStore import write_text_atomic, write_json_atomic
+from lootLedger import Character, gc_paused
+
+
+class JournalStore:
+    # raid_data.json stays the (compacted) snapshot; every change is appended as one
+    # line to raid_data.journal. raid_data.checkpoint remembers which journal offset
+    # the snapshot covers, identified by the snapshot's hash, so startup loads the
+    # snapshot and replays only the journal tail. The journal itself is never cut
+    # and doubles as the audit trail. Raid session records live next to the snapshot
+    # in raid_data.raids.json.
+    # Inactive characters are kept out of the snapshot, in raid_data.archive.jsonl:
+    # one archived entry per line, a reactivation appends {"restore": name} and a
+    # changed twink list of an archived main {"twinks_of": name, "twinks": [...]}.
+    # The file is only appended to (at snapshot time) and read when the ledger
+    # first needs the archive; the checkpoint records how much of it the snapshot
+    # covers.
+    def __init__(self, data_file, compact_every=200):
+        base = os.path.splitext(data_file)[0]
+        self.data_file = data_file
+        self.journal_file = base + ".journal"
+        self.checkpoint_file = base + ".checkpoint"
+        self.raids_file = base + ".raids.json"
+        self.archive_file = base + ".archive.jsonl"
+        self.compact_every = compact_every
+        self.pending = 0       # events appended since the last snapshot
+        self._journal = None
+        self._checkpoint = None
+        self._archive_size = 0     # archive bytes on file when loaded; later lines are in memory
+        self._archive_lines = []   # archive lines queued by snapshot(), not yet written
+        self._archive_queued = 0   # lines ever queued / written, so a dropped job's lines
+        self._archive_written = 0  # are written by the next one
+        self._archive_lock = threading.Lock()
+
+    def load(self, ledger):
+        snapshot = None
+        if os.path.exists(self.data_file):
+            with open(self.data_file, "rb") as f:
+                snapshot = f.read()
+        digest = hashlib.sha1(snapshot).hexdigest() if snapshot is not None else None
+        covered = self._covered(digest)
+        self._archive_size = self._repair_archive(covered)
+        ledger.archive_changes = []
+        with gc_paused():
+            # Only the top-level dicts are characters; nested ones (unknown keys
+            # kept in `extra`) stay dicts
+            entries = [Character.from_dict(d) for d in json.loads(snapshot)] if snapshot is not None else []
+        ledger.load(entries, self._read_archive if self._archive_size else None)
+        if os.path.exists(self.raids_file):
+            with open(self.raids_file, encoding="utf-8") as f:
+                ledger.load_raids(json.load(f))
+
+        end = self._repair_journal()
+        offset = covered.get("offset") if covered else None
+        replayed = 0
+        if offset is not None and offset < end:
+            for event in self.read_events(offset):
+                ledger.apply_event(event)
+                replayed += 1
+        elif offset is None:
+            # Snapshot unknown to the checkpoint (first run or edited by hand): trust it
+            self._write_checkpoint(end, digest, self._archive_size)
+        self.pending = replayed
+        self._journal = open(self.journal_file, "a", encoding="utf-8")
+        return replayed
+
+    def _covered(self, digest):
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, encoding="utf-8") as f:
+                ckpt = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        self._checkpoint = ckpt
+        # The checkpoint is written before the snapshot is replaced, so after a crash
+        # in between the file on disk may still be the previous snapshot
+        for c in (ckpt, ckpt.get("prev") or {}):
+            if c.get("sha1") == digest and "offset" in c:
+                return c
+        return None
+
+    def _repair_archive(self, covered):
+        # Cut lines appended after the covered snapshot (crash before its
+        # checkpoint); they are replayed from the journal again
+        if not os.path.exists(self.archive_file):
+            return 0
+        with open(self.archive_file, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            keep = covered.get("archive_size") if covered else None
+            if keep is not None and keep < size:
+                f.truncate(keep)
+                size = keep
+        return size
+
+    def _read_archive(self):
+        # Called by the ledger on first use, possibly while the writer appends;
+        # only the part that was on file at load time is read
+        with open(self.archive_file, "rb") as f:
+            data = f.read(self._archive_size)
+        entries = []
+        archived = {}   # name -> positions in entries, a restore drops the latest
+        for line in data[:data.rfind(b"\n") + 1].splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "restore" in item:
+                stack = archived.get(item["restore"])
+                if stack:
+                    entries[stack.pop()] = None
+                continue
+            if "twinks_of" in item:
+                # applies to the newest archived entry of that name
+                stack = archived.get(item["twinks_of"])
+                if stack:
+                    entries[stack[-1]]["Twinks"] = item["twinks"]
+                continue
+            archived.setdefault(item.get("Name"), []).append(len(entries))
+            entries.append(item)
+        return [e for e in entries if e is not None]
+
+    def _repair_journal(self):
+        # Drop a torn last line left by a crash during append
+        if not os.path.exists(self.journal_file):
+            return 0
+        with open(self.journal_file, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+        return end
+
+    def read_events(self, offset=0):
+        with open(self.journal_file, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def record(self, event):
+        event = dict(event, ts=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self._journal.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.pending += 1
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every
+
+    def snapshot(self, ledger):
+        # Taken on the caller's thread; write_snapshot may then run on a worker.
+        # Archive moves since the last snapshot become lines for the archive file.
+        self.pending = 0
+        lines = []
+        for kind, value in ledger.take_archive_changes():
+            if kind == "add":
+                item = value.to_dict()
+            elif kind == "twinks":
+                item = {"twinks_of": value.name, "twinks": list(value.twinks or ())}
+            else:
+                item = {"restore": value}
+            lines.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+        with self._archive_lock:
+            self._archive_lines += lines
+            self._archive_queued += len(lines)
+            upto = self._archive_queued
+        return ledger.snapshot(), [dict(r) for r in ledger.raids], self._journal.tell(), upto
+
+    def write_snapshot(self, job):
+        entries, raids, offset, upto = job
+        # Raid records first: replaying a raid event that is already on file is a no-op
+        if raids or os.path.exists(self.raids_file):
+            write_json_atomic(self.raids_file, raids, ensure_ascii=False, indent=1)
+        archive_size = self._append_archive(upto)
+        text = json.dumps(entries, indent=2)
+        self._write_checkpoint(offset, hashlib.sha1(text.encode("utf-8")).hexdigest(), archive_size)
+        write_text_atomic(self.data_file, text)
+
+    def _append_archive(self, upto):
+        with self._archive_lock:
+            count = upto - self._archive_written
+            lines = self._archive_lines[:count]
+        if not lines:
+            return os.path.getsize(self.archive_file) if os.path.exists(self.archive_file) else 0
+        with open(self.archive_file, "ab") as f:
+            start = f.tell()
+            try:
+                f.write("".join(lines).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.truncate(start)
+                raise
+            size = f.tell()
+        with self._archive_lock:
+            del self._archive_lines[:count]
+            self._archive_written = upto
+        return size
+
+    def _write_checkpoint(self, offset, digest, archive_size):
+        prev = self._checkpoint
+        if prev is not None:
+            prev = {"offset": prev.get("offset"), "sha1": prev.get("sha1"), "archive_size": prev.get("archive_size")}
+        self._checkpoint = {"offset": offset, "sha1": digest, "archive_size": archive_size, "prev": prev}
+        write_json_atomic(self.checkpoint_file, self._checkpoint)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,687 @@
+import gc
+from array import array
+from contextlib import contextmanager
+from operator import itemgetter
+
+QUOTIENT_COLS = ["Helmet", "Shoulder", "Gloves", "Breast", "Legs", "Boots", "Zaudru Qitem"]
+COUNTER_COLS = ["Raids", "Helmet", "Shoulder", "Gloves", "Breast", "Legs", "Boots",
+                "Storvâgûn Qitems", "Zaudru Qitem", "Mírdanant", "Beryl shard"]
+
+CLASS_ICONS = {
+    "Burglar": "https://lotro-wiki.com/images/1/1e/Framed_Burglar-icon.png",
+    "Captain": "https://lotro-wiki.com/images/1/16/Framed_Captain-icon.png",
+    "Champion": "https://lotro-wiki.com/images/7/74/Framed_Champion-icon.png",
+    "Guardian": "https://lotro-wiki.com/images/d/dc/Framed_Guardian-icon.png",
+    "Hunter": "https://lotro-wiki.com/images/7/7c/Framed_Hunter-icon.png",
+    "Loremaster": "https://lotro-wiki.com/images/c/c0/Framed_Lore-master-icon.png",
+    "Minstrel": "https://lotro-wiki.com/images/f/f6/Framed_Minstrel-icon.png"
+}
+
+COUNTER_INDEX = {key: i for i, key in enumerate(COUNTER_COLS)}
+_QIDX = [COUNTER_INDEX[key] for key in QUOTIENT_COLS]
+_RAIDS = COUNTER_INDEX["Raids"]
+_ZERO = array("I", [0] * len(COUNTER_COLS))
+COUNT_MAX = 2 ** 32 - 1  # counters are stored as unsigned 32-bit ints
+_ATTRS = {"Name": "name", "Class": "cls", "active": "active", "is_main": "is_main", "is_twink": "is_twink",
+          "Main": "main", "Twinks": "twinks"}
+_KNOWN = set(COUNTER_COLS) | set(_ATTRS) | {" ", "Quotient"}  # " " and Quotient hold nothing
+_FILE_KEYS = [" "] + COUNTER_COLS + ["Class", "Name", "Quotient", "active", "is_main", "is_twink"]
+_get_counts = itemgetter(*COUNTER_COLS)
+
+
+def check_count(name, key, value):
+    # A counter value as stored, or ValueError naming the character and column.
+    # Whole floats (1.0, written by older versions) are taken as ints.
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= COUNT_MAX:
+        raise ValueError(f"{name}: {key} is {value!r}, expected a count from 0 to {COUNT_MAX}")
+    return value
+
+
+@contextmanager
+def gc_paused():
+    # For bulk loads: tens of thousands of new records and nothing cyclic, but
+    # the collector would rescan the growing heap again and again meanwhile
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class Character:
+    # One roster entry. Slots instead of a dict of ~20 string keys, the counters
+    # in one array of unsigned 32-bit ints in COUNTER_COLS order. raid_data.json's
+    # " " and "Quotient" keys hold nothing (the quotient is always computed) and
+    # are only written back so older tracker versions can read the file; keys the
+    # tracker doesn't know survive in `extra`. Dicts exist only at the JSON
+    # boundary (from_dict/to_dict). e["Helmet"], e.get("Main") etc. still work
+    # with the raid_data.json keys, hot paths use the attributes.
+    __slots__ = ("name", "cls", "active", "is_main", "is_twink", "main", "twinks", "counts", "extra")
+
+    def __init__(self, name, cls=None, is_main=False, is_twink=False, main=None, twinks=None, active=True,
+                 counts=None, extra=None):
+        self.name = name
+        self.cls = cls
+        self.active = active
+        self.is_main = is_main
+        self.is_twink = is_twink
+        self.main = main        # name of the main, twinks only
+        self.twinks = twinks    # [twink names], mains only
+        self.counts = array("I", _ZERO if counts is None else counts)
+        self.extra = extra      # {key: value} of unknown keys, or None
+
+    @classmethod
+    def from_dict(cls, d):
+        # Filled slot by slot, this runs once per character on every load
+        e = cls.__new__(cls)
+        e.name = d.get("Name")
+        e.cls = d.get("Class")
+        e.active = bool(d.get("active", True))
+        e.is_main = bool(d.get("is_main"))
+        e.is_twink = bool(d.get("is_twink"))
+        e.main = d.get("Main")
+        twinks = d.get("Twinks")
+        e.twinks = list(twinks) if twinks is not None else None
+        try:
+            e.counts = array("I", _get_counts(d))
+        except (KeyError, OverflowError, TypeError):
+            # missing, float or out of range counters: checked one by one
+            e.counts = array("I", [check_count(e.name, key, d.get(key, 0)) for key in COUNTER_COLS])
+        e.extra = None if _KNOWN.issuperset(d) else {k: v for k, v in d.items() if k not in _KNOWN} or None
+        return e
+
+    def to_dict(self):
+        # raid_data.json layout, key order included
+        d = dict(zip(_FILE_KEYS, (0, *self.counts, self.cls, self.name, 1.0, self.active, self.is_main,
+                                  self.is_twink)))
+        if self.twinks is not None:
+            d["Twinks"] = list(self.twinks)
+        if self.main is not None:
+            d["Main"] = self.main
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def copy(self):
+        return Character(self.name, self.cls, self.is_main, self.is_twink, self.main,
+                         None if self.twinks is None else list(self.twinks), self.active, self.counts,
+                         None if self.extra is None else dict(self.extra))
+
+    def __getitem__(self, key):
+        i = COUNTER_INDEX.get(key)
+        if i is not None:
+            return self.counts[i]
+        attr = _ATTRS.get(key)
+        if attr is not None:
+            value = getattr(self, attr)
+            if value is None and key in ("Main", "Twinks"):
+                raise KeyError(key)
+            return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        i = COUNTER_INDEX.get(key)
+        if i is not None:
+            self.counts[i] = value
+        elif key in _ATTRS:
+            setattr(self, _ATTRS[key], value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if key in COUNTER_INDEX:
+            return True
+        if key in _ATTRS:
+            return key not in ("Main", "Twinks") or getattr(self, _ATTRS[key]) is not None
+        return bool(self.extra) and key in self.extra
+
+    def __repr__(self):
+        return f"Character({self.name!r}, {self.cls!r})"
+
+
+class LootLedger:
+    # Owns the raid entries (Character records, raid_data.json layout through
+    # to_dict) and keeps name/class indexes so lookups don't need to scan the
+    # whole archive.
+    # Two segments: `entries` holds the active roster in roster order, `archive`
+    # the inactive characters. The archive is usually read lazily from the store
+    # (archive_loader) the first time something needs it, so a start only pays
+    # for the active roster.
+    def __init__(self, entries=None):
+        self.entries = []
+        self.archive = []      # inactive entries, oldest first; only complete once loaded
+        self._archive_loader = None
+        self.archive_changes = None  # [("add", entry) | ("restore", name) | ("twinks", main)], kept if a store wants them
+        self._active = {}      # name -> active entry (names are unique among active)
+        self._archived = {}    # name -> [inactive entries], oldest first
+        self._by_class = {}    # class -> {names of active entries}
+        self._order = {}       # id(entry) -> position in the roster, stable across remove/reactivate
+        self._next_order = 0
+        self.raids = []        # raid records, oldest first (see commit_raid)
+        self.listeners = []    # called with a change event for every mutation
+        self.observers = []    # same, but also during replay (derived indexes)
+        self._replaying = False
+        if entries:
+            self.load(entries)
+
+    def load(self, entries, archive_loader=None):
+        # entries: Character records or raid_data.json dicts.
+        # archive_loader: returns the stored archive, called at most once. Inactive
+        # entries inside `entries` (raid_data.json before the split) go to the
+        # archive right away and are reported as archive changes, so the store
+        # moves them out on its next write.
+        self.entries = []
+        self.archive = []
+        self._archive_loader = archive_loader
+        self._active.clear()
+        self._archived.clear()
+        self._by_class.clear()
+        self._order = {}
+        with gc_paused():
+            for i, e in enumerate(entries):
+                if not isinstance(e, Character):
+                    e = Character.from_dict(e)
+                self._order[id(e)] = i
+                if e.active:
+                    self.entries.append(e)
+                else:
+                    self.archive.append(e)
+                    self._log_archive("add", e)
+                self._index(e)
+        self._next_order = len(self._order)
+        for observer in self.observers:
+            observer({"op": "load"})  # not a change, nothing for the listeners to record
+
+    def load_archive(self):
+        # Reads the stored archive in front of what was archived since the start
+        loader, self._archive_loader = self._archive_loader, None
+        if loader is None:
+            return
+        with gc_paused():
+            stored = [e if isinstance(e, Character) else Character.from_dict(e) for e in loader()]
+        for e in stored:
+            self._order[id(e)] = self._next_order
+            self._next_order += 1
+        self.archive[:0] = stored
+        for e in reversed(stored):
+            self._archived.setdefault(e.name, []).insert(0, e)
+
+    def _log_archive(self, kind, value):
+        if self.archive_changes is not None:
+            self.archive_changes.append((kind, value))
+
+    def _twinks_changed(self, main):
+        # An archived main's twink list is not in the snapshot, the archive has to
+        # learn about it (active mains are written with the snapshot anyway)
+        if not main.active:
+            self._log_archive("twinks", main)
+
+    def take_archive_changes(self):
+        changes, self.archive_changes = self.archive_changes or [], []
+        return changes
+
+    def _index(self, e):
+        name = e.name
+        if e.active:
+            self._active[name] = e
+            self._by_class.setdefault(e.cls, set()).add(name)
+        else:
+            self._archived.setdefault(name, []).append(e)
+
+    def _unindex(self, e):
+        name = e.name
+        if e.active:
+            if self._active.get(name) is e:
+                del self._active[name]
+            names = self._by_class.get(e.cls)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._by_class[e.cls]
+        else:
+            lst = self._archived.get(name, [])
+            _remove_identical(lst, e)
+            if not lst:
+                self._archived.pop(name, None)
+
+    def _set_active(self, e, active):
+        # Moves the entry between the segments; a reactivated one goes back to its
+        # old roster position
+        if e.active == active:
+            return
+        self._unindex(e)
+        e.active = active
+        self._index(e)
+        if active:
+            _remove_identical(self.archive, e)
+            self._insert_active(e)
+            self._log_archive("restore", e.name)
+        else:
+            _remove_identical(self.entries, e)
+            self.archive.append(e)
+            self._log_archive("add", e)
+
+    def _insert_active(self, e):
+        # Into self.entries at the place its roster order gives it
+        order = self.order(e)
+        i = len(self.entries)
+        while i > 0 and self.order(self.entries[i - 1]) > order:
+            i -= 1
+        self.entries.insert(i, e)
+
+    def _emit(self, event):
+        for observer in self.observers:
+            observer(event)
+        if not self._replaying:
+            for listener in self.listeners:
+                listener(event)
+
+    def named(self, name):
+        # All entries carrying this name, the active one first. Reaching the
+        # archived ones loads the archive.
+        active = self._active.get(name)
+        if active is not None:
+            yield active
+        self.load_archive()
+        yield from self._archived.get(name, [])
+
+    def main_named(self, name):
+        # The main a twink names: the active one, else the latest archived one
+        main = self._active.get(name)
+        if main is not None:
+            return main if main.is_main else None
+        return next((m for m in reversed(list(self.named(name))) if m.is_main), None)
+
+    def latest_archived(self, name):
+        # Newest archived entry of that name known so far, without loading the
+        # archive (what remove() just archived)
+        lst = self._archived.get(name)
+        return lst[-1] if lst else None
+
+    def order(self, entry):
+        # Tie-breaker for sorting: where the entry sits in raid_data.json
+        return self._order.get(id(entry), 0)
+
+    def __contains__(self, name):
+        return name in self._active
+
+    def __len__(self):
+        return len(self._active)
+
+    def get(self, name):
+        return self._active.get(name)
+
+    def active(self):
+        return list(self._active.values())
+
+    def mains(self):
+        return [e for e in self._active.values() if e.is_main]
+
+    def twinks_of(self, main):
+        return [self._active[n] for n in main.twinks or () if n in self._active]
+
+    def main_of(self, twink):
+        main = self._active.get(twink.main)
+        if main is not None and main.is_main and twink.name in (main.twinks or ()):
+            return main
+        return None
+
+    def orphan_twinks(self):
+        linked = {n for m in self.mains() for n in m.twinks or ()}
+        return [e for e in self._active.values() if e.is_twink and e.name not in linked]
+
+    def archived(self):
+        self.load_archive()
+        return list(self.archive)
+
+    def all_entries(self):
+        # Both segments, as raid_data.json held them before the split
+        self.load_archive()
+        return self.entries + self.archive
+
+    def classes(self):
+        return sorted({e.cls for e in self.mains()})
+
+    def names_of_class(self, cls):
+        return self._by_class.get(cls, set())
+
+    def add(self, entry, order=None):
+        # order: the roster position the entry had before (redo of an undone
+        # add), default the end of the roster
+        name = entry.name
+        if name in self._active:
+            raise ValueError(f"Player '{name}' already active.")
+        if entry.is_twink and entry.main:
+            m = self.main_named(entry.main)
+            if m is not None:
+                if m.twinks is None:
+                    m.twinks = []
+                m.twinks.append(name)
+                self._twinks_changed(m)
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        self._order[id(entry)] = order
+        self._insert_active(entry)
+        self._index(entry)
+        self._emit({"op": "add", "entry": entry.to_dict()})
+        return entry
+
+    def remove(self, entry):
+        # The event names what else changed (cascaded twinks, list position), so
+        # an undo can put everything back exactly
+        event = {"op": "remove", "name": entry.name}
+        if entry.is_main:
+            self._set_active(entry, False)
+            cascaded = []
+            for tname in entry.twinks or ():
+                t = self._active.get(tname)
+                if t is not None:
+                    self._set_active(t, False)
+                    cascaded.append(tname)
+            if cascaded:
+                event["twinks"] = cascaded
+        else:
+            self._set_active(entry, False)
+            m = self.main_named(entry.main) if entry.main else None
+            if m is not None and entry.name in (m.twinks or ()):
+                event["index"] = m.twinks.index(entry.name)
+                m.twinks.remove(entry.name)
+                self._twinks_changed(m)
+        self._emit(event)
+
+    def reactivate(self, name, index=None):
+        # index: position in the main's twink list (default: append)
+        e = self._reactivate(name, index)
+        if e is None:
+            return None
+        event = {"op": "reactivate", "name": name}
+        if index is not None:
+            event["index"] = index
+        self._emit(event)
+        return e
+
+    def is_archived(self, name):
+        # Inactive under that name only (reactivate would find it); loads the archive
+        if name in self._active:
+            return False
+        if name not in self._archived:
+            self.load_archive()
+        return name in self._archived
+
+    def _reactivate(self, name, index=None):
+        if not self.is_archived(name):
+            return None
+        e = self._archived[name][-1]
+        self._set_active(e, True)
+        m = self.main_named(e.main) if e.is_twink and e.main else None
+        if m is not None:
+            if m.twinks is None:
+                m.twinks = []
+            twinks = m.twinks
+            if name not in twinks:
+                twinks.insert(len(twinks) if index is None else index, name)
+                self._twinks_changed(m)
+        return e
+
+    def discard(self, entry):
+        # Drops an entry completely (undo of add), unlike remove() which archives it
+        self._unindex(entry)
+        _remove_identical(self.entries, entry)
+        self._order.pop(id(entry), None)
+        event = {"op": "discard", "name": entry.name}
+        if entry.main:
+            event["main"] = entry.main
+            m = self.main_named(entry.main)
+            if m is not None and entry.name in (m.twinks or ()):
+                m.twinks.remove(entry.name)
+                self._twinks_changed(m)
+        self._emit(event)
+
+    def snapshot(self):
+        # The active segment as raid_data.json dicts, detached from the live
+        # entries and safe to serialize on another thread
+        return [e.to_dict() for e in self.entries]
+
+    def load_raids(self, raids):
+        self.raids = list(raids)
+
+    def raid(self, raid_id):
+        return next((r for r in self.raids if r["id"] == raid_id), None)
+
+    def commit_raid(self, participants, drops, date, note="", source=None):
+        # One raid session as a single change: Raids +1 for every participant, +1
+        # on the slot of every drop (name, slot). Emits one "raid" event carrying
+        # the resulting values, so the journal gets one line and observers rebuild once.
+        # source, if given, says where the raid was read from (chat log and offset).
+        deltas = {}
+        for name in participants:
+            deltas[(name, "Raids")] = deltas.get((name, "Raids"), 0) + 1
+        for name, slot in drops:
+            deltas[(name, slot)] = deltas.get((name, slot), 0) + 1
+        for name, _ in deltas:
+            if name not in self._active:
+                raise ValueError(f"Player '{name}' is not active.")
+        changes = []
+        for (name, key), delta in deltas.items():
+            old = self._active[name].counts[COUNTER_INDEX[key]]
+            changes.append([name, key, old, check_count(name, key, old + delta)])
+        for name, key, _, new in changes:
+            self._active[name].counts[COUNTER_INDEX[key]] = new
+        raid = {"id": max((r["id"] for r in self.raids), default=0) + 1, "date": date, "note": note,
+                "participants": list(participants), "drops": [list(d) for d in drops], "changes": changes}
+        if source is not None:
+            raid["source"] = source
+        self.raids.append(raid)
+        self._emit({"op": "raid", "raid": raid})
+        return raid
+
+    def revert_raid(self, raid_id, date):
+        # Takes the raid's increments back off the current values (edits made since
+        # stay), clamped at 0 like a "-" click
+        raid = self.raid(raid_id)
+        if raid is None or raid.get("reverted"):
+            return None
+        changes = []
+        for name, key, old, new in raid["changes"]:
+            e = self._active.get(name)
+            if e is None:
+                continue
+            i = COUNTER_INDEX[key]
+            cur = e.counts[i]
+            value = max(0, cur - (new - old))
+            e.counts[i] = value
+            changes.append([name, key, cur, value])
+        raid["reverted"] = date
+        self._emit({"op": "revert_raid", "id": raid_id, "date": date, "changes": changes})
+        return raid
+
+    def import_entries(self, entries, changes, reactivated=()):
+        # Bulk merge (CSV import) as a single change like a raid session: archived
+        # names to bring back (as reactivate() would), then counter changes
+        # [name, key, old, new] of active names, then new entries, whose twink
+        # links are already resolved. One "import" event for the whole batch.
+        for name in reactivated:
+            if not self.is_archived(name):
+                raise ValueError(f"Player '{name}' is not archived.")
+        pending = set(reactivated)
+        for change in changes:
+            if change[0] not in self._active and change[0] not in pending:
+                raise ValueError(f"Player '{change[0]}' is not active.")
+            change[3] = check_count(*change[:2], change[3])
+        for name in reactivated:
+            self._reactivate(name)
+        self._replay_changes(changes)
+        for entry in entries:
+            self._append(entry)
+        event = {"op": "import", "entries": [e.to_dict() for e in entries], "changes": changes}
+        if reactivated:
+            event["reactivated"] = list(reactivated)
+        self._emit(event)
+
+    def _append(self, entry):
+        # New twink of a main that is already on the roster: link it
+        if entry.is_twink and entry.main and entry.active:
+            main = self._active.get(entry.main)
+            if main is not None and main.is_main:
+                if main.twinks is None:
+                    main.twinks = []
+                if entry.name not in main.twinks:
+                    main.twinks.append(entry.name)
+        if entry.active:
+            self.entries.append(entry)
+        else:
+            self.archive.append(entry)
+            self._log_archive("add", entry)
+        self._order[id(entry)] = self._next_order
+        self._next_order += 1
+        self._index(entry)
+
+    def _replay_changes(self, changes):
+        for name, key, old, new in changes:
+            e = self.get(name)
+            if e is not None:
+                e.counts[COUNTER_INDEX[key]] = new
+
+    def increment(self, entry, key, delta):
+        return self.set_value(entry, key, max(0, entry.counts[COUNTER_INDEX[key]] + delta))
+
+    def set_value(self, entry, key, value):
+        # Counters only; out of range values (negative, > 32 bit) raise ValueError
+        value = check_count(entry.name, key, value)
+        i = COUNTER_INDEX[key]
+        old = entry.counts[i]
+        entry.counts[i] = value
+        if old != value:
+            self._emit({"op": "set", "name": entry.name, "key": key, "old": old, "new": value})
+        return value
+
+    def apply_event(self, event):
+        # Replays a recorded change without notifying listeners. "set" carries the
+        # absolute value, so replaying it twice is harmless.
+        self._replaying = True
+        try:
+            op = event["op"]
+            if op == "set":
+                e = self.get(event["name"])
+                if e is not None:
+                    self.set_value(e, event["key"], event["new"])
+                return e
+            if op == "add":
+                if event["entry"]["Name"] in self:
+                    return None
+                return self.add(Character.from_dict(event["entry"]))
+            if op == "remove":
+                e = self.get(event["name"])
+                if e is not None:
+                    self.remove(e)
+                return e
+            if op == "reactivate":
+                return self.reactivate(event["name"], event.get("index"))
+            if op == "discard":
+                e = self.get(event["name"])
+                if e is not None:
+                    self.discard(e)
+                return e
+            if op == "raid":
+                raid = event["raid"]
+                self._replay_changes(raid["changes"])
+                if self.raid(raid["id"]) is None:
+                    self.raids.append(dict(raid))
+                self._emit(event)
+                return raid
+            if op == "revert_raid":
+                self._replay_changes(event["changes"])
+                raid = self.raid(event["id"])
+                if raid is not None:
+                    raid["reverted"] = event["date"]
+                self._emit(event)
+                return raid
+            if op == "import":
+                entries = [Character.from_dict(e) for e in event["entries"]
+                           if not (e.get("active", True) and e["Name"] in self)]
+                reactivated = [n for n in event.get("reactivated", ()) if n not in self]
+                self.import_entries(entries, event["changes"], reactivated)
+                return entries
+            raise ValueError(f"Unknown event op '{op}'")
+        finally:
+            self._replaying = False
+
+    def quotient(self, main):
+        raids = main.counts[_RAIDS]
+        total_equip = sum(main.counts[c] for c in _QIDX)
+        for t in self.twinks_of(main):
+            raids += t.counts[_RAIDS]
+            total_equip += sum(t.counts[c] for c in _QIDX)
+        return total_equip / raids if raids > 0 else 1.0
+
+
+def _remove_identical(lst, e):
+    # By identity, searched from the end where the recent moves are
+    for i in range(len(lst) - 1, -1, -1):
+        if lst[i] is e:
+            del lst[i]
+            return
+
+
+def validate_entries(entries):
+    # Consistency check of raid_data.json content. Returns (errors, warnings):
+    # errors break the tracker, warnings are states it can show (orphans etc.)
+    errors, warnings = [], []
+    if not isinstance(entries, list):
+        return ["top level is not a list of characters"], warnings
+    active, archived, listed_by = {}, set(), {}
+    for i, e in enumerate(entries):
+        if not isinstance(e, dict) or not isinstance(e.get("Name"), str) or not e["Name"].strip():
+            errors.append(f"entry {i}: no name")
+            continue
+        name = e["Name"]
+        for key in COUNTER_COLS:
+            try:
+                check_count(name, key, e.get(key, 0))
+            except ValueError as exc:
+                errors.append(str(exc))
+        if e.get("is_main") and e.get("is_twink"):
+            errors.append(f"{name}: marked as main and twink")
+        if e.get("Class") not in CLASS_ICONS:
+            warnings.append(f"{name}: unknown class {e.get('Class')!r}")
+        if e.get("active", True):
+            if name in active:
+                errors.append(f"{name}: active twice")
+            active[name] = e
+        else:
+            archived.add(name)
+    for name in sorted(archived.intersection(active)):
+        warnings.append(f"{name}: active and archived, the archived copy cannot be reactivated")
+    for name, e in active.items():
+        if e.get("is_main"):
+            for tname in e.get("Twinks", []):
+                listed_by.setdefault(tname, []).append(name)
+                t = active.get(tname)
+                if t is None:
+                    continue  # archived twinks stay listed
+                if not t.get("is_twink") or t.get("Main") != name:
+                    warnings.append(f"{name}: lists {tname} as twink, but {tname} does not belong to it")
+    for tname, mains in listed_by.items():
+        if len(mains) > 1 and tname in active:
+            warnings.append(f"{tname}: listed as twink by {', '.join(mains)}")
+    for name, e in active.items():
+        if e.get("is_twink"):
+            main = active.get(e.get("Main"))
+            if main is None or not main.get("is_main") or name not in main.get("Twinks", []):
+                warnings.append(f"{name}: twink without active main {e.get('Main')!r} (orphan)")
+    return errors, warnings
@@ -0,0 +1,49 @@
+class NameIndex:
+    # Substring search over the names of active characters. Every lowercase 1-, 2-
+    # and 3-gram of a name maps to the names containing it: short queries are a
+    # single lookup, longer ones intersect their trigrams and confirm the few
+    # candidates with a plain substring test. Kept in sync through ledger observers.
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self._grams = {}       # n-gram -> {names}
+        self._names = set()
+        self._dirty = True
+        ledger.observers.append(self._on_event)
+
+    def _on_event(self, event):
+        if event["op"] != "set":
+            self._dirty = True
+
+    @staticmethod
+    def _grams_of(name):
+        low = name.lower()
+        return {low[i:i + k] for k in (1, 2, 3) for i in range(len(low) - k + 1)}
+
+    def refresh(self):
+        # Only names that appeared or disappeared since the last query are touched
+        if not self._dirty:
+            return
+        current = {e.name for e in self.ledger.active()}
+        for name in self._names - current:
+            for g in self._grams_of(name):
+                names = self._grams[g]
+                names.discard(name)
+                if not names:
+                    del self._grams[g]
+        for name in current - self._names:
+            for g in self._grams_of(name):
+                self._grams.setdefault(g, set()).add(name)
+        self._names = current
+        self._dirty = False
+
+    def search(self, text):
+        # Names containing text (case-insensitive)
+        self.refresh()
+        text = text.lower()
+        if not text:
+            return set(self._names)
+        if len(text) <= 3:
+            return set(self._grams.get(text, ()))
+        postings = sorted((self._grams.get(text[i:i + 3], set()) for i in range(len(text) - 2)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return {name for name in candidates if text in name.lower()}
@@ -0,0 +1,130 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+
+# Opt-in timing of the trackers' hot paths. Nothing is wrapped unless the
+# tracker is started with --perf or LOOTTRACKER_PERF=1, so the normal run
+# pays nothing.
+ENV_VAR = "LOOTTRACKER_PERF"
+
+
+def enabled_by_env():
+    return os.environ.get(ENV_VAR, "").strip().lower() not in ("", "0", "no", "false")
+
+
+class _Op:
+    __slots__ = ("calls", "total", "samples", "widgets")
+
+    def __init__(self, keep):
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=keep)  # the last `keep` durations, for percentiles
+        self.widgets = None                # live widgets after the last top-level call
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class PerfStats:
+    # Call counts and durations per operation name. Durations are inclusive
+    # (refresh_view contains the _apply_filter it calls). widget_count, if given,
+    # is sampled after each outermost call on the GUI thread, so growing widget
+    # trees show up next to the times.
+    def __init__(self, widget_count=None, keep=2000):
+        self.widget_count = widget_count
+        self.keep = keep
+        self.ops = {}
+        self.started = time.time()
+        self._gui_thread = threading.get_ident()
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def instrument(self, obj, names, prefix=""):
+        # Replaces the methods on this instance with timed wrappers; connect
+        # signals afterwards so they pick up the wrappers
+        for name in names:
+            setattr(obj, name, self.timed(prefix + name, getattr(obj, name)))
+
+    def timed(self, label, fn):
+        # Qt signals hand over more arguments than a slot may take (clicked's
+        # checked flag); PyQt drops them for plain methods, so the wrapper must too
+        params = inspect.signature(fn).parameters.values()
+        if any(p.kind == p.VAR_POSITIONAL for p in params):
+            limit = None
+        else:
+            limit = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if limit is not None:
+                args = args[:limit]
+            gui = threading.get_ident() == self._gui_thread
+            if gui:
+                self._depth += 1
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                dt = time.perf_counter() - t
+                widgets = None
+                if gui:
+                    self._depth -= 1
+                    if self._depth == 0 and self.widget_count is not None:
+                        widgets = self.widget_count()
+                self.record(label, dt, widgets)
+        return wrapper
+
+    def record(self, label, seconds, widgets=None):
+        with self._lock:
+            op = self.ops.get(label)
+            if op is None:
+                op = self.ops[label] = _Op(self.keep)
+            op.calls += 1
+            op.total += seconds
+            op.samples.append(seconds)
+            if widgets is not None:
+                op.widgets = widgets
+
+    def reset(self):
+        with self._lock:
+            self.ops.clear()
+            self.started = time.time()
+
+    def summary(self):
+        # One dict per operation, slowest total first; times in ms
+        with self._lock:
+            ops = [(label, op.calls, op.total, sorted(op.samples), op.widgets) for label, op in self.ops.items()]
+        rows = []
+        for label, calls, total, samples, widgets in sorted(ops, key=lambda o: -o[2]):
+            rows.append({"op": label, "calls": calls, "total_ms": total * 1000,
+                         "p50_ms": percentile(samples, 50) * 1000, "p90_ms": percentile(samples, 90) * 1000,
+                         "p99_ms": percentile(samples, 99) * 1000, "max_ms": samples[-1] * 1000 if samples else 0.0,
+                         "widgets": widgets})
+        return rows
+
+    def report(self, title=""):
+        # Plain text table for the diagnostics panel and the log dump
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started))
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        lines = [f"{title} performance, {since} - {now}".strip()]
+        if self.widget_count is not None:
+            lines.append(f"live widgets: {self.widget_count()}")
+        lines.append(f"{'operation':<28}{'calls':>7}{'total ms':>11}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'widgets':>9}")
+        for r in self.summary():
+            lines.append(f"{r['op']:<28}{r['calls']:>7}{r['total_ms']:>11.1f}{r['p50_ms']:>9.2f}{r['p90_ms']:>9.2f}"
+                         f"{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}{r['widgets'] if r['widgets'] is not None else '':>9}")
+        return "\n".join(lines)
+
+    def dump(self, path, title=""):
+        # Appended, so one log keeps the sessions of a whole raid night
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.report(title) + "\n\n")
@@ -0,0 +1,87 @@
+from heapq import heapify, heappush, heappop
+
+from lootLedger import COUNTER_COLS
+
+LOOT_SLOTS = COUNTER_COLS[1:]  # everything but Raids can drop
+_COL = {key: i for i, key in enumerate(COUNTER_COLS)}
+_RAIDS = _COL["Raids"]
+
+
+class PriorityIndex:
+    # "Who rolls next" per loot slot: one heap per slot over the active mains,
+    # keyed (quotient, -raids attended, items of that slot, name), all summed over
+    # the main and its linked twinks. A counter change re-pushes only the owning
+    # main with a new version; outdated heap entries are dropped when they surface
+    # (lazy deletion). Structural changes and a new engine formula rebuild all
+    # heaps on the next query.
+    def __init__(self, ledger, engine):
+        self.ledger = ledger
+        self.engine = engine
+        self._formula = None   # the engine's formula the heaps were built with
+        self._heaps = {slot: [] for slot in LOOT_SLOTS}
+        self._version = {}     # main name -> version of its live heap entries
+        self._stale = set()    # mains whose counters changed since the last query
+        self._dirty = True
+        ledger.observers.append(self._on_event)
+
+    def _on_event(self, event):
+        if event["op"] != "set":
+            self._dirty = True
+        elif not self._dirty and event["key"] in _COL:
+            e = self.ledger.get(event["name"])
+            if e is None:
+                return
+            main = e if e.is_main else self.ledger.main_of(e)
+            if main is not None:
+                self._stale.add(main.name)
+
+    def rebuild(self):
+        totals = self.engine.all_branch_totals()
+        quotients = self.engine.quotients()
+        self._formula = self.engine.formula
+        self._version = dict.fromkeys(totals, 0)
+        for slot in LOOT_SLOTS:
+            c = _COL[slot]
+            heap = [(quotients[name], -t[_RAIDS], t[c], name, 0) for name, t in totals.items()]
+            heapify(heap)
+            self._heaps[slot] = heap
+        self._stale.clear()
+        self._dirty = False
+
+    def _update(self):
+        if self._dirty or self._formula is not self.engine.formula:
+            self.rebuild()
+            return
+        for name in self._stale:
+            main = self.ledger.get(name)
+            t = self.engine.branch_totals(main) if main is not None else None
+            if t is None:
+                continue
+            version = self._version[name] = self._version.get(name, 0) + 1
+            q = self.engine.formula.value(t, main.cls)
+            for slot in LOOT_SLOTS:
+                heap = self._heaps[slot]
+                heappush(heap, (q, -t[_RAIDS], t[_COL[slot]], name, version))
+                if len(heap) > 2 * len(self._version) + 64:
+                    self._compact(slot)
+        self._stale.clear()
+
+    def _compact(self, slot):
+        version = self._version
+        heap = [item for item in self._heaps[slot] if version.get(item[3]) == item[4]]
+        heapify(heap)
+        self._heaps[slot] = heap
+
+    def top(self, slot, k=5):
+        # [(name, quotient, raids, items of slot)] of the k mains next in line for
+        # slot, in O(k log n)
+        self._update()
+        heap, version = self._heaps[slot], self._version
+        best = []
+        while heap and len(best) < k:
+            item = heappop(heap)
+            if version.get(item[3]) == item[4]:
+                best.append(item)
+        for item in best:
+            heappush(heap, item)
+        return [(name, q, -neg_raids, count) for q, neg_raids, count, name, _ in best]
@@ -0,0 +1,168 @@
+from lootLedger import QUOTIENT_COLS, COUNTER_COLS
+from lootFormula import DEFAULT_FORMULA
+
+# numpy is optional and only pays off for big rosters; importing it costs more
+# startup time than a small roster takes to rank in plain Python
+NUMPY_MIN_ROWS = 2000
+_numpy = []
+
+_COL = {key: i for i, key in enumerate(COUNTER_COLS)}
+_RAIDS = _COL["Raids"]
+_QIDX = [_COL[key] for key in QUOTIENT_COLS]
+
+
+def load_numpy():
+    if not _numpy:
+        try:
+            import numpy
+        except ImportError:  # the pure Python path gives the same numbers
+            numpy = None
+        _numpy.append(numpy)
+    return _numpy[0]
+
+
+def quotient_of(totals):
+    # Quotient from branch totals, same arithmetic as LootLedger.quotient
+    raids = totals[_RAIDS]
+    return sum(totals[c] for c in _QIDX) / raids if raids > 0 else 1.0
+
+
+class QuotientEngine:
+    # Column store of the counters of all active characters (one row each, one
+    # column per COUNTER_COLS key) plus a (member row, main row) pair for every
+    # main and each of its linked twinks. All quotients are one grouped sum over
+    # those pairs. "set" events only patch a single cell, structural changes mark
+    # the store dirty and it is rebuilt on the next query. The quotient is the one
+    # of `formula` (lootFormula.py), the tracker's rule by default.
+    def __init__(self, ledger, numpy_min_rows=NUMPY_MIN_ROWS, formula=DEFAULT_FORMULA):
+        self.ledger = ledger
+        self.formula = formula
+        self.numpy_min_rows = numpy_min_rows  # None: never use numpy
+        self._np = None
+        self.names = []        # row -> name
+        self._cls = []         # row -> class
+        self._row = {}         # name -> row
+        self._counts = None    # rows x COUNTER_COLS, int64 array or list of lists
+        self._member = []      # pair -> contributing row (the main itself or a twink)
+        self._owner = []       # pair -> row of the main it counts for
+        self._members = {}     # main row -> [member rows]
+        self._dirty = True
+        ledger.observers.append(self._on_event)
+
+    def _on_event(self, event):
+        if event["op"] == "set" and not self._dirty:
+            col = _COL.get(event["key"])
+            if col is None:
+                return
+            row = self._row.get(event["name"])
+            if row is not None:
+                self._counts[row][col] = event["new"]
+                return
+        self._dirty = True
+
+    def rebuild(self):
+        active = self.ledger.active()
+        self.names = [e.name for e in active]
+        self._cls = [e.cls for e in active]
+        self._row = {name: i for i, name in enumerate(self.names)}
+        member, owner, self._members = [], [], {}
+        for i, e in enumerate(active):
+            if not e.is_main:
+                continue
+            # Same twinks as LootLedger.twinks_of: every active name on the list
+            rows_ = [i] + [self._row[n] for n in e.twinks or () if n in self._row]
+            self._members[i] = rows_
+            member += rows_
+            owner += [i] * len(rows_)
+        np = self._np = load_numpy() if self.numpy_min_rows is not None and len(active) >= self.numpy_min_rows else None
+        if np is not None:
+            # The records' uint32 counter arrays laid end to end are already the
+            # rows x COUNTER_COLS matrix
+            raw = b"".join([e.counts.tobytes() for e in active])
+            self._counts = np.frombuffer(raw, dtype=np.uint32).reshape(len(active), len(COUNTER_COLS)).astype(np.int64)
+            self._member = np.array(member, dtype=np.intp)
+            self._owner = np.array(owner, dtype=np.intp)
+        else:
+            self._counts = [e.counts.tolist() for e in active]
+            self._member, self._owner = member, owner
+        self._dirty = False
+
+    def _ensure(self):
+        if self._dirty:
+            self.rebuild()
+
+    def set_formula(self, formula):
+        # The counters stay, only the next quotients() evaluates differently
+        self.formula = formula
+
+    def quotients(self):
+        # {main name: quotient} for every active main, in one pass
+        self._ensure()
+        mains = list(self._members)
+        formula = self.formula
+        np = self._np
+        if np is not None:
+            n = len(self.names)
+            counts = self._counts
+            # Counters are small ints, float64 sums of them are exact
+            raids = np.bincount(self._owner, weights=counts[:, _RAIDS][self._member], minlength=n)
+            if formula.per_row:
+                score = np.bincount(self._owner, weights=formula.row_scores(np, counts)[self._member], minlength=n)
+                q = np.ones(n)
+                np.divide(score, raids, out=q, where=raids > 0)
+                values = q[mains].tolist()
+            else:
+                # Caps apply to branch totals, so every column is summed first
+                sums = np.stack([np.bincount(self._owner, weights=counts[self._member, c], minlength=n)
+                                 for c in formula.col_index], axis=1)[mains]
+                rows = np.array([formula.class_row(self._cls[i]) for i in mains], dtype=np.intp)
+                values = formula.values(np, sums.astype(np.int64), raids[mains], rows).tolist()
+        else:
+            totals = self._branch_sums(mains, [_RAIDS] + formula.col_index)
+            values = [formula.value(totals[o], self._cls[o]) for o in mains]
+        return dict(zip([self.names[i] for i in mains], values))
+
+    def _branch_sums(self, mains, cols):
+        # main row -> branch totals in COUNTER_COLS order, only `cols` filled in
+        counts = self._counts
+        totals = {o: [0] * len(COUNTER_COLS) for o in mains}
+        for m, o in zip(self._member, self._owner):
+            row, t = counts[m], totals[o]
+            for c in cols:
+                t[c] += row[c]
+        return totals
+
+    def branch_totals(self, main):
+        # Counters of a main summed with its linked twinks, in COUNTER_COLS order
+        self._ensure()
+        members = self._members.get(self._row.get(main.name))
+        if members is None:
+            return None
+        counts = self._counts
+        return [sum(int(counts[m][c]) for m in members) for c in range(len(COUNTER_COLS))]
+
+    def all_branch_totals(self):
+        # {main name: branch_totals} for every active main
+        self._ensure()
+        mains = list(self._members)
+        np = self._np
+        if np is not None:
+            n = len(self.names)
+            sums = np.zeros((n, len(COUNTER_COLS)), dtype=np.int64)
+            np.add.at(sums, self._owner, self._counts[self._member])
+            rows = sums[mains].tolist()
+        else:
+            totals = self._branch_sums(mains, range(len(COUNTER_COLS)))
+            rows = [totals[o] for o in mains]
+        return dict(zip([self.names[i] for i in mains], rows))
+
+    def quotient(self, main):
+        # Single main, e.g. after one counter changed
+        totals = self.branch_totals(main)
+        if totals is None:
+            totals = [sum(e.counts[c] for e in [main] + self.ledger.twinks_of(main)) for c in range(len(COUNTER_COLS))]
+        return self.formula.value(totals, main.cls)
+
+    def ranking(self):
+        # [(name, quotient)] lowest quotient first, ties keep roster order
+        return sorted(self.quotients().items(), key=lambda kv: kv[1])
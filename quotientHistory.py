@@ -0,0 +1,177 @@
+import json
+import os
+from bisect import bisect_right
+
+from lootLedger import COUNTER_COLS
+from quotientEngine import quotient_of
+
+
+class QuotientHistory:
+    # Season history of the counters, one frame per raid session (or revert),
+    # appended to raid_data.history as one JSON line. A frame stores only the
+    # counters that changed since the previous frame as flat [column, delta, ...]
+    # lists per name; every keyframe_every-th frame is a full keyframe instead, so
+    # rebuilding any frame replays at most keyframe_every - 1 deltas. Twink links
+    # are stored with keyframes and whenever they change, quotients are rebuilt
+    # with the links of their time.
+    def __init__(self, data_file, keyframe_every=8):
+        self.path = os.path.splitext(data_file)[0] + ".history"
+        self.keyframe_every = keyframe_every
+        self.frames = []
+        self._keyframes = []   # indexes of the keyframes
+        self._link_frames = [] # indexes of frames carrying links
+        self._seen = set()     # (raid id, revert) already recorded
+        self._last = None      # (state, links) after the last frame
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+            if self.frames:
+                self._last = (self.state_at(len(self.frames) - 1), self.links_at(len(self.frames) - 1))
+
+    def _add(self, frame):
+        i = len(self.frames)
+        self.frames.append(frame)
+        if "key" in frame:
+            self._keyframes.append(i)
+        if "links" in frame:
+            self._link_frames.append(i)
+        self._seen.add((frame["raid"], frame.get("revert", False)))
+
+    def record(self, ledger, raid_id, date, revert=False):
+        # Appends the frame for a raid that was just committed (or reverted)
+        if (raid_id, revert) in self._seen:
+            return None
+        current = {e.name: e.counts.tolist() for e in ledger.active()}
+        links = {m.name: [t.name for t in ledger.twinks_of(m)] for m in ledger.mains()}
+        frame = {"raid": raid_id, "date": date}
+        if revert:
+            frame["revert"] = True
+        if self._last is None or len(self.frames) - self._keyframes[-1] >= self.keyframe_every:
+            frame["key"] = current
+            frame["links"] = links
+            state = current
+        else:
+            prev, prev_links = self._last
+            zero = [0] * len(COUNTER_COLS)
+            delta = {}
+            for name, row in current.items():
+                old = prev.get(name, zero)
+                if old != row:
+                    delta[name] = [x for c, (a, b) in enumerate(zip(old, row)) if a != b for x in (c, b - a)]
+            frame["delta"] = delta
+            if links != prev_links:
+                frame["links"] = links
+            # Characters that left keep their last values, same as a rebuild would
+            state = dict(prev)
+            state.update(current)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(frame, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._add(frame)
+        self._last = (state, links)
+        return frame
+
+    # --- queries ---
+    def _keyframe_before(self, frame):
+        return self._keyframes[bisect_right(self._keyframes, frame) - 1]
+
+    def state_at(self, frame, names=None):
+        # {name: [counters in COUNTER_COLS order]} right after `frame`, optionally
+        # only for some names
+        k = self._keyframe_before(frame)
+        key = self.frames[k]["key"]
+        state = {n: list(v) for n, v in key.items() if names is None or n in names}
+        for f in self.frames[k + 1:frame + 1]:
+            self._apply(state, f["delta"], names)
+        return state
+
+    @staticmethod
+    def _apply(state, delta, names):
+        for name, flat in delta.items():
+            if names is not None and name not in names:
+                continue
+            row = state.get(name)
+            if row is None:
+                row = state[name] = [0] * len(COUNTER_COLS)
+            for i in range(0, len(flat), 2):
+                row[flat[i]] += flat[i + 1]
+
+    def links_at(self, frame):
+        return self.frames[self._link_frames[bisect_right(self._link_frames, frame) - 1]]["links"]
+
+    def counters(self, name, frame):
+        row = self.state_at(frame, {name}).get(name)
+        return dict(zip(COUNTER_COLS, row)) if row is not None else None
+
+    def quotient(self, main, frame):
+        members = [main] + self.links_at(frame).get(main, [])
+        return self._quotient(self.state_at(frame, set(members)), members)
+
+    @staticmethod
+    def _quotient(state, members):
+        rows = [state[n] for n in members if n in state]
+        if not rows:
+            return None
+        return quotient_of([sum(col) for col in zip(*rows)])
+
+    def series(self, name, start=0, end=None):
+        # One dict per frame in [start, end]: raid id, date, the character's counters
+        # and, for mains, its quotient at that time. Single walk from the keyframe
+        # before `start`, tracking only the character and its twinks.
+        if not self.frames:
+            return []
+        end = len(self.frames) - 1 if end is None else min(end, len(self.frames) - 1)
+        k = self._keyframe_before(start)
+        names = {name}
+        for i in self._link_frames:
+            if i <= end:
+                names.update(self.frames[i]["links"].get(name, []))
+        key = self.frames[k]["key"]
+        state = {n: list(key[n]) for n in names if n in key}
+        out = []
+        for i in range(k, end + 1):
+            f = self.frames[i]
+            if i > k:
+                if "key" in f:
+                    state = {n: list(f["key"][n]) for n in names if n in f["key"]}
+                else:
+                    self._apply(state, f["delta"], names)
+            if i < start:
+                continue
+            row = state.get(name)
+            point = {"frame": i, "raid": f["raid"], "date": f["date"], "revert": f.get("revert", False),
+                     "counters": dict(zip(COUNTER_COLS, row)) if row is not None else None}
+            links = self.links_at(i)
+            if name in links:
+                point["quotient"] = self._quotient(state, [name] + links[name])
+            out.append(point)
+        return out
+
+    def quotient_table(self, start=0, end=None):
+        # [(frame, {main: quotient})] for every frame in [start, end] in one walk;
+        # after a delta frame only the mains whose branch changed are recomputed
+        if not self.frames:
+            return []
+        end = len(self.frames) - 1 if end is None else min(end, len(self.frames) - 1)
+        state, quotients, owner, links = {}, {}, {}, {}
+        out = []
+        for i in range(self._keyframe_before(start), end + 1):
+            f = self.frames[i]
+            if "key" in f:
+                state = {n: list(v) for n, v in f["key"].items()}
+            else:
+                self._apply(state, f["delta"], None)
+            if "links" in f:
+                links = f["links"]
+                owner = {t: m for m, twinks in links.items() for t in twinks}
+            if "key" in f or "links" in f:
+                quotients = {m: self._quotient(state, [m] + twinks) for m, twinks in links.items()}
+            else:
+                quotients = dict(quotients)
+                for name in {owner.get(n, n) for n in f["delta"]}:
+                    if name in links:
+                        quotients[name] = self._quotient(state, [name] + links[name])
+            if i >= start:
+                out.append((i, quotients))
+        return out
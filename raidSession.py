@@ -0,0 +1,187 @@
+from PyQt5 import QtWidgets, QtCore
+from PyQt5.QtCore import Qt
+
+from priorityIndex import LOOT_SLOTS
+
+
+class RaidSessionDialog(QtWidgets.QDialog):
+    # Collects one raid: the participants (mains and twinks) and the drops they
+    # got. Nothing is changed until the tracker commits the result as one batch.
+    def __init__(self, ledger, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Raid Session")
+        self.ledger = ledger
+        self.drops = []  # [(name, slot)]
+        layout = QtWidgets.QHBoxLayout(self)
+
+        # Participants
+        left = QtWidgets.QVBoxLayout()
+        left.addWidget(QtWidgets.QLabel("Participants:"))
+        self.filter_input = QtWidgets.QLineEdit()
+        self.filter_input.setPlaceholderText("Type to filter names...")
+        self.filter_input.textChanged.connect(self._filter)
+        left.addWidget(self.filter_input)
+        self.people = QtWidgets.QListWidget()
+        for e in sorted(ledger.active(), key=lambda e: e.name.lower()):
+            if e.is_twink:
+                label = f"{e.name} ({e.cls}, Twink of {e.main or ''})"
+            else:
+                label = f"{e.name} ({e.cls})"
+            item = QtWidgets.QListWidgetItem(label)
+            item.setData(Qt.UserRole, e.name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Unchecked)
+            self.people.addItem(item)
+        self.people.itemChanged.connect(lambda _: self._update_participants())
+        left.addWidget(self.people)
+        self.count_label = QtWidgets.QLabel()
+        left.addWidget(self.count_label)
+        layout.addLayout(left)
+
+        # Drops and session details
+        right = QtWidgets.QVBoxLayout()
+        form = QtWidgets.QFormLayout()
+        self.date_edit = QtWidgets.QDateEdit(QtCore.QDate.currentDate())
+        self.date_edit.setCalendarPopup(True)
+        form.addRow("Date:", self.date_edit)
+        self.note_input = QtWidgets.QLineEdit()
+        form.addRow("Note:", self.note_input)
+        right.addLayout(form)
+
+        right.addWidget(QtWidgets.QLabel("Drops:"))
+        drop_h = QtWidgets.QHBoxLayout()
+        self.drop_name = QtWidgets.QComboBox()
+        self.drop_name.setMinimumWidth(140)
+        self.drop_slot = QtWidgets.QComboBox()
+        self.drop_slot.addItems(LOOT_SLOTS)
+        add_btn = QtWidgets.QPushButton("Add drop")
+        add_btn.clicked.connect(self._add_drop)
+        drop_h.addWidget(self.drop_name)
+        drop_h.addWidget(self.drop_slot)
+        drop_h.addWidget(add_btn)
+        right.addLayout(drop_h)
+        self.drop_list = QtWidgets.QListWidget()
+        right.addWidget(self.drop_list)
+        remove_btn = QtWidgets.QPushButton("Remove drop")
+        remove_btn.clicked.connect(self._remove_drop)
+        right.addWidget(remove_btn)
+
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        buttons.button(QtWidgets.QDialogButtonBox.Ok).setText("Commit raid")
+        buttons.accepted.connect(self._accept)
+        buttons.rejected.connect(self.reject)
+        right.addWidget(buttons)
+        layout.addLayout(right)
+        self._update_participants()
+
+    def participants(self):
+        return [self.people.item(i).data(Qt.UserRole) for i in range(self.people.count())
+                if self.people.item(i).checkState() == Qt.Checked]
+
+    def date(self):
+        return self.date_edit.date().toString(Qt.ISODate)
+
+    def note(self):
+        return self.note_input.text().strip()
+
+    def _filter(self, text):
+        text = text.lower().strip()
+        for i in range(self.people.count()):
+            item = self.people.item(i)
+            item.setHidden(text not in item.data(Qt.UserRole).lower())
+
+    def _update_participants(self):
+        names = self.participants()
+        current = self.drop_name.currentText()
+        self.drop_name.clear()
+        self.drop_name.addItems(names)
+        idx = self.drop_name.findText(current)
+        if idx >= 0:
+            self.drop_name.setCurrentIndex(idx)
+        # Drops of someone who got unchecked go away with them
+        self.drops = [d for d in self.drops if d[0] in names]
+        self._show_drops()
+        self.count_label.setText(f"{len(names)} participants")
+
+    def _add_drop(self):
+        name = self.drop_name.currentText()
+        if not name:
+            QtWidgets.QMessageBox.warning(self, "No Participant", "Check the participants first.")
+            return
+        self.drops.append((name, self.drop_slot.currentText()))
+        self._show_drops()
+
+    def _remove_drop(self):
+        row = self.drop_list.currentRow()
+        if row >= 0:
+            del self.drops[row]
+            self._show_drops()
+
+    def _show_drops(self):
+        self.drop_list.clear()
+        self.drop_list.addItems([f"{name}: {slot}" for name, slot in self.drops])
+
+    def _accept(self):
+        if not self.participants():
+            QtWidgets.QMessageBox.warning(self, "No Participants", "Nobody is checked for this raid.")
+            return
+        self.accept()
+
+
+class RaidLogDialog(QtWidgets.QDialog):
+    # Recorded raid sessions, newest first. revert(raid_id) is the tracker's
+    # callback, so saving and refreshing stay in one place.
+    def __init__(self, ledger, revert, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Raid Log")
+        self.ledger = ledger
+        self.revert = revert
+        self.resize(800, 400)
+        layout = QtWidgets.QVBoxLayout(self)
+        self.table = QtWidgets.QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Date", "Participants", "Drops", "Note", "Status"])
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        btn_h = QtWidgets.QHBoxLayout()
+        btn_h.addStretch()
+        self.revert_btn = QtWidgets.QPushButton("Revert raid")
+        self.revert_btn.clicked.connect(self._revert)
+        close_btn = QtWidgets.QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        btn_h.addWidget(self.revert_btn)
+        btn_h.addWidget(close_btn)
+        layout.addLayout(btn_h)
+        self.populate()
+
+    def populate(self):
+        raids = list(reversed(self.ledger.raids))
+        self.table.setRowCount(len(raids))
+        for row, raid in enumerate(raids):
+            drops = ", ".join(f"{name}: {slot}" for name, slot in raid["drops"]) or "-"
+            status = f"reverted {raid['reverted']}" if raid.get("reverted") else ""
+            cells = [raid["date"], str(len(raid["participants"])), drops, raid.get("note", ""), status]
+            for col, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                item.setData(Qt.UserRole, raid["id"])
+                if col == 1:
+                    item.setToolTip(", ".join(raid["participants"]))
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnToContents(0)
+
+    def _revert(self):
+        item = self.table.item(self.table.currentRow(), 0)
+        if item is None:
+            return
+        raid = self.ledger.raid(item.data(Qt.UserRole))
+        if raid.get("reverted"):
+            QtWidgets.QMessageBox.information(self, "Already Reverted", "This raid was already reverted.")
+            return
+        reply = QtWidgets.QMessageBox.question(
+            self, "Revert Raid", f"Take back the raid of {raid['date']} "
+            f"({len(raid['participants'])} participants, {len(raid['drops'])} drops)?")
+        if reply == QtWidgets.QMessageBox.Yes:
+            self.revert(raid["id"])
+            self.populate()
@@ -1,60 +1,57 @@
-import sys
+import time
+_MODULE_START = time.perf_counter()
 import os
-import json
-import urllib.request
-from PyQt5 import QtWidgets, QtGui
+import sys
+import argparse
+from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QPixmap, QIcon, QColor, QBrush
-
-
-
-CLASS_ICONS = {
-    "Burglar": "https://lotro-wiki.com/images/1/1e/Framed_Burglar-icon.png",
-    "Captain": "https://lotro-wiki.com/images/1/16/Framed_Captain-icon.png",
-    "Champion": "https://lotro-wiki.com/images/7/74/Framed_Champion-icon.png",
-    "Guardian": "https://lotro-wiki.com/images/d/dc/Framed_Guardian-icon.png",
-    "Hunter": "https://lotro-wiki.com/images/7/7c/Framed_Hunter-icon.png",
-    "Loremaster": "https://lotro-wiki.com/images/c/c0/Framed_Lore-master-icon.png",
-    "Minstrel": "https://lotro-wiki.com/images/f/f6/Framed_Minstrel-icon.png"
-}
-
-QUOTIENT_COLS = ["Helmet", "Shoulder", "Gloves", "Breast", "Legs", "Boots", "Zaudru Qitem"]
-
-from PyQt5.QtWidgets import QStyledItemDelegate
-
-
-class GridLineAndCenterDelegate(QStyledItemDelegate):
-    def initStyleOption(self, option, index):
-        super().initStyleOption(option, index)
-        if index.column() == 3:  # Quotient column
-            option.displayAlignment = Qt.AlignCenter | Qt.AlignVCenter
+from lootLedger import LootLedger, Character, CLASS_ICONS
+from dataStore import BackgroundWriter
+from storage import open_store, BACKENDS
+from iconCache import IconCache
+from nameIndex import NameIndex
+from priorityIndex import PriorityIndex, LOOT_SLOTS
+from raidSession import RaidSessionDialog, RaidLogDialog
+from undoStack import UndoStack
+from quotientHistory import QuotientHistory
+from rosterCsv import import_csv, export_csv
+from chatLog import ChatLogIngest, state_file_for
+from lootFormula import DEFAULT_FORMULA, load_formulas, formulas_file_for
+from perfStats import PerfStats, enabled_by_env
+from diagnostics import install_diagnostics
+from rosterModel import RosterModel, RosterDelegate
+from gridView import GridTreeView
+
+
+class ArchiveComboBox(QtWidgets.QComboBox):
+    # Tells when its list is about to open, so the archive is only read (and
+    # listed) once somebody looks at it
+    aboutToShowPopup = QtCore.pyqtSignal()
+
+    def showPopup(self):
+        self.aboutToShowPopup.emit()
+        super().showPopup()
 
-    def paint(self, painter, option, index):
-        super().paint(painter, option, index)
-        rect = option.rect
-
-        # Draw right border (vertical line)
-        painter.save()
-        pen = painter.pen()
-        pen.setWidth(2)
-        pen.setColor(QColor(136, 136, 136))
-        painter.setPen(pen)
-        painter.drawLine(rect.right(), rect.top(), rect.right(), rect.bottom())
-        painter.restore()
-
-        # Draw bottom border (horizontal line)
-        painter.save()
-        pen.setWidth(2)
-        pen.setColor(QColor(0, 0, 0))
-        painter.setPen(pen)
-        painter.drawLine(rect.left(), rect.bottom(), rect.right(), rect.bottom())
-        painter.restore()
 
 class RaidTracker(QtWidgets.QMainWindow):
-    def __init__(self):
+    saveFailed = QtCore.pyqtSignal(str)
+
+    def __init__(self, storage="json", lazy=False, timings=False, undo_depth=100, perf=False):
+        ctor_start = time.perf_counter()
         super().__init__()
         self.setWindowTitle("Raid Tracker")
         self.data_file = "raid_data.json"
+        # Opt-in hot path timings (--perf), shown on Ctrl+Shift+D and dumped on exit.
+        # Wrapped before any signal gets connected.
+        self.perf = None
+        if perf or enabled_by_env():
+            self.perf = PerfStats(widget_count=lambda: len(QtWidgets.QApplication.allWidgets()))
+            self.perf.instrument(self, [
+                "_build_roster", "_load_data", "_save_data", "_write_snapshot", "flush_data", "refresh_view",
+                "_apply_filter", "populate_db_combo", "_on_counter", "_on_add", "_remove_entry",
+                "_on_db_select", "_undo", "_redo", "_update_next_up", "_on_formula"])
+        self.storage = storage
+        self.save_delay_ms = 500
         self.columns = [
             " ", "Name", "Raids", "Quotient",
             "Helmet", "Shoulder", "Gloves", "Breast", "Legs", "Boots",
@@ -63,24 +60,72 @@ class RaidTracker(QtWidgets.QMainWindow):
         self.col_widths = [80, 120, 80, 80, 80, 80, 80, 80, 80, 80, 110, 90, 80, 80, 40]
         self.row_height_parent = 35
         self.row_height_child = 25
-        self.entries = []
+        self.ledger = LootLedger()
+        self.name_index = NameIndex(self.ledger)
         self.icon_map = {}
-        self._load_data()
+        self.show_timings = timings
+        self.timings = [("imports", _IMPORTS_DONE - _MODULE_START), ("qt startup", ctor_start - _IMPORTS_DONE)]
+        self._t_start = _MODULE_START
+        self._t_last = ctor_start
+        self._init_persistence()
+        self.undo_stack = UndoStack(self.ledger, undo_depth)  # after the store: only live edits are undoable
+        self._mark("persistence")
         self._load_icons()
+        self._mark("icons")
         self._init_ui()
+        self.perf_log = os.path.splitext(self.data_file)[0] + ".perf.log"
+        install_diagnostics(self, self.perf, self.perf_log, "Raid Tracker")
+        self._mark("ui shell")
+        self._roster_built = False
+        self._build_scheduled = False
+        self._hidden = set()   # names of the rows the filter currently hides
+        if lazy:
+            # Show the empty shell first, load and build the roster right after the first paint
+            self.centralWidget().setEnabled(False)
+            self.statusBar().showMessage("Loading roster...")
+        else:
+            self._build_roster()
+
+    def _mark(self, phase):
+        now = time.perf_counter()
+        self.timings.append((phase, now - self._t_last))
+        self._t_last = now
+
+    def _build_roster(self):
+        self._load_data()
+        self._mark("load data")
         self.refresh_view()
-        self.sort_tree_by_quotient()
-        self.populate_db_combo()
+        self._mark("roster view")
+        self._roster_built = True
+        self.centralWidget().setEnabled(True)
+        self.statusBar().clearMessage()
+        QtCore.QTimer.singleShot(0, self.name_index.refresh)  # ready before the first keystroke
+        if self.show_timings:
+            self.tree.viewport().repaint()
+            self._mark("roster paint")
+            self._report_timings()
+
+    def _report_timings(self):
+        total = self._t_last - self._t_start
+        for phase, secs in self.timings:
+            print(f"{phase:<14}{secs * 1000:8.1f} ms")
+        print(f"{'interactive':<14}{total * 1000:8.1f} ms ({len(self.ledger)} active characters)")
+        self.statusBar().showMessage(f"Interactive after {total * 1000:.0f} ms", 10000)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._roster_built and not self._build_scheduled:
+            self._build_scheduled = True
+            self._mark("first paint")
+            QtCore.QTimer.singleShot(0, self._build_roster)
 
     def _load_icons(self):
-        for cls, url in CLASS_ICONS.items():
-            try:
-                data = urllib.request.urlopen(url).read()
-                pix = QPixmap()
-                pix.loadFromData(data)
-                self.icon_map[cls] = QIcon(pix)
-            except:
-                self.icon_map[cls] = None
+        # Cached/bundled icons or placeholders right away; downloads happen in the
+        # background and repaint the tree when they arrive
+        self.icon_cache = IconCache(CLASS_ICONS, parent=self)
+        self.icon_map = self.icon_cache.load()
+        self.icon_cache.iconsChanged.connect(lambda: self.model.set_icons(self.icon_map))
+        self.icon_cache.refresh()
 
     def _init_ui(self):
         central = QtWidgets.QWidget()
@@ -126,12 +171,38 @@ class RaidTracker(QtWidgets.QMainWindow):
         top_h.addWidget(self.twink_of_label)
         top_h.addWidget(self.twink_of_combo)
         top_h.addWidget(self.add_btn)
+        self.session_btn = QtWidgets.QPushButton("Raid session...")
+        self.session_btn.clicked.connect(self._raid_session)
+        self.log_btn = QtWidgets.QPushButton("Raid log...")
+        self.log_btn.clicked.connect(lambda: RaidLogDialog(self.ledger, self._revert_raid, self).exec_())
+        self.chat_btn = QtWidgets.QPushButton("Chat log...")
+        self.chat_btn.clicked.connect(self._ingest_chat_log)
+        top_h.addWidget(self.session_btn)
+        top_h.addWidget(self.log_btn)
+        top_h.addWidget(self.chat_btn)
+        self.import_btn = QtWidgets.QPushButton("Import CSV...")
+        self.import_btn.clicked.connect(self._import_csv)
+        self.export_btn = QtWidgets.QPushButton("Export CSV...")
+        self.export_btn.clicked.connect(self._export_csv)
+        top_h.addWidget(self.import_btn)
+        top_h.addWidget(self.export_btn)
+        self.undo_btn = QtWidgets.QPushButton("Undo")
+        self.undo_btn.setShortcut(QtGui.QKeySequence.Undo)
+        self.undo_btn.clicked.connect(self._undo)
+        self.redo_btn = QtWidgets.QPushButton("Redo")
+        self.redo_btn.setShortcut(QtGui.QKeySequence.Redo)
+        self.redo_btn.clicked.connect(self._redo)
+        top_h.addWidget(self.undo_btn)
+        top_h.addWidget(self.redo_btn)
         top_h.addStretch()
 
         db_label = QtWidgets.QLabel("Choose database:")
         db_label.setContentsMargins(40, 0, 0, 0)
-        self.db_combo = QtWidgets.QComboBox()
+        self.db_combo = ArchiveComboBox()
         self.db_combo.setFixedWidth(180)
+        self.db_combo.addItem("--select character--")
+        self._db_combo_stale = True
+        self.db_combo.aboutToShowPopup.connect(self._on_db_popup)
         self.db_combo.currentIndexChanged.connect(self._on_db_select)
         top_h.addWidget(db_label)
         top_h.addWidget(self.db_combo)
@@ -145,7 +216,12 @@ class RaidTracker(QtWidgets.QMainWindow):
         self.filter_input = QtWidgets.QLineEdit()
         self.filter_input.setPlaceholderText("Type to filter names...")
         self.filter_input.setFixedWidth(200)
-        self.filter_input.textChanged.connect(lambda _: self._apply_filter(do_sort=True))
+        # Typing restarts the timer, the filter runs once the user pauses
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self.filter_input.textChanged.connect(lambda _: self._filter_timer.start())
         filter_h.addWidget(self.filter_input)
         filter_h.addStretch()
  
@@ -154,28 +230,59 @@ class RaidTracker(QtWidgets.QMainWindow):
         self.class_filter = QtWidgets.QComboBox()
         self.class_filter.setFixedWidth(self.filter_input.width())
         self.class_filter.addItem("--all--")  # Default
-        self.class_filter.addItems(sorted(set(e['Class'] for e in self.entries if e.get('is_main', False))))
+        self.class_filter.addItems(self.ledger.classes())
         self.class_filter.currentIndexChanged.connect(lambda _: self._apply_filter())
         filter_h.addWidget(self.class_filter)
         
         layout.addLayout(filter_h)       
 
+        # "Who rolls next" row: top candidates for the selected slot
+        next_h = QtWidgets.QHBoxLayout()
+        next_h.setSpacing(10)
+        next_h.addWidget(QtWidgets.QLabel("Who rolls next:"))
+        self.slot_combo = QtWidgets.QComboBox()
+        self.slot_combo.setFixedWidth(self.filter_input.width())
+        self.slot_combo.addItem("--slot--")
+        self.slot_combo.addItems(LOOT_SLOTS)
+        self.slot_combo.currentIndexChanged.connect(lambda _: self._update_next_up())
+        next_h.addWidget(self.slot_combo)
+        self.next_label = QtWidgets.QLabel()
+        next_h.addWidget(self.next_label)
+        next_h.addStretch()
+        # Loot value formulas from raid_data.formulas.json, the tracker's own first
+        next_h.addWidget(QtWidgets.QLabel("Formula:"))
+        self.formula_combo = QtWidgets.QComboBox()
+        self.formula_combo.setFixedWidth(180)
+        formulas_file = formulas_file_for(self.data_file)
+        try:
+            self.formulas = load_formulas(formulas_file)
+        except (ValueError, OSError) as exc:  # JSONDecodeError is a ValueError
+            self.formulas = [DEFAULT_FORMULA]
+            message = f"{formulas_file} not loaded, only the standard quotient is available:\n{exc}"
+            QtCore.QTimer.singleShot(0, lambda: QtWidgets.QMessageBox.warning(self, "Formulas", message))
+        self.formula_combo.addItems([f.name for f in self.formulas])
+        self.formula_combo.currentIndexChanged.connect(self._on_formula)
+        next_h.addWidget(self.formula_combo)
+        layout.addLayout(next_h)
+
         # Table (Tree)
         
-        self.tree = QtWidgets.QTreeWidget()
-        self.tree.setSortingEnabled(False)
-        self.tree.setColumnCount(len(self.columns))
-        self.tree.setHeaderLabels(self.columns)
-        self.tree.header().setSectionsClickable(False)
+        self.tree = GridTreeView()
         self.tree.setUniformRowHeights(False)
         self.tree.setIndentation(20)
         layout.addWidget(self.tree)
-        self.tree.setItemDelegate(GridLineAndCenterDelegate(self.tree))
+        self.model = RosterModel(self.ledger, self.columns, self.row_height_parent, self.row_height_child, self)
+        if self.perf is not None:
+            self.perf.instrument(self.model, ["rebuild", "entry_changed"], "model.")
+        self.model.set_icons(self.icon_map)
+        self.tree.setModel(self.model)
+        self.priority = PriorityIndex(self.ledger, self.model.engine)
+        self.delegate = RosterDelegate(self.model.remove_column, self.tree)
+        self.delegate.counterClicked.connect(self._on_counter)
+        self.delegate.removeClicked.connect(self._remove_entry)
+        self.tree.setItemDelegate(self.delegate)
         self.tree.setIconSize(QSize(self.row_height_parent - 2, self.row_height_parent - 2))
-        
-        self.tree.setSortingEnabled(True)
-        self.tree.sortByColumn(3, Qt.AscendingOrder)
-        
+
         header = self.tree.header()
         header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
         for i, w in enumerate(self.col_widths):
@@ -190,9 +297,9 @@ class RaidTracker(QtWidgets.QMainWindow):
                 font-weight: bold;
             }
         """)
-        self.tree.setHeaderLabels(["⯆"] + self.columns[1:])  # Down arrow means "collapse all" is possible
+        header.setSectionsClickable(True)  # first section toggles "collapse all"
         self.tree.header().sectionClicked.connect(self._header_clicked)
-        self.is_collapsed = False 
+        self.is_collapsed = False
 
         self.setFixedWidth(sum(self.col_widths) + 30)
         self.setMinimumHeight(500)
@@ -205,41 +312,94 @@ class RaidTracker(QtWidgets.QMainWindow):
 
     def _refresh_twink_dropdown(self):
         self.twink_of_combo.clear()
-        mains = [e["Name"] for e in self.entries if e.get("is_main") and e.get("active", True)]
+        mains = [e.name for e in self.ledger.mains()]
         self.twink_of_combo.addItems(mains)
 
     def _load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file) as f:
-                self.entries = json.load(f)
-        else:
-            self.entries = []
+        self.store.load(self.ledger)
+
+    def _init_persistence(self):
+        # Every ledger change is appended to the journal right away (one short line).
+        # Edits also restart the timer; once the table has been quiet for save_delay_ms
+        # and enough events piled up, a compacted snapshot is handed to the writer
+        # thread, which replaces raid_data.json atomically.
+        self.store = open_store(self.data_file, self.storage)
+        if self.perf is not None:
+            self.perf.instrument(self.store, ["record", "write_snapshot"], "store.")
+        self.ledger.listeners.append(self._record_event)
+        self.history = QuotientHistory(self.data_file)  # one frame per raid session, see quotientHistory.py
+        self.ledger.listeners.append(self._record_history)
+        self._save_timer = QtCore.QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.save_delay_ms)
+        self._save_timer.timeout.connect(self._write_snapshot)
+        self._save_failed = False
+        self.saveFailed.connect(self._on_save_failed)
+        self._writer = BackgroundWriter(self.store.write_snapshot, on_error=lambda exc: self.saveFailed.emit(str(exc)))
+
+    def _record_event(self, event):
+        try:
+            self.store.record(event)
+        except OSError as exc:
+            self._on_save_failed(str(exc))
+
+    def _record_history(self, event):
+        try:
+            if event["op"] == "raid":
+                self.history.record(self.ledger, event["raid"]["id"], event["raid"]["date"])
+            elif event["op"] == "revert_raid":
+                self.history.record(self.ledger, event["id"], event["date"], revert=True)
+        except OSError as exc:
+            self._on_save_failed(str(exc))
 
     def _save_data(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.entries, f, indent=2)
-        self.populate_db_combo()
+        self._save_timer.start()
+
+    def _write_snapshot(self, force=False):
+        if self._save_failed and self._writer.last_error is None:
+            self._save_failed = False
+            self.statusBar().clearMessage()
+        if force or self.store.needs_compaction():
+            self._writer.submit(self.store.snapshot(self.ledger))
+
+    def flush_data(self):
+        if not self._roster_built:
+            return None  # closed before the lazy load, nothing to write
+        self._save_timer.stop()
+        self._write_snapshot(force=True)
+        return self._writer.flush()
+
+    def _on_save_failed(self, message):
+        self.statusBar().showMessage(f"Saving {self.data_file} failed: {message}")
+        if not self._save_failed:
+            self._save_failed = True
+            QtWidgets.QMessageBox.warning(self, "Save Failed", f"Could not save {self.data_file}:\n{message}")
+
+    def _on_db_popup(self):
+        if self._db_combo_stale:
+            self.populate_db_combo()
 
     def populate_db_combo(self):
+        # Loads the archive on first use
+        self._db_combo_stale = False
         self.db_combo.blockSignals(True)
         self.db_combo.clear()
         self.db_combo.addItem("--select character--")
-        for e in self.entries:
-            if not e.get('active', True):
-                if e.get('is_main'):
-                    label = f"{e['Name']} (Main)"
-                elif e.get('is_twink'):
-                    label = f"{e['Name']} (Twink of {e.get('Main', '')})"
-                else:
-                    label = e['Name']
-                self.db_combo.addItem(label)
+        for e in self.ledger.archived():
+            if e.is_main:
+                label = f"{e.name} (Main)"
+            elif e.is_twink:
+                label = f"{e.name} (Twink of {e.main or ''})"
+            else:
+                label = e.name
+            self.db_combo.addItem(label)
         self.db_combo.blockSignals(False)
 
     def _on_add(self):
         name = self.name_input.text().strip()
         if not name:
             return
-        if any(e.get("Name") == name and e.get("active", True) for e in self.entries):
+        if name in self.ledger:
             QtWidgets.QMessageBox.warning(self, "Duplicate Player", f"Player '{name}' already active.")
             return
         is_main = self.main_check.isChecked()
@@ -250,300 +410,210 @@ class RaidTracker(QtWidgets.QMainWindow):
             if not main_parent:
                 QtWidgets.QMessageBox.warning(self, "No Main Selected", "Select a Main for this Twink.")
                 return
-        entry = {col: 0 for col in self.columns if col not in ("Class", "Name", "Quotient", "Remove")}
-        entry.update({
-            "Class": self.class_input.currentText(),
-            "Name": name,
-            "Quotient": 1.0,
-            "active": True,
-            "is_main": is_main,
-            "is_twink": is_twink
-        })
-        if is_main:
-            entry["Twinks"] = []
-        if is_twink:
-            entry["Main"] = main_parent
-            for e in self.entries:
-                if e.get("Name") == main_parent and e.get("is_main"):
-                    e.setdefault("Twinks", []).append(name)
-        self.entries.append(entry)
+        entry = Character(name, self.class_input.currentText(), is_main, is_twink,
+                          main=main_parent if is_twink else None, twinks=[] if is_main else None)
+        self.ledger.add(entry)
         self._save_data()
         self.refresh_view()
         self.name_input.clear()
         self.main_check.setChecked(True)
         self.twink_check.setChecked(False)
 
+    def _raid_session(self):
+        dlg = RaidSessionDialog(self.ledger, self)
+        if dlg.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        # Whole session in one go: one journal line, one rebuild
+        self.ledger.commit_raid(dlg.participants(), dlg.drops, dlg.date(), dlg.note())
+        self._save_data()
+        self.refresh_view()
+
+    def _revert_raid(self, raid_id):
+        self.ledger.revert_raid(raid_id, QtCore.QDate.currentDate().toString(Qt.ISODate))
+        self._save_data()
+        self.refresh_view()
+
+    def _ingest_chat_log(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Read Chat Log", "", "Chat logs (*.txt);;All files (*)")
+        if not path:
+            return
+        try:
+            ingest = ChatLogIngest(self.ledger, path, state_file_for(self.data_file))
+        except OSError as exc:
+            QtWidgets.QMessageBox.warning(self, "Chat Log", f"Could not read {path}:\n{exc}")
+            return
+        me, ok = QtWidgets.QInputDialog.getText(self, "Chat Log", "Your character (for the 'You ...' lines):",
+                                                text=ingest.parser.me or "")
+        if not ok:
+            return
+        ingest.parser.me = me.strip() or None
+        date = QtCore.QDate.currentDate().toString(Qt.ISODate)
+        QtWidgets.QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            # A raid without its end line may still be running: it stays open
+            # (not saved as read), so reading the log again later sees all of it
+            raids = ingest.poll(date, final=False)
+        except OSError as exc:
+            QtWidgets.QMessageBox.warning(self, "Chat Log", f"Could not read {path}:\n{exc}")
+            return
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        parser = ingest.parser
+        if parser.has_session():
+            answer = QtWidgets.QMessageBox.question(
+                self, "Chat Log",
+                f"The last raid in the log has not ended ({len(parser.participants)} characters, "
+                f"{len(parser.drops)} drops so far).\n\nRecord it now? Choose No while the raid is still "
+                "running, reading the log again later picks it up.",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, QtWidgets.QMessageBox.No)
+            if answer == QtWidgets.QMessageBox.Yes:
+                try:
+                    raids += ingest.poll(date)
+                except OSError as exc:
+                    QtWidgets.QMessageBox.warning(self, "Chat Log", f"Could not read {path}:\n{exc}")
+        if raids:
+            self._save_data()
+            self.refresh_view()
+        text = f"{len(raids)} raid session{'s' if len(raids) != 1 else ''} recorded."
+        for raid in raids:
+            text += f"\n\nRaid {raid['id']}: {', '.join(raid['participants'])}"
+            text += "".join(f"\n  {name}: {slot}" for name, slot in raid["drops"])
+        if ingest.parser.unknown:
+            text += f"\n\nNot on the roster: {', '.join(sorted(ingest.parser.unknown))}"
+        QtWidgets.QMessageBox.information(self, "Chat Log", text)
+
+    def _import_csv(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import CSV", "", "CSV files (*.csv);;All files (*)")
+        if not path:
+            return
+        try:
+            added, updated, errors = import_csv(self.ledger, path)
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            QtWidgets.QMessageBox.warning(self, "Import Failed", f"Could not import {path}:\n{exc}")
+            return
+        # Written right away, a big import would otherwise sit in the journal
+        self._write_snapshot(force=True)
+        self.refresh_view()
+        text = f"{added} added, {updated} updated."
+        if errors:
+            text += f"\n\n{len(errors)} problems:\n" + "\n".join(f"line {line}: {msg}" for line, msg in errors[:20])
+            if len(errors) > 20:
+                text += f"\n... and {len(errors) - 20} more"
+        QtWidgets.QMessageBox.information(self, "CSV Import", text)
+
+    def _export_csv(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export CSV", "raid_data.csv", "CSV files (*.csv)")
+        if not path:
+            return
+        try:
+            count = export_csv(self.ledger, path)
+        except OSError as exc:
+            QtWidgets.QMessageBox.warning(self, "Export Failed", f"Could not write {path}:\n{exc}")
+            return
+        self.statusBar().showMessage(f"Exported {count} characters to {path}", 5000)
+
     def _on_db_select(self, idx):
         if idx <= 0:
             return
         selected_label = self.db_combo.currentText()
         name = selected_label.split(" (")[0]
-        for e in self.entries:
-            if e['Name'] == name and not e.get('active', True):
-                e['active'] = True
-                if e.get('is_twink') and e.get('Main'):
-                    for main in self.entries:
-                        if main.get('Name') == e['Main'] and main.get('is_main'):
-                            if e['Name'] not in main.get('Twinks', []):
-                                main.setdefault('Twinks', []).append(e['Name'])
+        if name in self.ledger:
+            QtWidgets.QMessageBox.warning(self, "Duplicate Player", f"Player '{name}' already active.")
+            self.db_combo.setCurrentIndex(0)
+            return
+        self.ledger.reactivate(name)
         self._save_data()
         self.refresh_view()
         self.db_combo.setCurrentIndex(0)
 
-    def _make_counter_widget(self, entry, key, row_height=None):
-        if row_height is None:
-            row_height = 20
-        w = QtWidgets.QWidget()
-        w.setMinimumHeight(row_height)
-        h = QtWidgets.QHBoxLayout(w)
-        h.setContentsMargins(0, 0, 0, 0)
-        h.setSpacing(2)
-        m = QtWidgets.QPushButton("-")
-        m.setFixedSize(30, 20)
-        p = QtWidgets.QPushButton("+")
-        p.setFixedSize(30, 20)
-        #lbl = QtWidgets.QLabel(str(entry.get(key, 0)))
-        lbl = QtWidgets.QLabel(str(entry.get(key, 0)))
-        font = lbl.font()
-        font.setBold(True)
-        lbl.setFont(font)
-        lbl.setAlignment(Qt.AlignCenter)
-        lbl.setMinimumHeight(row_height)
-        h.addStretch()
-        h.addWidget(m, alignment=Qt.AlignCenter)
-        h.addWidget(lbl, alignment=Qt.AlignCenter)
-        h.addWidget(p, alignment=Qt.AlignCenter)
-        h.addStretch()
-        h.setAlignment(Qt.AlignCenter)
-        w.entry, w.key, w.lbl = entry, key, lbl
-        m.clicked.connect(lambda _, w=w: self._on_counter(w, -1))
-        p.clicked.connect(lambda _, w=w: self._on_counter(w, +1))
-        return w
-
-
     def refresh_view(self):
-        self.tree.clear()
-        header = self.tree.header()
-        header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
-        for i, w in enumerate(self.col_widths):
-            self.tree.setColumnWidth(i, w)
-        header.setDefaultAlignment(Qt.AlignCenter)
-
-        # --- Mains ---
-        for m in [e for e in self.entries if e.get("is_main") and e.get("active", True)]:
-            self.tree.setIconSize(QSize(self.row_height_parent - 2, self.row_height_parent - 2))
-            parent = QtWidgets.QTreeWidgetItem(self.tree)
-            parent.setSizeHint(0, QSize(0, self.row_height_parent))
-            icon = self.icon_map.get(m.get("Class"))
-            if icon:
-                pixmap = icon.pixmap(QSize(self.row_height_parent - 2, self.row_height_parent - 2))
-                parent.setIcon(0, QIcon(pixmap))
-            parent.setText(1, m.get("Name"))
-            parent.setTextAlignment(1, Qt.AlignVCenter | Qt.AlignLeft)
-            for col in range(2, len(self.columns)):
-                parent.setTextAlignment(col, Qt.AlignVCenter | Qt.AlignCenter)
-
-            # Counter widgets and remove button
-            w_r = self._make_counter_widget(m, "Raids", row_height=self.row_height_parent)
-            self.tree.setItemWidget(parent, 2, w_r)
-            raids = m.get('Raids', 0)
-            total_equip = sum(m.get(col, 0) for col in QUOTIENT_COLS)
-            for tname in m.get("Twinks", []):
-                t = next((x for x in self.entries if x["Name"] == tname and x.get("active", True)), None)
-                if t:
-                    raids += t.get("Raids", 0)
-                    total_equip += sum(t.get(col, 0) for col in QUOTIENT_COLS)
-            quotient = total_equip / raids if raids > 0 else 1.0
-            parent.setText(3, f"{quotient:.2f}")  # Enables sorting by true value
-            
-            for i, col in enumerate(self.columns[4:-2], 4):
-                if col == "Beryl shard":
-                    self.tree.setItemWidget(parent, i, w_beryl)
-                else:
-                    w_e = self._make_counter_widget(m, col, row_height=self.row_height_parent)
-                    self.tree.setItemWidget(parent, i, w_e)
-            # "Beryl shard"
-            beryl_idx = self.columns.index("Beryl shard")
-            w_beryl = self._make_counter_widget(m, "Beryl shard", row_height=self.row_height_parent)
-            self.tree.setItemWidget(parent, beryl_idx, w_beryl)
-            # Remove button
-            btn = QtWidgets.QPushButton("X")
-            btn.setFixedSize(30, 20)
-            btn_widget = QtWidgets.QWidget()
-            btn_layout = QtWidgets.QHBoxLayout(btn_widget)
-            btn_layout.addStretch()
-            btn_layout.addWidget(btn, alignment=Qt.AlignCenter)
-            btn_layout.addStretch()
-            btn_layout.setContentsMargins(0, 0, 0, 0)
-            self.tree.setItemWidget(parent, len(self.columns)-1, btn_widget)
-            btn.clicked.connect(lambda _, e=m: self._remove_entry(e))
-            brush = QBrush(QColor(0, 255, 0, int(0.3*255)))
-            for c in range(len(self.columns)):
-                parent.setBackground(c, brush)
-
-            # Children/twinks (no setSizeHint, default row height)
-            for tname in m.get("Twinks", []):
-                t = next((x for x in self.entries if x["Name"] == tname and x.get("active", True)), None)
-                if not t:
-                    continue
-                self.tree.setIconSize(QSize(self.row_height_child - 2, self.row_height_child - 2))
-                child = QtWidgets.QTreeWidgetItem(parent)
-                icon_c = self.icon_map.get(t.get("Class"))
-                if icon_c:
-                    padded_icon = self.make_padded_icon(icon_c,
-                        QSize(self.row_height_parent-2, self.row_height_parent-2),
-                        QSize(self.row_height_child-2, self.row_height_child-2))
-                    child.setIcon(0, padded_icon)
-                child.setText(1, t.get("Name"))
-                child.setTextAlignment(1, Qt.AlignVCenter | Qt.AlignLeft)
-                for col in range(2, len(self.columns)):
-                    child.setTextAlignment(col, Qt.AlignVCenter | Qt.AlignCenter)
-                w_rt = self._make_counter_widget(t, "Raids")
-                self.tree.setItemWidget(child, 2, w_rt)
-                for i, col in enumerate(self.columns[4:-2], 4):
-                    if col == "Beryl shard":
-                        # SKIP for twinks!
-                        continue
-                    else:
-                        w_et = self._make_counter_widget(t, col)
-                        self.tree.setItemWidget(child, i, w_et)
-                btn2 = QtWidgets.QPushButton("X")
-                btn2.setFixedSize(30, 20)
-                btn2_widget = QtWidgets.QWidget()
-                btn2_layout = QtWidgets.QHBoxLayout(btn2_widget)
-                btn2_layout.addStretch()
-                btn2_layout.addWidget(btn2, alignment=Qt.AlignCenter)
-                btn2_layout.addStretch()
-                btn2_layout.setContentsMargins(0, 0, 0, 0)
-                self.tree.setItemWidget(child, len(self.columns)-1, btn2_widget)
-                btn2.clicked.connect(lambda _, e=t: self._remove_entry(e))
-                brush2 = QBrush(QColor(255, 0, 0, int(0.2*255)))
-                for c in range(len(self.columns)):
-                    child.setBackground(c, brush2)
-
-        # --- Orphaned active twinks ---
-        linked_twinks = {tname for e in self.entries if e.get("is_main") and e.get("active", True)
-                         for tname in e.get("Twinks", [])}
-        for t in [e for e in self.entries if e.get("is_twink") and e.get("active", True) and e['Name'] not in linked_twinks]:
-            self.tree.setIconSize(QSize(self.row_height_child - 2, self.row_height_child - 2))
-            item = QtWidgets.QTreeWidgetItem(self.tree)
-            icon = self.icon_map.get(t.get("Class"))
-            if icon:
-                pixmap = icon.pixmap(QSize(self.row_height_child - 2, self.row_height_child - 2))
-                item.setIcon(0, QIcon(pixmap))
-            item.setText(1, t.get("Name"))
-            item.setTextAlignment(1, Qt.AlignVCenter | Qt.AlignLeft)
-            for col in range(2, len(self.columns)):
-                item.setTextAlignment(col, Qt.AlignVCenter | Qt.AlignCenter)
-            w_r = self._make_counter_widget(t, "Raids")
-            self.tree.setItemWidget(item, 2, w_r)
-            for i, col in enumerate(self.columns[4:-2], 4):
-                if col == "Beryl shard":
-                    self.tree.setItemWidget(item, i, w_beryl)
-                else:
-                    w_e = self._make_counter_widget(t, col)
-                    self.tree.setItemWidget(item, i, w_e)
-            beryl_idx = self.columns.index("Beryl shard")
-            self.tree.setItemWidget(item, beryl_idx, w_beryl)
-            btn = QtWidgets.QPushButton("X")
-            btn.setFixedSize(30, 20)
-            btn_widget = QtWidgets.QWidget()
-            btn_layout = QtWidgets.QHBoxLayout(btn_widget)
-            btn_layout.addStretch()
-            btn_layout.addWidget(btn, alignment=Qt.AlignCenter)
-            btn_layout.addStretch()
-            btn_layout.setContentsMargins(0, 0, 0, 0)
-            self.tree.setItemWidget(item, len(self.columns)-1, btn_widget)
-            btn.clicked.connect(lambda _, e=t: self._remove_entry(e))
-            brush = QBrush(QColor(255, 0, 0, 76))
-            for c in range(len(self.columns)):
-                item.setBackground(c, brush)
-
-        if hasattr(self, 'is_collapsed') and self.is_collapsed:
+        # Full rebuild, only needed when the roster structure changes (add/remove/reactivate)
+        self.model.rebuild()
+        self._hidden = set()  # the reset showed every row again
+        if self.is_collapsed:
             self.collapse_all_rows()
-            self.tree.headerItem().setText(0, "⯈")
         else:
             self.expand_all_rows()
-            self.tree.headerItem().setText(0, "⯆")
-        
-        self.tree.expandAll()
-        
+
         if hasattr(self, 'class_filter'):
             current_class = self.class_filter.currentText()
             self.class_filter.blockSignals(True)
             self.class_filter.clear()
             self.class_filter.addItem("--all--")
-            main_classes = sorted(set(e['Class'] for e in self.entries if e.get('is_main', False) and e.get('active', True)))
-            self.class_filter.addItems(main_classes)
+            self.class_filter.addItems(self.ledger.classes())
             idx = self.class_filter.findText(current_class)
             self.class_filter.setCurrentIndex(idx if idx >= 0 else 0)
             self.class_filter.blockSignals(False)
         self._apply_filter()
-        self.populate_db_combo()
+        self._db_combo_stale = True  # listed again when the combo opens
+        self._update_next_up()
+        self._update_undo_buttons()
 
-    def _apply_filter(self, text=None):
+    def _apply_filter(self):
+        self._filter_timer.stop()
         name_text = self.filter_input.text().lower().strip()
         class_text = self.class_filter.currentText() if hasattr(self, 'class_filter') else "--all--"
-        def match(item):
-            # Item can be parent or child
-            name_ok = name_text in item.text(1).lower()
-            class_ok = True
+        if not name_text and class_text == "--all--":
+            hidden = set()
+        else:
+            matches = self.name_index.search(name_text)
             if class_text != "--all--":
-                # Match against current entry list (mains only for dropdown)
-                # Since name is unique, look up class by name
-                name = item.text(1)
-                entry = next((e for e in self.entries if e['Name'] == name and e.get('active', True)), None)
-                class_ok = entry and entry.get('Class') == class_text
-            return name_ok and class_ok
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            parent = root.child(i)
-            visible = match(parent)
-            for j in range(parent.childCount()):
-                child = parent.child(j)
-                cvis = match(child)
-                child.setHidden(not cvis)
-                visible = visible or cvis
-            parent.setHidden(not visible)
-        self.tree.sortByColumn(3, Qt.AscendingOrder)
-            
-            
-    def _on_counter(self, widget, delta):
-        e, k = widget.entry, widget.key
-        e[k] = max(0, e.get(k, 0) + delta)
-        widget.lbl.setText(str(e[k]))
+                matches &= self.ledger.names_of_class(class_text)
+            hidden = self.model.filtered_out(matches)
+        # Only rows whose visibility changes are touched
+        for name in hidden ^ self._hidden:
+            row, parent = self.model.row_position(name)
+            self.tree.setRowHidden(row, parent, name in hidden)
+        self._hidden = hidden
+
+    def _on_counter(self, name, key, delta):
+        entry = self.ledger.get(name)
+        self.ledger.increment(entry, key, delta)
         self._save_data()
-        self.refresh_view()
-        self.tree.sortByColumn(14, Qt.AscendingOrder)
-
-    def make_padded_icon(self, icon, size, inner_size):
-        # icon: QIcon, size: QSize (outer), inner_size: QSize (icon size)
-        base = QPixmap(size)
-        base.fill(Qt.transparent)
-        painter = QtGui.QPainter(base)
-        pix = icon.pixmap(inner_size)
-        x = (size.width() - inner_size.width()) // 2
-        y = (size.height() - inner_size.height()) // 2
-        painter.drawPixmap(x, y, pix)
-        painter.end()
-        return QIcon(base)
-
-
-    def _remove_entry(self, entry):
-        if entry.get('is_main'):
-            entry['active'] = False
-            for tname in entry.get('Twinks', []):
-                for e in self.entries:
-                    if e['Name'] == tname:
-                        e['active'] = False
-        else:
-            entry['active'] = False
-            main_name = entry.get('Main')
-            if main_name:
-                for e in self.entries:
-                    if e.get('Name') == main_name and 'Twinks' in e:
-                        if entry['Name'] in e['Twinks']:
-                            e['Twinks'].remove(entry['Name'])
+        self._update_undo_buttons()
+        # Only the cell and the owning main's quotient are repainted; the model
+        # moves that single row to its new sort position.
+        self.model.entry_changed(entry, key)
+        self._update_next_up()
+
+    def _on_formula(self, i):
+        # Re-ranks the whole roster in one pass; the next-up heaps follow on their next query
+        self.model.set_formula(self.formulas[i])
+        self._update_next_up()
+
+    def _update_next_up(self):
+        slot = self.slot_combo.currentText()
+        if slot not in LOOT_SLOTS:
+            self.next_label.clear()
+            return
+        self.next_label.setText("   ".join(
+            f"{i}. {name} {q:.2f} ({raids} raids, {count}x {slot})"
+            for i, (name, q, raids, count) in enumerate(self.priority.top(slot, 5), 1)) or "nobody")
+
+    def _undo(self):
+        self._history_changed(self.undo_stack.undo())
+
+    def _redo(self):
+        self._history_changed(self.undo_stack.redo())
+
+    def _history_changed(self, result):
+        if result is not None:
+            self._save_data()
+            op, entry, key = result
+            if op == "set":
+                # Same incremental path as a counter click
+                self.model.entry_changed(entry, key)
+                self._update_next_up()
+            else:
+                self.refresh_view()
+        self._update_undo_buttons()
+
+    def _update_undo_buttons(self):
+        self.undo_btn.setEnabled(self.undo_stack.can_undo())
+        self.redo_btn.setEnabled(self.undo_stack.can_redo())
+
+    def _remove_entry(self, name):
+        self.ledger.remove(self.ledger.get(name))
         self._save_data()
         self.refresh_view()
 
@@ -551,35 +621,52 @@ class RaidTracker(QtWidgets.QMainWindow):
         if section == 0:  # Only if first column clicked
             if not self.is_collapsed:
                 self.collapse_all_rows()
-                self.tree.headerItem().setText(0, "⯈")  # Right arrow = expand all
                 self.is_collapsed = True
             else:
                 self.expand_all_rows()
-                self.tree.headerItem().setText(0, "⯆")                
                 self.is_collapsed = False
 
-    def sort_tree_by_quotient(self):
-        self.tree.sortByColumn(3, Qt.AscendingOrder)
-        
-
     def collapse_all_rows(self):
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            parent = root.child(i)
-            self.tree.collapseItem(parent)
+        self.tree.collapseAll()
+        self.model.set_collapsed(True)
 
     def expand_all_rows(self):
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            parent = root.child(i)
-            self.tree.expandItem(parent)
+        self.tree.expandAll()
+        self.model.set_collapsed(False)
 
     def closeEvent(self, event):
-        self._save_data()
+        error = self.flush_data()
+        if error is not None:
+            reply = QtWidgets.QMessageBox.critical(
+                self, "Save Failed", f"Could not save {self.data_file}:\n{error}\n\nClose anyway?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+            if reply != QtWidgets.QMessageBox.Yes:
+                event.ignore()
+                return
+        self._writer.close()
+        self.store.close()
+        self.icon_cache.shutdown()
+        if self.perf is not None:
+            try:
+                self.perf.dump(self.perf_log, "Raid Tracker")
+            except OSError:
+                pass  # diagnostics must never keep the window open
         super().closeEvent(event)
 
+_IMPORTS_DONE = time.perf_counter()
+
 if __name__ == '__main__':
-    app = QtWidgets.QApplication(sys.argv)
-    w = RaidTracker()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--storage", choices=sorted(BACKENDS), default="json",
+                        help="json (raid_data.json + journal) or sqlite (raid_data.db, migrated on first start)")
+    parser.add_argument("--eager", action="store_true", help="build the roster before showing the window")
+    parser.add_argument("--timings", action="store_true", help="print a breakdown of the startup phases")
+    parser.add_argument("--undo-depth", type=int, default=100, help="number of steps kept for undo/redo")
+    parser.add_argument("--perf", action="store_true",
+                        help="time the main operations (Ctrl+Shift+D shows them, raid_data.perf.log on exit)")
+    args, qt_args = parser.parse_known_args()
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    w = RaidTracker(storage=args.storage, lazy=not args.eager, timings=args.timings,
+                    undo_depth=args.undo_depth, perf=args.perf)
     w.show()
     sys.exit(app.exec_())
\ No newline at end of file
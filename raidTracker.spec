@@ -1,11 +1,12 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
 
 
 a = Analysis(
     ['raidTracker.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('icons', 'icons')] if os.path.isdir('icons') else [],  # optional bundled class icons
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,190 @@
+import csv
+import os
+import unicodedata
+
+from lootLedger import Character, COUNTER_COLS, CLASS_ICONS, check_count
+
+# Roster <-> CSV for spreadsheets. The columns are the tracker's own keys
+# (Class, Name, the counters) plus "Main" (the main's name, empty for mains) and,
+# for full exports, "Active". Quotient is written for reference and ignored on
+# import. Both directions go row by row, nothing but the roster itself is held
+# (imports apply IMPORT_BATCH rows at a time).
+CSV_COLUMNS = ["Class", "Name", "Main"] + COUNTER_COLS + ["Quotient"]
+_YES = {"1", "yes", "y", "true", "x", "ja"}
+_NO = {"0", "no", "n", "false", "", "nein"}
+IMPORT_BATCH = 1000  # rows per ledger change on import
+
+
+def _norm(text):
+    # Header matching ignores case, blanks and accents ("storvagun qitems")
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower().replace(" ", "").replace("_", "")
+
+
+_HEADER_KEYS = {_norm(k): k for k in CSV_COLUMNS + ["Active"]}
+_HEADER_KEYS["twinkof"] = "Main"
+_CLASSES = {c.lower(): c for c in CLASS_ICONS}
+
+
+def export_csv(ledger, path, include_archived=False, delimiter=","):
+    # Written next to the target and renamed over it like the JSON snapshots.
+    # utf-8 with BOM so Excel shows the accents right.
+    columns = CSV_COLUMNS + (["Active"] if include_archived else [])
+    tmp = path + ".tmp"
+    count = 0
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=delimiter)
+            writer.writerow(columns)
+            for e in ledger.all_entries() if include_archived else ledger.entries:
+                row = [e.cls or "", e.name, e.main or "" if e.is_twink else ""]
+                row += e.counts.tolist()
+                row.append(f"{ledger.quotient(e):.2f}" if e.active and e.is_main else "")
+                if include_archived:
+                    row.append("yes" if e.active else "no")
+                writer.writerow(row)
+                count += 1
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+def _read_rows(f, mapping, errors):
+    # Yields (line, {key: cell}) with the headers mapped onto tracker keys;
+    # ; and tab separated files (German Excel) are detected from the first lines
+    sample = f.read(8192)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(f, dialect)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("empty file")
+    mapping = {_norm(k): v for k, v in (mapping or {}).items()}
+    for key in mapping.values():
+        if key not in _HEADER_KEYS.values():
+            raise ValueError(f"unknown tracker key '{key}'")
+    keys = []
+    for h in header:
+        key = mapping.get(_norm(h)) or _HEADER_KEYS.get(_norm(h))
+        if key is None and h.strip():
+            errors.append((1, f"unknown column '{h}', ignored"))
+        keys.append(key)
+    if "Name" not in keys:
+        raise ValueError("no Name column")
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {k: cell.strip() for k, cell in zip(keys, row) if k is not None}
+
+
+def import_csv(ledger, path, mapping=None, batch=IMPORT_BATCH):
+    # Merges a CSV into the roster: counters of active names are set to the file's
+    # values (empty cells keep the current value), archived names marked active
+    # are reactivated (with their old class and main) and updated the same way,
+    # unknown names are added; inactive rows of names already archived are
+    # skipped. Twinks are linked in the same pass, a twink listed before its main
+    # waits for the main's row. Bad rows are skipped and reported as (line,
+    # message). The rows are applied `batch` at a time, one ledger
+    # change each, so a big file is never held in memory as a whole; only the
+    # names seen so far and twinks still waiting for their main are kept.
+    # mapping: extra {csv header: tracker key}. Returns (added, updated, errors).
+    errors = []
+    added = []
+    changes = []
+    revived = {}     # archived name -> entry to reactivate in the pending batch
+    count = updated = 0
+    new_names = {}   # active name -> entry added by the pending batch
+    waiting = {}     # main name -> [(line, twink entry)] until the main's row shows up
+    seen = set()
+
+    def flush():
+        nonlocal added, changes, revived, count
+        if added or changes or revived:
+            ledger.import_entries(added, changes, list(revived))
+        count += len(added)
+        added, changes, revived = [], [], {}
+        new_names.clear()
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, row in _read_rows(f, mapping, errors):
+            if len(added) + len(changes) + len(revived) >= batch:
+                flush()
+            name = row.get("Name", "")
+            if not name:
+                errors.append((line, "no name"))
+                continue
+            if name in seen:
+                errors.append((line, f"{name} is listed twice"))
+                continue
+            seen.add(name)
+            counters = {}
+            for key in COUNTER_COLS:
+                cell = row.get(key, "")
+                if not cell:
+                    continue
+                try:
+                    counters[key] = check_count(name, key, int(cell))
+                except ValueError:
+                    errors.append((line, f"{key} of {name}: '{cell}' is not a count"))
+                    break
+            else:
+                cell = row.get("Active", "").lower()
+                if cell not in _YES and cell not in _NO:
+                    errors.append((line, f"Active of {name}: '{row['Active']}' is neither yes nor no"))
+                    continue
+                active = cell in _YES or "Active" not in row
+
+                if not active and ledger.is_archived(name):
+                    continue  # already in the archive (a full export read back), kept as it is
+                current = ledger.get(name) if active else None
+                if current is None and active and ledger.is_archived(name):
+                    current = revived[name] = next(e for e in reversed(list(ledger.named(name))) if not e.active)
+                if current is not None:
+                    row_changes = [[name, key, current[key], value] for key, value in counters.items()
+                                   if current[key] != value]
+                    changes += row_changes
+                    updated += bool(row_changes) or not current.active
+                    continue
+
+                cls = _CLASSES.get(row.get("Class", "").lower())
+                if cls is None:
+                    errors.append((line, f"unknown class '{row.get('Class', '')}' for {name}"))
+                    continue
+                main = row.get("Main", "")
+                entry = Character(name, cls, not main, bool(main), main or None, None if main else [], active,
+                                  [counters.get(key, 0) for key in COUNTER_COLS])
+                if not main:
+                    added.append(entry)
+                    if active:
+                        new_names[name] = entry
+                        for _, t in waiting.pop(name, []):
+                            entry.twinks.append(t.name)
+                            added.append(t)
+                    continue
+                if active:
+                    target = new_names.get(main) or revived.get(main) or ledger.get(main)
+                    if target is None:
+                        waiting.setdefault(main, []).append((line, entry))
+                        continue
+                    if not target.is_main:
+                        errors.append((line, f"{main} is not a main, {name} can't be its twink"))
+                        continue
+                    if target is new_names.get(main):
+                        target.twinks.append(name)
+                    # twinks of mains already on the roster (or reactivated) are linked by the ledger
+                added.append(entry)
+        flush()
+
+    for main, twinks in waiting.items():
+        for line, t in twinks:
+            errors.append((line, f"main '{main}' of {t.name} not found"))
+    errors.sort(key=lambda err: err[0])
+    return count, updated, errors
@@ -0,0 +1,405 @@
+from bisect import bisect_right
+
+from PyQt5 import QtWidgets, QtGui
+from PyQt5.QtCore import Qt, QSize, QRect, QModelIndex, QAbstractItemModel, QPersistentModelIndex, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QBrush
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+
+from lootLedger import COUNTER_COLS, COUNTER_INDEX
+from quotientEngine import QuotientEngine
+from iconCache import IconAtlas
+
+SORT_ROLE = Qt.UserRole
+NAME_ROLE = Qt.UserRole + 1  # the character's name
+COUNTER_ROLE = Qt.UserRole + 2
+
+MAIN_BRUSH = QBrush(QColor(0, 255, 0, int(0.3*255)))
+TWINK_BRUSH = QBrush(QColor(255, 0, 0, int(0.2*255)))
+ORPHAN_BRUSH = QBrush(QColor(255, 0, 0, 76))
+
+BTN_W, BTN_H, BTN_SPACING = 30, 20, 2
+
+_ROLES = {Qt.DisplayRole, Qt.DecorationRole, Qt.BackgroundRole, Qt.TextAlignmentRole,
+          Qt.SizeHintRole, SORT_ROLE, NAME_ROLE, COUNTER_ROLE}
+
+
+class GridLineAndCenterDelegate(QStyledItemDelegate):
+    # The grid lines themselves are drawn per row by GridTreeView (gridView.py)
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        if index.column() == 3:  # Quotient column
+            option.displayAlignment = Qt.AlignCenter | Qt.AlignVCenter
+
+
+class RosterModel(QAbstractItemModel):
+    # Tree model over a LootLedger: mains and orphaned twinks on top level, linked
+    # twinks as children of their main. Internal pointer of a child index is its
+    # main's entry, top-level indexes carry None. Top-level rows are kept sorted by
+    # quotient (orphans first); a changed quotient moves just that one row.
+    def __init__(self, ledger, columns, row_height_parent=35, row_height_child=25, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        self.engine = QuotientEngine(ledger)
+        self.columns = columns
+        self.row_height_parent = row_height_parent
+        self.row_height_child = row_height_child
+        self.counter_columns = {i: col for i, col in enumerate(columns) if col in COUNTER_COLS}
+        self.column_of = {col: i for i, col in enumerate(columns)}
+        self.remove_column = len(columns) - 1
+        self.collapsed = False
+        self.atlas = IconAtlas({}, QSize(row_height_parent - 2, row_height_parent - 2),
+                               QSize(row_height_child - 2, row_height_child - 2))
+        self._top = []         # top-level entries, sorted
+        self._keys = []        # sort key of each top-level row
+        self._children = {}    # main name -> [twink entries]
+        self._row = {}         # name -> row within its parent
+        self._parent = {}      # child name -> main name
+        self._quotients = {}   # main name -> cached quotient
+        self._orphans = set()
+
+    # --- structure ---
+    def rebuild(self):
+        self.beginResetModel()
+        self._quotients = self.engine.quotients()
+        mains = self.ledger.mains()
+        self._children = {m.name: self.ledger.twinks_of(m) for m in mains}
+        orphans = self.ledger.orphan_twinks()
+        self._orphans = {t.name for t in orphans}
+        keyed = sorted(((self._sort_key(e), e) for e in orphans + mains), key=lambda ke: ke[0])
+        self._keys = [k for k, _ in keyed]
+        self._top = [e for _, e in keyed]
+        self._row = {}
+        self._parent = {}
+        for row, e in enumerate(self._top):
+            self._row[e.name] = row
+            for crow, t in enumerate(self._children.get(e.name, [])):
+                self._row[t.name] = crow
+                self._parent[t.name] = e.name
+        self.endResetModel()
+
+    def _sort_key(self, e):
+        # Orphans first, then by quotient; equal quotients keep the roster order
+        return -1.0 if e.name in self._orphans else self.quotient(e), self.ledger.order(e)
+
+    def sort(self, column=3, order=Qt.AscendingOrder):
+        # Full re-sort keeping persistent indexes (expanded/hidden rows) in place
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        held = [(self.entry(i), i.column()) for i in old]
+        order_ = sorted(range(len(self._top)), key=self._keys.__getitem__)
+        self._top = [self._top[i] for i in order_]
+        self._keys = [self._keys[i] for i in order_]
+        for row, e in enumerate(self._top):
+            self._row[e.name] = row
+        self.changePersistentIndexList(old, [self.index_of(e, c) for e, c in held])
+        self.layoutChanged.emit()
+
+    def _reposition(self, e):
+        old = self._row[e.name]
+        key = self._keys[old] = self._sort_key(e)
+        keys, n = self._keys, len(self._keys)
+        if old > 0 and key < keys[old - 1]:
+            new = bisect_right(keys, key, 0, old)
+        elif old < n - 1 and key > keys[old + 1]:
+            new = bisect_right(keys, key, old + 1, n) - 1
+        else:
+            return
+        root = QModelIndex()
+        self.beginMoveRows(root, old, old, root, new if new < old else new + 1)
+        self._top.insert(new, self._top.pop(old))
+        self._keys.insert(new, self._keys.pop(old))
+        for row in range(min(old, new), max(old, new) + 1):
+            self._row[self._top[row].name] = row
+        self.endMoveRows()
+
+    def set_icons(self, icon_map):
+        # Renders the atlas once per icon set (start, finished downloads)
+        self.atlas = IconAtlas(icon_map, self.atlas.size, QSize(self.row_height_child - 2, self.row_height_child - 2))
+        if self._top:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._top) - 1, 0), [Qt.DecorationRole])
+
+    def set_formula(self, formula):
+        # All quotients in one engine pass, then one re-sort; no reset, so expanded
+        # and filtered rows stay as they are
+        self.engine.set_formula(formula)
+        self._quotients = self.engine.quotients()
+        self._keys = [self._sort_key(e) for e in self._top]
+        if self._top:
+            self.dataChanged.emit(self.index(0, 3), self.index(len(self._top) - 1, 3), [Qt.DisplayRole, SORT_ROLE])
+        self.sort()
+
+    def set_collapsed(self, collapsed):
+        self.collapsed = collapsed
+        self.headerDataChanged.emit(Qt.Horizontal, 0, 0)
+
+    def entry(self, index):
+        if not index.isValid():
+            return None
+        main = index.internalPointer()
+        if main is None:
+            return self._top[index.row()]
+        return self._children[main.name][index.row()]
+
+    def index_of(self, entry, column=0):
+        row = self._row.get(entry.name)
+        if row is None:
+            return QModelIndex()
+        main = self.ledger.main_of(entry) if entry.is_twink else None
+        if main is not None and main.name in self._children:
+            return self.createIndex(row, column, main)
+        return self.createIndex(row, column, None)
+
+    def filtered_out(self, matches):
+        # Names of the rows a filter matching `matches` hides: children that don't
+        # match, top-level rows with no match in their whole branch
+        shown = {name for name in matches if name in self._row}
+        shown.update([self._parent[name] for name in shown if name in self._parent])
+        return self._row.keys() - shown
+
+    def row_position(self, name):
+        # (row, parent index) of a displayed character, as setRowHidden wants it
+        main = self._parent.get(name)
+        return self._row[name], QModelIndex() if main is None else self.createIndex(self._row[main], 0, None)
+
+    def entry_changed(self, entry, key=None):
+        # Repaint the changed cell and the owning main's quotient, nothing else
+        col = self.column_of.get(key) if key else None
+        if col is not None:
+            idx = self.index_of(entry, col)
+            self.dataChanged.emit(idx, idx, [Qt.DisplayRole])
+        else:
+            self.dataChanged.emit(self.index_of(entry, 0), self.index_of(entry, self.remove_column))
+        main = entry if entry.is_main else self.ledger.main_of(entry)
+        if main is not None and main.name in self._children:
+            self._quotients.pop(main.name, None)
+            idx = self.index_of(main, 3)
+            self.dataChanged.emit(idx, idx, [Qt.DisplayRole, SORT_ROLE])
+            self._reposition(main)
+
+    def quotient(self, main):
+        q = self._quotients.get(main.name)
+        if q is None:
+            q = self._quotients[main.name] = self.engine.quotient(main)
+        return q
+
+    # --- QAbstractItemModel ---
+    def index(self, row, column, parent=QModelIndex()):
+        if not parent.isValid():
+            if 0 <= row < len(self._top) and 0 <= column < len(self.columns):
+                return self.createIndex(row, column, None)
+            return QModelIndex()
+        if parent.internalPointer() is not None:
+            return QModelIndex()
+        main = self._top[parent.row()]
+        if 0 <= row < len(self._children.get(main.name, ())) and 0 <= column < len(self.columns):
+            return self.createIndex(row, column, main)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        main = index.internalPointer()
+        if main is None:
+            return QModelIndex()
+        return self.createIndex(self._row[main.name], 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._top)
+        if parent.column() != 0 or parent.internalPointer() is not None:
+            return 0
+        return len(self._children.get(self._top[parent.row()].name, ()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.columns)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return None
+        if role == Qt.DisplayRole:
+            if section == 0:
+                return "⯈" if self.collapsed else "⯆"
+            return self.columns[section]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Called for every role of every visible cell on each paint, keep the early exits cheap
+        if role not in _ROLES or not index.isValid():
+            return None
+        e = self.entry(index)
+        col = index.column()
+        is_child = index.internalPointer() is not None
+        if role == Qt.DisplayRole:
+            if col == 1:
+                return e.name
+            if col == 3 and e.is_main and not is_child:
+                return f"{self.quotient(e):.2f}"
+            key = self.counter_columns.get(col)
+            if key is not None and self._has_counter(e, key, is_child):
+                return str(e.counts[COUNTER_INDEX[key]])
+            return None
+        if role == COUNTER_ROLE:
+            key = self.counter_columns.get(col)
+            if key is not None and self._has_counter(e, key, is_child):
+                return key
+            return None
+        if role == SORT_ROLE:
+            if col == 3:
+                if e.is_main and not is_child:
+                    return self.quotient(e)
+                return -1.0
+            return None
+        if role == NAME_ROLE:
+            return e.name
+        if role == Qt.DecorationRole and col == 0:
+            return self.atlas.icon(e.cls, is_child or e.name in self._orphans)
+        if role == Qt.BackgroundRole:
+            if is_child:
+                return TWINK_BRUSH
+            return ORPHAN_BRUSH if e.name in self._orphans else MAIN_BRUSH
+        if role == Qt.TextAlignmentRole:
+            if col == 1:
+                return Qt.AlignVCenter | Qt.AlignLeft
+            return Qt.AlignVCenter | Qt.AlignCenter
+        if role == Qt.SizeHintRole and col == 0:
+            return QSize(0, self.row_height_child if is_child else self.row_height_parent)
+        return None
+
+    def _has_counter(self, e, key, is_child):
+        # Beryl shards are only tracked on top-level rows
+        return not (key == "Beryl shard" and is_child)
+
+    def icon_rect(self, index, selected=False):
+        # Where the row's class icon sits in the atlas, None without one
+        e = self.entry(index)
+        return self.atlas.rect(e.cls, index.internalPointer() is not None or e.name in self._orphans, selected)
+
+
+class RosterDelegate(GridLineAndCenterDelegate):
+    # Paints "- n +" counters and the remove button instead of embedding widgets,
+    # and turns clicks on them into signals.
+    counterClicked = pyqtSignal(str, str, int)
+    removeClicked = pyqtSignal(str)
+
+    def __init__(self, remove_column, parent=None):
+        super().__init__(parent)
+        self.remove_column = remove_column
+        self._pressed = None  # (QPersistentModelIndex, part)
+        self._icon_offsets = {}  # cell size -> icon position the item style uses
+
+    def _parts(self, option, index):
+        rect = option.rect
+        y = rect.y() + (rect.height() - BTN_H) // 2
+        if index.column() == self.remove_column:
+            return {"remove": QRect(rect.x() + (rect.width() - BTN_W) // 2, y, BTN_W, BTN_H)}
+        if index.data(COUNTER_ROLE) is None:
+            return {}
+        font = QtGui.QFont(option.font)
+        font.setBold(True)
+        lbl_w = max(QtGui.QFontMetrics(font).horizontalAdvance(index.data(Qt.DisplayRole) or ""), 8)
+        x = rect.x() + (rect.width() - (2 * BTN_W + lbl_w + 2 * BTN_SPACING)) // 2
+        return {
+            "minus": QRect(x, y, BTN_W, BTN_H),
+            "label": QRect(x + BTN_W + BTN_SPACING, rect.y(), lbl_w, rect.height()),
+            "plus": QRect(x + BTN_W + lbl_w + 2 * BTN_SPACING, y, BTN_W, BTN_H),
+        }
+
+    def sizeHint(self, option, index):
+        # Row heights are fixed per level; skips the full style pass the view
+        # would otherwise run for every cell when laying out the tree
+        model = index.model()
+        height = model.row_height_child if index.internalPointer() is not None else model.row_height_parent
+        return QSize(option.rect.width(), height)
+
+    def _fill(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        else:
+            painter.fillRect(option.rect, index.data(Qt.BackgroundRole))
+
+    def _paint_icon(self, painter, option, index):
+        # The class icon straight out of the model's atlas, where the item style
+        # would put it (asked once per cell size)
+        self._fill(painter, option, index)
+        rect = option.rect
+        model = index.model()
+        src = model.icon_rect(index, bool(option.state & QStyle.State_Selected))
+        if src is not None:
+            offset = self._icon_offsets.get((rect.width(), rect.height()))
+            if offset is None:
+                opt = QtWidgets.QStyleOptionViewItem(option)
+                self.initStyleOption(opt, index)
+                widget = option.widget
+                style = widget.style() if widget else QtWidgets.QApplication.style()
+                deco = style.subElementRect(QStyle.SE_ItemViewItemDecoration, opt, widget)
+                offset = self._icon_offsets[(rect.width(), rect.height())] = (deco.x() - rect.x(), deco.y() - rect.y())
+            painter.drawPixmap(rect.x() + offset[0], rect.y() + offset[1], model.atlas.pixmap,
+                               src.x(), src.y(), src.width(), src.height())
+
+    def paint(self, painter, option, index):
+        if index.column() == 0:
+            self._paint_icon(painter, option, index)
+            return
+        parts = self._parts(option, index)
+        if not parts:
+            super().paint(painter, option, index)
+            return
+        # Button cells carry no text or icon, so fill the background directly
+        # instead of running the full item style
+        widget = option.widget
+        style = widget.style() if widget else QtWidgets.QApplication.style()
+        self._fill(painter, option, index)
+        pressed = self._pressed
+        for part, r in parts.items():
+            if part == "label":
+                painter.save()
+                font = QtGui.QFont(option.font)
+                font.setBold(True)
+                painter.setFont(font)
+                painter.drawText(r, Qt.AlignCenter, index.data(Qt.DisplayRole))
+                painter.restore()
+                continue
+            btn = QtWidgets.QStyleOptionButton()
+            btn.rect = r
+            btn.text = {"minus": "-", "plus": "+", "remove": "X"}[part]
+            btn.state = QStyle.State_Enabled
+            if pressed and pressed[1] == part and QModelIndex(pressed[0]) == index:
+                btn.state |= QStyle.State_Sunken
+            else:
+                btn.state |= QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, btn, painter, widget)
+
+    def editorEvent(self, event, model, option, index):
+        etype = event.type()
+        if etype not in (QEvent.MouseButtonPress, QEvent.MouseButtonDblClick, QEvent.MouseButtonRelease):
+            return super().editorEvent(event, model, option, index)
+        if event.button() != Qt.LeftButton:
+            return super().editorEvent(event, model, option, index)
+        hit = next((p for p, r in self._parts(option, index).items()
+                    if p != "label" and r.contains(event.pos())), None)
+        view = self.parent()
+        if etype != QEvent.MouseButtonRelease:
+            if hit is None:
+                return super().editorEvent(event, model, option, index)
+            self._pressed = (QPersistentModelIndex(index), hit)
+            view.viewport().update(option.rect)
+            return True
+        pressed, self._pressed = self._pressed, None
+        if pressed is None:
+            return super().editorEvent(event, model, option, index)
+        view.viewport().update(option.rect)
+        if hit != pressed[1] or QModelIndex(pressed[0]) != index:
+            return True
+        name = index.data(NAME_ROLE)
+        if hit == "remove":
+            self.removeClicked.emit(name)
+        else:
+            self.counterClicked.emit(name, index.data(COUNTER_ROLE), -1 if hit == "minus" else +1)
+        return True
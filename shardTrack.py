@@ -3,32 +3,22 @@ import sys, os, json
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QStyledItemDelegate
+from perfStats import PerfStats, enabled_by_env
+from diagnostics import install_diagnostics
+from gridView import GridTreeWidget
+
+# Row backgrounds, shared by every cell that shows them
+DONE_BRUSH = QtGui.QBrush(QColor(0, 210, 0, int(0.3 * 255)))
+OPEN_BRUSH = QtGui.QBrush(QColor(210, 0, 0, int(0.2 * 255)))
+EMPTY_BRUSH = QtGui.QBrush(QColor(255, 255, 255))
 
 class GridLineAndCenterDelegate(QStyledItemDelegate):
+    # Grid lines are drawn per row by GridTreeWidget (gridView.py)
     def initStyleOption(self, option, index):
         super().initStyleOption(option, index)
         if index.column() == 3:
             option.displayAlignment = Qt.AlignCenter | Qt.AlignVCenter
 
-    def paint(self, painter, option, index):
-        super().paint(painter, option, index)
-        rect = option.rect
-        # Draw right border
-        painter.save()
-        pen = painter.pen()
-        pen.setWidth(2)
-        pen.setColor(QColor(136, 136, 136))
-        painter.setPen(pen)
-        painter.drawLine(rect.right(), rect.top(), rect.right(), rect.bottom())
-        painter.restore()
-        # Draw bottom border
-        painter.save()
-        pen.setWidth(2)
-        pen.setColor(QColor(0, 0, 0))
-        painter.setPen(pen)
-        painter.drawLine(rect.left(), rect.bottom(), rect.right(), rect.bottom())
-        painter.restore()
-
 class ShardCounterWidget(QtWidgets.QWidget):
     valueChanged = QtCore.pyqtSignal(int)
 
@@ -68,11 +58,19 @@ class RemoveButtonWidget(QtWidgets.QPushButton):
         self.setFixedSize(20,20)
 
 class MainWindow(QtWidgets.QWidget):
-    def __init__(self):
+    def __init__(self, perf=False):
         super().__init__()
         self.setWindowTitle("Carn Dûm Beryl Shard Tracker")
         self.setMinimumHeight(400)
         self.data_file = "shard_count.json"
+        # Opt-in timings (--perf), see perfStats.py
+        self.perf = None
+        if perf or enabled_by_env():
+            self.perf = PerfStats(widget_count=lambda: len(QtWidgets.QApplication.allWidgets()))
+            self.perf.instrument(self, ["_load_data", "_save_data", "add_group", "player_counter_changed",
+                                        "remove_player", "remove_group", "update_group_sum"])
+        self.perf_log = os.path.splitext(self.data_file)[0] + ".perf.log"
+        install_diagnostics(self, self.perf, self.perf_log, "Shard Tracker")
         self.entries = []
         self.columns = ["", "Name", "Shards", "remove"]
         self.col_widths = [60, 120, 100, 60]
@@ -84,7 +82,7 @@ class MainWindow(QtWidgets.QWidget):
         title.setStyleSheet("font-weight: bold; font-size: 18px; padding-bottom: 6px;")
         layout.insertWidget(0, title)
         
-        self.tree = QtWidgets.QTreeWidget()
+        self.tree = GridTreeWidget()
         self.setFixedWidth(sum(self.col_widths) + 30)
         self.tree.setColumnCount(len(self.columns))
         self.tree.setHeaderLabels(self.columns)
@@ -195,9 +193,9 @@ class MainWindow(QtWidgets.QWidget):
         self._save_data()
 
     def update_player_background(self, item, val):
-        color = QtGui.QColor(0, 210, 0, int(0.3 * 255)) if val == 1 else QtGui.QColor(210, 0, 0, int(0.2 * 255))
+        brush = DONE_BRUSH if val == 1 else OPEN_BRUSH
         for col in range(4):
-            item.setBackground(col, QtGui.QBrush(color))
+            item.setBackground(col, brush)
 
     def update_group_sum(self, group_item):
         shard_sum = 0
@@ -214,12 +212,12 @@ class MainWindow(QtWidgets.QWidget):
     def update_group_background(self, group_item):
         n = group_item.childCount()
         if n == 0:
-            color = QtGui.QColor(255, 255, 255)
+            brush = EMPTY_BRUSH
         else:
             shard_sum = int(group_item.text(2))
-            color = QtGui.QColor(0, 210, 0, int(0.3 * 255)) if shard_sum == n else QtGui.QColor(210, 0, 0, int(0.2 * 255))
+            brush = DONE_BRUSH if shard_sum == n else OPEN_BRUSH
         for col in range(4):
-            group_item.setBackground(col, QtGui.QBrush(color))
+            group_item.setBackground(col, brush)
 
     def _header_clicked(self, section):
         if section == 0:
@@ -304,17 +302,20 @@ class MainWindow(QtWidgets.QWidget):
             btn = RemoveButtonWidget()
             btn.clicked.connect(lambda _, item=group_item: self.remove_group(item))
             self.tree.setItemWidget(group_item, 3, btn)
-            root = self.tree.invisibleRootItem()
-            for i in range(root.childCount()):
-                group_item = root.child(i)
-                self.update_group_background(group_item)
+            self.update_group_background(group_item)  # now that its sum is set
 
     def closeEvent(self, event):
         self._save_data()
+        if self.perf is not None:
+            try:
+                self.perf.dump(self.perf_log, "Shard Tracker")
+            except OSError:
+                pass
         super().closeEvent(event)
 
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    perf = "--perf" in sys.argv[1:]
+    app = QtWidgets.QApplication([a for a in sys.argv if a != "--perf"])
+    window = MainWindow(perf=perf)
     window.show()
     sys.exit(app.exec_())
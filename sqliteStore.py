@@ -0,0 +1,289 @@
+import json
+import os
+import sqlite3
+import sys
+
+from lootLedger import LootLedger, Character, COUNTER_COLS, gc_paused
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    class TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    is_main INTEGER NOT NULL DEFAULT 0,
+    is_twink INTEGER NOT NULL DEFAULT 0,
+    main TEXT,
+    quotient REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_characters_name ON characters(name, active);
+CREATE INDEX IF NOT EXISTS idx_characters_active ON characters(active, position);
+CREATE TABLE IF NOT EXISTS twinks (
+    main_id INTEGER NOT NULL REFERENCES characters(id),
+    position INTEGER NOT NULL,
+    twink_name TEXT NOT NULL,
+    PRIMARY KEY (main_id, position)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    char_id INTEGER NOT NULL REFERENCES characters(id),
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (char_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS raids (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# The counters go to the counters table, as do unknown int values of a
+# Character's extra; the rest of extra is kept as JSON in "extra". The quotient
+# column is not used any more (it was never more than the stale 1.0 of
+# raid_data.json).
+
+
+class SqliteStore:
+    # Storage backend keeping the roster in raid_data.db. Same interface as
+    # JournalStore: each ledger event becomes a few single-row statements in one
+    # transaction, so there is nothing to compact. If the database does not exist
+    # yet, raid_data.json (plus its journal) is migrated on first load. Only
+    # active characters are read at load, the archived rows when the ledger
+    # first asks for them.
+    def __init__(self, data_file, db_file=None):
+        self.data_file = data_file
+        self.db_file = db_file or os.path.splitext(data_file)[0] + ".db"
+        self.pending = 0
+        self.ledger = None
+        self._conn = None
+        self._ids = {}  # id(entry) -> characters.id
+        self._next_pos = 0
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def load(self, ledger):
+        if not os.path.exists(self.db_file) and os.path.exists(self.data_file):
+            self._migrate(ledger)
+        else:
+            conn = self._connect()
+            self._ids = {}
+            self._next_pos = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM characters").fetchone()[0]
+            with gc_paused():
+                entries = self._read_entries(conn, True)
+            ledger.load(entries, self._read_archive)
+            ledger.load_raids([json.loads(data) for data, in conn.execute("SELECT data FROM raids ORDER BY id")])
+        ledger.archive_changes = None  # every move is a row update here
+        self.ledger = ledger
+        return 0
+
+    def _migrate(self, ledger):
+        # raid_data.json and its journal into a new database. It is built under a
+        # temporary name and renamed when complete, so a migration that fails or
+        # is interrupted never leaves a database that the next start would take
+        # as already migrated.
+        from lootJournal import JournalStore
+        source = JournalStore(self.data_file)
+        source.load(ledger)
+        source.close()
+        final, self.db_file = self.db_file, self.db_file + ".tmp"
+        try:
+            _remove_db(self.db_file)
+            self.import_entries(ledger.all_entries(), ledger.raids)
+            self._conn.execute("PRAGMA journal_mode=DELETE")  # everything in the one file
+            self.close()
+            os.replace(self.db_file, final)
+        except BaseException:
+            self.close()
+            _remove_db(self.db_file)
+            raise
+        finally:
+            self.db_file = final
+        self._connect()
+
+    def _read_archive(self):
+        return self._read_entries(self._connect(), False)
+
+    def _read_entries(self, conn, active):
+        counters = {}
+        for char_id, key, value in conn.execute(
+                "SELECT char_id, key, value FROM counters JOIN characters ON characters.id = char_id "
+                "WHERE active = ?", (int(active),)):
+            counters.setdefault(char_id, {})[key] = value
+        links = {}
+        for main_id, name in conn.execute(
+                "SELECT main_id, twink_name FROM twinks JOIN characters ON characters.id = main_id "
+                "WHERE active = ? ORDER BY main_id, twinks.position", (int(active),)):
+            links.setdefault(main_id, []).append(name)
+        entries = []
+        rows = conn.execute("SELECT id, name, class, active, is_main, is_twink, main, quotient, extra "
+                            "FROM characters WHERE active = ? ORDER BY position", (int(active),))
+        for char_id, name, cls, active, is_main, is_twink, main, quotient, extra in rows:
+            e = Character(name, cls, bool(is_main), bool(is_twink), main, links.get(char_id, []) if is_main else None,
+                          bool(active), extra=json.loads(extra) if extra else None)
+            for key, value in counters.get(char_id, {}).items():
+                e[key] = value
+            self._ids[id(e)] = char_id
+            entries.append(e)
+        return entries
+
+    def import_entries(self, entries, raids=()):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM counters")
+            conn.execute("DELETE FROM twinks")
+            conn.execute("DELETE FROM characters")
+            conn.execute("DELETE FROM raids")
+            self._ids = {}
+            self._next_pos = 0
+            for e in entries:
+                self._insert(conn, e)
+            for e in entries:
+                if e.is_main:
+                    self._write_links(conn, e)
+            for raid in raids:
+                self._write_raid(conn, raid)
+
+    def _write_raid(self, conn, raid):
+        conn.execute("INSERT OR REPLACE INTO raids (id, data) VALUES (?, ?)",
+                     (raid["id"], json.dumps(raid, ensure_ascii=False)))
+
+    def _insert(self, conn, e):
+        counters = list(zip(COUNTER_COLS, e.counts))
+        extra = {}
+        for k, v in (e.extra or {}).items():
+            if isinstance(v, int) and not isinstance(v, bool):
+                counters.append((k, v))
+            else:
+                extra[k] = v
+        cur = conn.execute(
+            "INSERT INTO characters (position, name, class, active, is_main, is_twink, main, quotient, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+            (self._next_pos, e.name, e.cls, int(e.active), int(e.is_main), int(e.is_twink), e.main,
+             json.dumps(extra) if extra else None))
+        char_id = self._ids[id(e)] = cur.lastrowid
+        self._next_pos += 1
+        conn.executemany("INSERT INTO counters (char_id, key, value) VALUES (?, ?, ?)",
+                         [(char_id, k, v) for k, v in counters])
+        return char_id
+
+    def _write_links(self, conn, main):
+        main_id = self._ids[id(main)]
+        conn.execute("DELETE FROM twinks WHERE main_id = ?", (main_id,))
+        conn.executemany("INSERT INTO twinks (main_id, position, twink_name) VALUES (?, ?, ?)",
+                         [(main_id, i, n) for i, n in enumerate(main.twinks or ())])
+
+    def _sync_flags(self, conn, e):
+        conn.execute("UPDATE characters SET active = ? WHERE id = ?", (int(e.active), self._ids[id(e)]))
+
+    def record(self, event):
+        conn = self._conn
+        op = event["op"]
+        with conn:
+            if op == "set":
+                self._set_counter(conn, event["name"], event["key"], event["new"])
+            elif op in ("raid", "revert_raid"):
+                # The whole session (or its revert) in the same transaction
+                changes = event["raid"]["changes"] if op == "raid" else event["changes"]
+                for name, key, old, new in changes:
+                    self._set_counter(conn, name, key, new)
+                self._write_raid(conn, event["raid"] if op == "raid" else self.ledger.raid(event["id"]))
+            elif op == "import":
+                for name in event.get("reactivated", ()):
+                    e = self.ledger.get(name)
+                    self._sync_flags(conn, e)
+                    self._sync_mains(conn, e.main)
+                for name, key, old, new in event["changes"]:
+                    self._set_counter(conn, name, key, new)
+                # The imported entries are the newest of their name in either segment
+                added = [self.ledger.get(d["Name"]) if d.get("active", True) else self.ledger.latest_archived(d["Name"])
+                         for d in event["entries"]]
+                for e in added:
+                    self._insert(conn, e)
+                for e in added:
+                    if e.is_main:
+                        self._write_links(conn, e)
+                for main_name in {e.main for e in added if e.main}:
+                    self._sync_mains(conn, main_name)
+            elif op == "add":
+                e = self.ledger.get(event["entry"]["Name"])
+                self._insert(conn, e)
+                self._sync_mains(conn, e.main)
+            elif op == "discard":
+                # The entry is gone from the ledger already, find its row by name
+                row = conn.execute("SELECT id FROM characters WHERE name = ? AND active = 1 "
+                                   "ORDER BY position DESC LIMIT 1", (event["name"],)).fetchone()
+                if row is not None:
+                    char_id = row[0]
+                    conn.execute("DELETE FROM counters WHERE char_id = ?", (char_id,))
+                    conn.execute("DELETE FROM twinks WHERE main_id = ?", (char_id,))
+                    conn.execute("DELETE FROM characters WHERE id = ?", (char_id,))
+                    self._ids = {k: v for k, v in self._ids.items() if v != char_id}
+                self._sync_mains(conn, event.get("main"))
+            elif op in ("remove", "reactivate"):
+                # Flags of the character, of the twinks archived with a main and the
+                # main's twink list may all have changed
+                if op == "reactivate":
+                    e = self.ledger.get(event["name"])
+                    self._sync_flags(conn, e)
+                else:
+                    e = self.ledger.latest_archived(event["name"])
+                    for name in [event["name"]] + event.get("twinks", []):
+                        self._sync_flags(conn, self.ledger.latest_archived(name))
+                self._sync_mains(conn, e.main)
+            else:
+                raise ValueError(f"Unknown event op '{op}'")
+
+    def _set_counter(self, conn, name, key, value):
+        char_id = self._ids[id(self.ledger.get(name))]
+        cur = conn.execute("UPDATE counters SET value = ? WHERE char_id = ? AND key = ?", (value, char_id, key))
+        if cur.rowcount == 0:
+            conn.execute("INSERT INTO counters (char_id, key, value) VALUES (?, ?, ?)", (char_id, key, value))
+
+    def _sync_mains(self, conn, main_name):
+        m = self.ledger.main_named(main_name) if main_name else None
+        if m is not None:
+            self._write_links(conn, m)
+
+    # Nothing to compact, every event is already in the database
+    def needs_compaction(self):
+        return False
+
+    def snapshot(self, ledger):
+        return None
+
+    def write_snapshot(self, job):
+        pass
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _remove_db(path):
+    for name in (path, path + "-wal", path + "-shm", path + "-journal"):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def migrate_json(data_file, db_file=None):
+    # One-step migration of raid_data.json (and its journal tail) into a fresh database
+    store = SqliteStore(data_file, db_file)
+    if os.path.exists(store.db_file):
+        raise FileExistsError(store.db_file)
+    ledger = LootLedger()
+    store.load(ledger)
+    store.close()
+    return store.db_file, len(ledger.all_entries())
+
+
+if __name__ == "__main__":
+    db_file, count = migrate_json(*sys.argv[1:3] or ["raid_data.json"])
+    print(f"Migrated {count} characters into {db_file}")
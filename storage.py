@@ -0,0 +1,13 @@
+from lootJournal import JournalStore
+from sqliteStore import SqliteStore
+
+# Storage backends for raid_data.json; all share load/record/snapshot/close
+BACKENDS = {"json": JournalStore, "sqlite": SqliteStore}
+
+
+def open_store(data_file, backend="json"):
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend '{backend}', choose from: {', '.join(BACKENDS)}") from None
+    return cls(data_file)
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The tracker's modules sit flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lootLedger import Character, COUNTER_COLS  # noqa: E402
+
+
+def make_character(name, cls="Hunter", main=None, active=True, **counters):
+    counts = [counters.get(key.split()[0].lower(), 0) for key in COUNTER_COLS]
+    return Character(name, cls, main is None, main is not None, main, [] if main is None else None, active, counts)
+
+
+@pytest.fixture
+def roster():
+    # Two mains, one with a twink, and an archived main
+    ann = make_character("Ann", "Minstrel", raids=4, helmet=1, zaudru=1)
+    bob = make_character("Bob", "Guardian", raids=2, breast=1, beryl=3)
+    tom = make_character("Tom", "Hunter", main="Ann", raids=2, boots=1, storvâgûn=2)
+    old = make_character("Old", "Captain", active=False, raids=9, legs=2)
+    ann.twinks = ["Tom"]
+    return [ann, bob, tom, old]
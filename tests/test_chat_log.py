@@ -0,0 +1,85 @@
+from chatLog import ChatLogIngest, ChatLogParser, ChatLogReader, state_file_for
+from lootLedger import LootLedger
+
+RAID_START = ["[8:01 PM] Ann has joined your raid.\n",
+              "[8:02 PM] Bob has joined your raid.\n",
+              "[8:30 PM] [Loot] Ann has acquired [Helm of the Deep]\n"]
+RAID_END = ["[9:10 PM] [Loot] Bob has acquired [Beryl Shard]\n",
+            "[9:15 PM] [Raid] Tom: gg\n",
+            "[9:20 PM] Your raid has been disbanded.\n"]
+
+
+def read(ledger, log, data_file, final=False):
+    # Like the GUI: a fresh ingest for every read
+    return ChatLogIngest(ledger, str(log), state_file_for(str(data_file))).poll("2026-10-01", final=final)
+
+
+def test_reading_the_same_log_twice_mid_raid(tmp_path, roster):
+    ledger = LootLedger(roster)
+    log, data_file = tmp_path / "chat.txt", tmp_path / "raid_data.json"
+    log.write_text("".join(RAID_START))
+    assert read(ledger, log, data_file) == []
+    assert read(ledger, log, data_file) == []
+    assert not ledger.raids and ledger.get("Ann")["Raids"] == 4
+
+    with open(log, "a") as f:
+        f.writelines(RAID_END)
+    raids = read(ledger, log, data_file)
+    assert [(r["participants"], r["drops"]) for r in raids] == \
+        [(["Ann", "Bob", "Tom"], [["Ann", "Helmet"], ["Bob", "Beryl shard"]])]
+    assert [ledger.get(n)["Raids"] for n in ("Ann", "Bob", "Tom")] == [5, 3, 3]
+    assert ledger.get("Ann")["Helmet"] == 2 and ledger.get("Bob")["Beryl shard"] == 4
+    assert read(ledger, log, data_file, final=True) == []
+
+
+def test_parser_collects_one_session(roster):
+    parser = ChatLogParser(LootLedger(roster), me="Tom")
+    parser.refresh_roster()
+    lines = ["[Loot] Ann has acquired [Zaudru's Token]",     # before the raid: ignored
+             "[8:01 PM] ann has joined your raid.",
+             "[Raid] Bob: ready",
+             "[Loot] You have acquired 2 [Storvâgûn Qitem]",
+             "[Loot] Bob won [Gauntlets of the Watch]",
+             "[Loot] Zed has acquired [Helm of the Deep]",
+             "[Loot] Ann has acquired [Shiny Trinket]"]
+    assert [parser.feed(line) for line in lines] == [False] * len(lines)
+    assert list(parser.participants) == ["Ann", "Bob", "Tom"]
+    assert parser.drops == [("Tom", "Storvâgûn Qitems"), ("Tom", "Storvâgûn Qitems"), ("Bob", "Gloves")]
+    assert parser.unknown == {"Zed": 1} and parser.unmatched == {"Shiny Trinket": 1}
+    assert parser.feed("Your raid has been disbanded.")
+    assert not parser.in_raid and parser.has_session()
+    parser.reset()
+    assert not parser.has_session()
+
+
+def test_reader_chunks_and_partial_lines(tmp_path):
+    log = tmp_path / "chat.txt"
+    log.write_bytes("".join(RAID_START + RAID_END).encode() + b"[9:30 PM] Ann has joined your ra")
+    whole = list(ChatLogReader(str(log)).candidates())
+    small = ChatLogReader(str(log), chunk_size=16)
+    assert list(small.candidates()) == whole
+    assert [text for _, text in whole] == [line.rstrip("\n") for line in RAID_START + RAID_END]
+    # The unfinished last line is read once it is complete
+    assert small.offset == whole[-1][0]
+    with open(log, "ab") as f:
+        f.write(b"id.\n")
+    assert [text for _, text in small.candidates()] == ["[9:30 PM] Ann has joined your raid."]
+
+
+def test_resume_offset(tmp_path, roster):
+    ledger = LootLedger(roster)
+    log, data_file = tmp_path / "chat.txt", tmp_path / "raid_data.json"
+    log.write_text("".join(RAID_START + RAID_END))
+    assert len(read(ledger, log, data_file)) == 1
+    size = log.stat().st_size
+    # Resumes after the recorded raid, from the raid record alone
+    ingest = ChatLogIngest(ledger, str(log), str(tmp_path / "other.chatlog.json"))
+    assert ingest.resume_offset() == size
+    # Lines without a session only move the saved offset
+    with open(log, "a") as f:
+        f.write("[9:40 PM] [Loot] Ann has acquired [Helm of the Deep]\nbye\n")
+    assert read(ledger, log, data_file) == []
+    assert ChatLogIngest(ledger, str(log), state_file_for(str(data_file))).resume_offset() == log.stat().st_size
+    # A new log under the same name starts over
+    log.write_text("".join(RAID_END))
+    assert ChatLogIngest(ledger, str(log), state_file_for(str(data_file))).resume_offset() == 0
@@ -0,0 +1,42 @@
+import json
+
+from lootCli import main
+from lootLedger import validate_entries
+
+
+def run(data_file, *argv):
+    return main(["--data-file", str(data_file), *argv])
+
+
+def test_json_import_reactivates_archived_names(tmp_path, roster, capsys):
+    data_file = tmp_path / "raid_data.json"
+    data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+    import_file = tmp_path / "import.json"
+    import_file.write_text(json.dumps([{"Name": "Old", "Class": "Captain", "is_main": True, "Raids": 10, "Legs": 3},
+                                       {"Name": "Ann", "Class": "Minstrel", "is_main": True, "Raids": 5}]))
+    assert run(data_file, "--json", "import", str(import_file)) == 0
+    assert json.loads(capsys.readouterr().out) == {"added": 0, "updated": 2}
+    assert run(data_file, "--json", "validate") == 0
+    assert json.loads(capsys.readouterr().out) == {"errors": [], "warnings": []}
+    assert run(data_file, "show", "Old") == 0
+    lines = [line.split() for line in capsys.readouterr().out.splitlines()]
+    assert ["Raids", "10"] in lines and ["Legs", "3"] in lines
+
+
+def test_validate_flags_active_and_archived_name():
+    errors, warnings = validate_entries([{"Name": "Old", "Class": "Captain", "is_main": True},
+                                         {"Name": "Old", "Class": "Captain", "is_main": True, "active": False}])
+    assert errors == []
+    assert warnings == ["Old: active and archived, the archived copy cannot be reactivated"]
+
+
+def test_shards_validate_reports_bad_entries(tmp_path, capsys):
+    shard_file = tmp_path / "shard_count.json"
+    shard_file.write_text(json.dumps([{"group": "Raid 1", "players": [{"name": "Ann", "shards": 1}, "Bob", None,
+                                                                       {"name": "Ann", "shards": 2}]}]))
+    assert main(["--shard-file", str(shard_file), "--json", "shards", "validate"]) == 1
+    assert json.loads(capsys.readouterr().out)["errors"] == [
+        "Raid 1: player 1 is 'Bob', expected an object",
+        "Raid 1: player 2 is None, expected an object",
+        "Raid 1 / Ann: shards is 2, expected 0 or 1",
+        "Raid 1: Ann listed twice"]
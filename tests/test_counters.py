@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from conftest import make_character
+from lootCli import main
+from lootLedger import Character, LootLedger, COUNT_MAX, check_count, validate_entries
+
+
+def test_check_count():
+    assert check_count("Ann", "Helmet", 0) == 0
+    assert check_count("Ann", "Helmet", COUNT_MAX) == COUNT_MAX
+    assert check_count("Ann", "Helmet", 3.0) == 3
+    for bad in (-1, COUNT_MAX + 1, 1.5, "2", True, None):
+        with pytest.raises(ValueError, match="Ann: Helmet"):
+            check_count("Ann", "Helmet", bad)
+
+
+def test_from_dict_accepts_whole_floats_only():
+    e = Character.from_dict({"Name": "Ann", "Raids": 4.0, "Helmet": 1})
+    assert (e["Raids"], e["Helmet"]) == (4, 1)
+    with pytest.raises(ValueError, match="Ann: Helmet"):
+        Character.from_dict({"Name": "Ann", "Helmet": 2 ** 32})
+    with pytest.raises(ValueError, match="Ann: Legs"):
+        Character.from_dict({"Name": "Ann", "Legs": 0.5})
+
+
+def test_ledger_changes_are_range_checked():
+    ledger = LootLedger([make_character("Ann", helmet=COUNT_MAX)])
+    ann = ledger.get("Ann")
+    with pytest.raises(ValueError, match="Ann: Helmet"):
+        ledger.increment(ann, "Helmet", 1)
+    with pytest.raises(ValueError, match="Ann: Helmet"):
+        ledger.commit_raid(["Ann"], [("Ann", "Helmet")], "2026-10-01")
+    assert ann["Helmet"] == COUNT_MAX and ann["Raids"] == 0 and not ledger.raids
+    with pytest.raises(ValueError, match="Ann: Legs"):
+        ledger.import_entries([], [["Ann", "Legs", 0, -3]])
+    assert ann["Legs"] == 0
+
+
+def test_validate_entries():
+    errors, _ = validate_entries([{"Name": "Ann", "Class": "Hunter", "is_main": True, "Helmet": 2 ** 40},
+                                  {"Name": "Bob", "Class": "Hunter", "is_main": True, "Raids": 3.0}])
+    assert errors == [f"Ann: Helmet is {2 ** 40}, expected a count from 0 to {COUNT_MAX}"]
+
+
+def test_cli_reports_out_of_range(tmp_path, capsys):
+    data_file = tmp_path / "raid_data.json"
+    data_file.write_text(json.dumps([make_character("Ann").to_dict()]))
+    assert main(["--data-file", str(data_file), "inc", "Ann", "Helmet", "5000000000"]) == 1
+    assert "Ann: Helmet" in capsys.readouterr().err
+    csv_file = tmp_path / "big.csv"
+    csv_file.write_text("Name,Class,Helmet\nAnn,Hunter,99999999999\n")
+    assert main(["--data-file", str(data_file), "import", str(csv_file)]) == 1
+    assert main(["--data-file", str(data_file), "show", "Ann"]) == 0
+    assert "Helmet            0" in capsys.readouterr().out
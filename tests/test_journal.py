@@ -0,0 +1,104 @@
+import json
+
+from lootJournal import JournalStore
+from lootLedger import LootLedger
+
+
+def open_ledger(data_file, compact_every=200):
+    store = JournalStore(str(data_file), compact_every)
+    ledger = LootLedger()
+    store.load(ledger)
+    ledger.listeners.append(store.record)
+    return ledger, store
+
+
+def state(ledger):
+    return [e.to_dict() for e in ledger.all_entries()], ledger.raids
+
+
+def test_replay_after_crash(tmp_path, roster):
+    data_file = tmp_path / "raid_data.json"
+    data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+    ledger, store = open_ledger(data_file)
+    ledger.increment(ledger.get("Ann"), "Helmet", 1)
+    ledger.commit_raid(["Ann", "Bob"], [("Bob", "Gloves")], "2026-10-01")
+    ledger.remove(ledger.get("Bob"))
+    expected = state(ledger)
+    # Killed before any snapshot, halfway through appending one more line
+    store._journal.write('{"op":"set","name":"Ann","key":"Hel')
+    store._journal.flush()
+    store.close()
+
+    ledger2, store2 = open_ledger(data_file)
+    assert store2.pending == 3
+    assert state(ledger2) == expected
+    store2.close()
+    assert (tmp_path / "raid_data.journal").read_bytes().endswith(b"\n")
+
+
+def test_compaction_covers_journal_and_archive(tmp_path, roster):
+    data_file = tmp_path / "raid_data.json"
+    data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+    ledger, store = open_ledger(data_file, compact_every=2)
+    ledger.increment(ledger.get("Ann"), "Raids", 1)
+    assert not store.needs_compaction()
+    ledger.remove(ledger.get("Bob"))
+    assert store.needs_compaction()
+    store.write_snapshot(store.snapshot(ledger))
+    assert not store.needs_compaction()
+    ledger.increment(ledger.get("Ann"), "Legs", 2)
+    expected = state(ledger)
+    store.close()
+
+    # The snapshot holds the active roster only, archived characters moved out
+    snapshot = json.loads(data_file.read_text())
+    assert [e["Name"] for e in snapshot] == ["Ann", "Tom"]
+    archived = [json.loads(line)["Name"] for line in (tmp_path / "raid_data.archive.jsonl").read_text().splitlines()]
+    assert sorted(archived) == ["Bob", "Old"]
+
+    ledger2, store2 = open_ledger(data_file)
+    assert store2.pending == 1  # only the change after the snapshot is replayed
+    assert state(ledger2) == expected
+    store2.close()
+
+
+def test_hand_edited_snapshot_is_trusted(tmp_path, roster):
+    data_file = tmp_path / "raid_data.json"
+    data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+    ledger, store = open_ledger(data_file)
+    ledger.increment(ledger.get("Ann"), "Helmet", 1)
+    store.write_snapshot(store.snapshot(ledger))
+    store.close()
+    entries = json.loads(data_file.read_text())
+    entries[0]["Helmet"] = 7
+    data_file.write_text(json.dumps(entries))
+
+    ledger2, store2 = open_ledger(data_file)
+    assert store2.pending == 0
+    assert ledger2.get("Ann")["Helmet"] == 7
+    store2.close()
+
+
+def test_archived_main_keeps_twinks_changed_after_archiving(tmp_path, roster):
+    # Twink archived before its main, brought back while the main is archived:
+    # the main's twink list changes in the archive and must survive compaction
+    def steps(restart):
+        data_file = tmp_path / restart / "raid_data.json"
+        data_file.parent.mkdir()
+        data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+        ledger, store = open_ledger(data_file)
+        ledger.increment(ledger.get("Tom"), "Boots", 2)
+        ledger.remove(ledger.get("Tom"))
+        ledger.remove(ledger.get("Ann"))
+        store.write_snapshot(store.snapshot(ledger))
+        ledger.reactivate("Tom")
+        store.write_snapshot(store.snapshot(ledger))
+        if restart == "restart":
+            store.close()
+            ledger, store = open_ledger(data_file)
+        ledger.reactivate("Ann")
+        result = ledger.get("Ann").twinks, ledger.quotient(ledger.get("Ann")), ledger.orphan_twinks()
+        store.close()
+        return result
+
+    assert steps("restart") == steps("live") == (["Tom"], 5 / 6, [])
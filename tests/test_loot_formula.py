@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from conftest import make_character
+from lootFormula import DEFAULT_FORMULA, LootFormula, load_formulas, validate_formula
+from lootLedger import LootLedger, COUNTER_COLS, CLASS_ICONS
+from priorityIndex import PriorityIndex
+from quotientEngine import QuotientEngine, load_numpy
+
+WEIGHTED = {"name": "Weighted", "weights": {"Helmet": 2, "Breast": 1.5, "Zaudru Qitem": 0.5, "Beryl shard": 0.25},
+            "caps": {"Helmet": 3},
+            "classes": {"Minstrel": {"weights": {"Helmet": 1}, "caps": {"Helmet": None, "Breast": 1}}}}
+PATHS = [None, pytest.param(0, marks=pytest.mark.skipif(load_numpy() is None, reason="numpy not installed"))]
+
+
+def random_ledger(n=300, seed=5):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(n):
+        main = entries[rng.randrange(len(entries))] if entries and rng.random() < 0.3 else None
+        if main is not None and not main.is_main:
+            main = None
+        e = make_character(f"C{i}", rng.choice(list(CLASS_ICONS)), main=main and main.name,
+                           **{key.split()[0].lower(): rng.randrange(6) for key in COUNTER_COLS})
+        if main is not None:
+            main.twinks.append(e.name)
+        entries.append(e)
+    return LootLedger(entries)
+
+
+def branch(ledger, main):
+    members = [main] + ledger.twinks_of(main)
+    return [sum(e.counts[c] for e in members) for c in range(len(COUNTER_COLS))]
+
+
+@pytest.mark.parametrize("numpy_min_rows", PATHS)
+def test_default_formula_is_the_tracker_quotient(numpy_min_rows):
+    ledger = random_ledger()
+    engine = QuotientEngine(ledger, numpy_min_rows=numpy_min_rows)
+    expected = {m.name: ledger.quotient(m) for m in ledger.mains()}
+    assert engine.formula is DEFAULT_FORMULA
+    assert engine.quotients() == expected
+    assert {m.name: engine.quotient(m) for m in ledger.mains()} == expected
+
+
+@pytest.mark.parametrize("numpy_min_rows", PATHS)
+def test_weighted_formula_matches_single_evaluation(numpy_min_rows):
+    ledger = random_ledger()
+    formula = LootFormula(WEIGHTED)
+    engine = QuotientEngine(ledger, numpy_min_rows=numpy_min_rows, formula=formula)
+    expected = {m.name: formula.value(branch(ledger, m), m.cls) for m in ledger.mains()}
+    assert engine.quotients() == pytest.approx(expected)
+    assert {m.name: engine.quotient(m) for m in ledger.mains()} == pytest.approx(expected)
+
+
+def test_weights_caps_and_class_overrides():
+    formula = LootFormula(WEIGHTED)
+    totals = dict.fromkeys(COUNTER_COLS, 0)
+    totals.update({"Raids": 4, "Helmet": 5, "Breast": 2, "Zaudru Qitem": 2, "Beryl shard": 4, "Legs": 9})
+    row = [totals[key] for key in COUNTER_COLS]
+    # Helmet capped at 3, Legs weighs nothing
+    assert formula.value(row, "Hunter") == (2 * 3 + 1.5 * 2 + 0.5 * 2 + 0.25 * 4) / 4
+    # Minstrels: Helmet weight 1 without cap, Breast capped at 1
+    assert formula.value(row, "Minstrel") == (1 * 5 + 1.5 * 1 + 0.5 * 2 + 0.25 * 4) / 4
+    assert formula.value([0] * len(COUNTER_COLS), "Hunter") == 1.0
+
+
+def test_switching_formula_reranks_next_up():
+    ledger = LootLedger([make_character("Ann", raids=2, helmet=1), make_character("Bob", raids=2, beryl=2)])
+    engine = QuotientEngine(ledger)
+    index = PriorityIndex(ledger, engine)
+    assert [name for name, *_ in index.top("Helmet")] == ["Bob", "Ann"]
+    engine.set_formula(LootFormula({"name": "Shards", "weights": {"Beryl shard": 1}}))
+    assert [name for name, *_ in index.top("Helmet")] == ["Ann", "Bob"]
+    ledger.increment(ledger.get("Ann"), "Beryl shard", 5)
+    assert [name for name, *_ in index.top("Helmet")] == ["Bob", "Ann"]
+
+
+def test_validation_reports_every_mistake():
+    errors = validate_formula({"name": "x", "weights": {"Raids": 1, "Helm": 2, "Boots": -1}, "caps": {"Legs": 1.5},
+                               "classes": {"Elf": {}}})
+    assert len(errors) == 5
+    with pytest.raises(ValueError):
+        LootFormula({"weights": {"Helmet": 1}})
+
+
+def test_load_formulas(tmp_path):
+    path = tmp_path / "raid_data.formulas.json"
+    assert load_formulas(str(path)) == [DEFAULT_FORMULA]
+    path.write_text('[{"name": "A", "weights": {"Helmet": 1}}, {"name": "A"}]', encoding="utf-8")
+    with pytest.raises(ValueError, match="defined twice"):
+        load_formulas(str(path))
+    path.write_text('[{"name": "A", "weights": {"Helmet": 1}}]', encoding="utf-8")
+    assert [f.name for f in load_formulas(str(path))] == ["Quotient", "A"]
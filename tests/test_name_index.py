@@ -0,0 +1,33 @@
+import random
+
+from conftest import make_character
+from lootLedger import LootLedger
+from nameIndex import NameIndex
+
+
+def scan(ledger, text):
+    return {e.name for e in ledger.active() if text.lower() in e.name.lower()}
+
+
+def test_search_equals_substring_scan(roster):
+    rnd = random.Random(7)
+    letters = "aeilnorstâûé"
+    ledger = LootLedger(roster)
+    index = NameIndex(ledger)
+    queries = ["", "a", "AN", "nn", "Ann", "xyz", "anna", "Bo", "é"]
+    for step in range(300):
+        names = sorted(e.name for e in ledger.active())
+        archived = sorted({e.name for e in ledger.archived()} - set(names))
+        if step % 3 == 0 or len(names) < 5:
+            name = rnd.choice(letters).upper() + "".join(rnd.choice(letters) for _ in range(rnd.randint(1, 7)))
+            if name not in ledger:
+                ledger.add(make_character(name))
+        elif step % 3 == 1:
+            ledger.remove(ledger.get(rnd.choice(names)))
+        elif archived:
+            ledger.reactivate(rnd.choice(archived))
+        name = rnd.choice([e.name for e in ledger.active()])
+        start = rnd.randrange(len(name))
+        queries.append(name[start:start + rnd.randint(1, 6)].swapcase())
+        for text in queries[-10:] + queries[:9]:
+            assert index.search(text) == scan(ledger, text)
@@ -0,0 +1,49 @@
+import random
+
+from conftest import make_character
+from lootFormula import DEFAULT_FORMULA, LootFormula
+from lootLedger import LootLedger, COUNTER_COLS
+from priorityIndex import LOOT_SLOTS, PriorityIndex
+from quotientEngine import QuotientEngine
+
+CAPPED = LootFormula({"name": "Capped", "weights": {"Helmet": 2, "Boots": 1, "Beryl shard": 0.5},
+                      "caps": {"Helmet": 2}, "classes": {"Hunter": {"weights": {"Boots": 3}}}})
+
+
+def brute_force(ledger, formula, slot, k):
+    rows = []
+    for main in ledger.mains():
+        totals = [sum(col) for col in zip(*(e.counts for e in [main] + ledger.twinks_of(main)))]
+        rows.append((formula.value(totals, main.cls), -totals[0], totals[COUNTER_COLS.index(slot)], main.name))
+    return [(name, q, -neg_raids, count) for q, neg_raids, count, name in sorted(rows)[:k]]
+
+
+def test_top_equals_sorted_brute_force(roster):
+    rnd = random.Random(11)
+    ledger = LootLedger(roster)
+    engine = QuotientEngine(ledger)
+    index = PriorityIndex(ledger, engine)
+    for step in range(400):
+        names = [e.name for e in ledger.active()]
+        if step == 200:
+            engine.set_formula(CAPPED)
+        elif step % 10 == 0:
+            mains = [e.name for e in ledger.mains()]
+            main = rnd.choice(mains + [None])
+            name = f"N{step}"
+            ledger.add(make_character(name, rnd.choice(["Hunter", "Guardian"]), main=main,
+                                      raids=rnd.randint(0, 5), helmet=rnd.randint(0, 3)))
+        elif step % 10 == 5 and len(names) > 3:
+            ledger.remove(ledger.get(rnd.choice(names)))
+        elif step % 10 == 7:
+            archived = sorted({e.name for e in ledger.archived()} - set(names))
+            if archived:
+                ledger.reactivate(rnd.choice(archived))
+        else:
+            for _ in range(rnd.randint(1, 4)):
+                e = ledger.get(rnd.choice(names))
+                ledger.increment(e, rnd.choice(COUNTER_COLS), rnd.choice([1, 1, 2, -1]))
+        formula = DEFAULT_FORMULA if step < 200 else CAPPED
+        for slot in rnd.sample(LOOT_SLOTS, 3):
+            k = rnd.choice([1, 3, 50])
+            assert index.top(slot, k) == brute_force(ledger, formula, slot, k)
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from conftest import make_character
+from lootFormula import DEFAULT_FORMULA, LootFormula
+from lootLedger import LootLedger, COUNTER_COLS, COUNT_MAX, CLASS_ICONS
+from quotientEngine import QuotientEngine, load_numpy
+
+pytestmark = pytest.mark.skipif(load_numpy() is None, reason="numpy not installed")
+
+FORMULAS = [DEFAULT_FORMULA,
+            LootFormula({"name": "Linear", "weights": {"Helmet": 3, "Legs": 0.5, "Mírdanant": 2}}),
+            LootFormula({"name": "Capped", "weights": {"Helmet": 1, "Boots": 2}, "caps": {"Boots": 4},
+                         "classes": {"Guardian": {"weights": {"Helmet": 0.25}, "caps": {"Boots": None}}}})]
+
+
+def random_roster(rng, n):
+    entries, mains = [], []
+    for i in range(n):
+        main = rng.choice(mains) if mains and rng.random() < 0.4 else None
+        counts = {key.split()[0].lower(): rng.choice([0, 1, 2, rng.randrange(10 ** 6), COUNT_MAX])
+                  if rng.random() < 0.5 else 0 for key in COUNTER_COLS}
+        e = make_character(f"C{i}", rng.choice(list(CLASS_ICONS)), main=main and main.name, **counts)
+        if main is None:
+            mains.append(e)
+        else:
+            main.twinks.append(e.name)
+        entries.append(e)
+    # A dangling twink list entry and an unlinked twink
+    mains[0].twinks.append("Nobody")
+    entries.append(make_character("Lone", main="Nobody", raids=3, helmet=1))
+    return entries
+
+
+def results(engine):
+    ledger = engine.ledger
+    return (engine.quotients(), engine.all_branch_totals(), engine.ranking(),
+            {m.name: (engine.branch_totals(m), engine.quotient(m)) for m in ledger.mains()})
+
+
+@pytest.mark.parametrize("formula", FORMULAS, ids=lambda f: f.name)
+def test_numpy_path_equals_pure_python(formula):
+    rng = random.Random(3)
+    ledger = LootLedger(random_roster(rng, 200))
+    fast = QuotientEngine(ledger, numpy_min_rows=0, formula=formula)
+    plain = QuotientEngine(ledger, numpy_min_rows=None, formula=formula)
+    assert results(fast) == results(plain)
+    assert fast._np is not None and plain._np is None
+    for step in range(30):
+        names = [e.name for e in ledger.active()]
+        if step % 6 == 0:
+            ledger.remove(ledger.get(rng.choice(names)))
+        elif step % 6 == 3:
+            archived = sorted({e.name for e in ledger.archived()} - set(names))
+            if archived:
+                ledger.reactivate(rng.choice(archived))
+        else:
+            # Patched in place, no rebuild
+            for _ in range(5):
+                ledger.set_value(ledger.get(rng.choice(names)), rng.choice(COUNTER_COLS),
+                                 rng.choice([0, 1, rng.randrange(10 ** 6), COUNT_MAX]))
+        assert results(fast) == results(plain)
@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import make_character
+from lootLedger import LootLedger, COUNTER_COLS
+from quotientHistory import QuotientHistory
+
+
+def season(ledger, history):
+    # Raids with link changes in between; after every frame the counters and
+    # quotients the ledger has right then, the recompute the history must match
+    expected = []
+
+    def raid(participants, drops):
+        r = ledger.commit_raid(participants, drops, f"2026-10-{len(expected) + 1:02d}")
+        history.record(ledger, r["id"], r["date"])
+        expected.append(({e.name: e.counts.tolist() for e in ledger.active()},
+                         {m.name: ledger.quotient(m) for m in ledger.mains()}))
+        return r
+
+    raid(["Ann", "Bob", "Tom"], [("Ann", "Helmet"), ("Tom", "Boots")])
+    raid(["Ann", "Bob"], [("Bob", "Legs")])
+    ledger.add(make_character("Kim", main="Bob"))
+    raid(["Bob", "Kim"], [("Kim", "Gloves"), ("Kim", "Zaudru Qitem")])
+    r = raid(["Ann", "Tom"], [("Tom", "Breast")])
+    ledger.revert_raid(r["id"], "2026-10-05")
+    history.record(ledger, r["id"], "2026-10-05", revert=True)
+    expected.append(({e.name: e.counts.tolist() for e in ledger.active()},
+                     {m.name: ledger.quotient(m) for m in ledger.mains()}))
+    ledger.remove(ledger.get("Tom"))
+    for _ in range(4):
+        raid(["Ann", "Bob", "Kim"], [("Ann", "Shoulder")])
+    return expected
+
+
+@pytest.mark.parametrize("keyframe_every", [1, 3, 8])
+def test_frames_equal_a_recompute(tmp_path, roster, keyframe_every):
+    ledger = LootLedger(roster)
+    data_file = str(tmp_path / "raid_data.json")
+    expected = season(ledger, QuotientHistory(data_file, keyframe_every))
+    # Read back from raid_data.history
+    history = QuotientHistory(data_file, keyframe_every)
+    assert len(history.frames) == len(expected)
+    table = history.quotient_table()
+    for i, (counters, quotients) in enumerate(expected):
+        state = history.state_at(i)
+        assert {n: state[n] for n in counters} == counters
+        assert {m: history.quotient(m, i) for m in quotients} == quotients
+        assert table[i] == (i, quotients)
+        assert history.counters("Ann", i) == dict(zip(COUNTER_COLS, counters["Ann"]))
+    series = history.series("Bob", 2)
+    assert [p["frame"] for p in series] == list(range(2, len(expected)))
+    assert [p["quotient"] for p in series] == [q["Bob"] for _, q in expected[2:]]
+    assert history.quotient_table(3, 5) == table[3:6]
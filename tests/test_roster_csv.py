@@ -0,0 +1,62 @@
+from lootLedger import LootLedger
+from rosterCsv import export_csv, import_csv
+
+
+def test_round_trip(tmp_path, roster):
+    path = str(tmp_path / "roster.csv")
+    ledger = LootLedger(roster)
+    assert export_csv(ledger, path, include_archived=True) == 4
+
+    fresh = LootLedger()
+    added, updated, errors = import_csv(fresh, path)
+    assert (added, updated, errors) == (4, 0, [])
+    assert [e.to_dict() for e in fresh.all_entries()] == [e.to_dict() for e in ledger.all_entries()]
+    assert [t.name for t in fresh.twinks_of(fresh.get("Ann"))] == ["Tom"]
+
+    # Importing the same file again changes nothing
+    assert import_csv(fresh, path) == (0, 0, [])
+
+
+def test_semicolons_and_bad_rows(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("Name;Class;Twink of;Helmet;Raids\n"
+                    "Tim;Hunter;Ann;1;2\n"
+                    "Ann;Minstrel;;3;4\n"
+                    "Bad;Hunter;;-1;0\n"
+                    "Who;Wizard;;0;0\n"
+                    "Lost;Hunter;Nobody;0;0\n", encoding="utf-8")
+    ledger = LootLedger()
+    added, updated, errors = import_csv(ledger, str(path))
+    assert added == 2
+    assert [line for line, _ in errors] == [4, 5, 6]
+    assert ledger.get("Ann")["Helmet"] == 3
+    assert [t.name for t in ledger.twinks_of(ledger.get("Ann"))] == ["Tim"]
+
+
+def test_archived_name_is_reactivated(tmp_path, roster):
+    path = tmp_path / "roster.csv"
+    path.write_text("Name,Class,Active,Legs\nOld,Captain,yes,5\n", encoding="utf-8")
+    ledger = LootLedger(roster)
+    events = []
+    ledger.listeners.append(events.append)
+    assert import_csv(ledger, str(path)) == (0, 1, [])
+    assert [(e.name, e.active, e["Legs"]) for e in ledger.named("Old")] == [("Old", True, 5)]
+
+    # The recorded event replays to the same roster
+    replayed = LootLedger([e.copy() for e in roster])
+    for event in events:
+        replayed.apply_event(event)
+    assert [e.to_dict() for e in replayed.all_entries()] == [e.to_dict() for e in ledger.all_entries()]
+
+
+def test_batches_link_twinks_across_batches(tmp_path):
+    path = tmp_path / "roster.csv"
+    rows = [f"T{i},Hunter,M{i % 3}" for i in range(6)] + [f"M{i},Guardian," for i in range(3)]
+    path.write_text("Name,Class,Main\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    ledger = LootLedger()
+    events = []
+    ledger.listeners.append(events.append)
+    assert import_csv(ledger, str(path), batch=2) == (9, 0, [])
+    assert len(events) > 1
+    for i in range(3):
+        assert [t.name for t in ledger.twinks_of(ledger.get(f"M{i}"))] == [f"T{i}", f"T{i + 3}"]
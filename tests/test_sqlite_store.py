@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from lootLedger import LootLedger
+from storage import open_store
+
+
+def open_ledger(data_file, backend):
+    store = open_store(str(data_file), backend)
+    ledger = LootLedger()
+    store.load(ledger)
+    ledger.listeners.append(store.record)
+    return ledger, store
+
+
+def state(ledger):
+    return [e.to_dict() for e in ledger.entries], sorted(e.to_dict()["Name"] for e in ledger.archived()), ledger.raids
+
+
+def edit(ledger):
+    ledger.increment(ledger.get("Ann"), "Helmet", 2)
+    ledger.commit_raid(["Ann", "Bob", "Tom"], [("Tom", "Boots"), ("Bob", "Mírdanant")], "2026-10-01", "first")
+    ledger.remove(ledger.get("Bob"))
+    ledger.reactivate("Old")
+    ledger.import_entries([], [["Old", "Legs", 2, 4]])
+
+
+def test_save_and_reload_equals_json_backend(tmp_path, roster):
+    results = {}
+    for backend in ("json", "sqlite"):
+        data_file = tmp_path / backend / "raid_data.json"
+        data_file.parent.mkdir()
+        data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+        ledger, store = open_ledger(data_file, backend)
+        edit(ledger)
+        live = state(ledger)
+        if store.needs_compaction():
+            store.write_snapshot(store.snapshot(ledger))
+        store.close()
+        ledger, store = open_ledger(data_file, backend)
+        results[backend] = state(ledger)
+        assert results[backend] == live
+        store.close()
+    assert results["sqlite"] == results["json"]
+    assert os.path.exists(tmp_path / "sqlite" / "raid_data.db")
+
+
+def test_failed_migration_leaves_no_database(tmp_path, roster):
+    data_file = tmp_path / "raid_data.json"
+    data_file.write_text(json.dumps([e.to_dict() for e in roster])[:-1])
+    store = open_store(str(data_file), "sqlite")
+    with pytest.raises(ValueError):
+        store.load(LootLedger())
+    assert not [name for name in os.listdir(tmp_path) if ".db" in name]
+
+    # Repaired snapshot: the next start migrates for real
+    data_file.write_text(json.dumps([e.to_dict() for e in roster]))
+    ledger, store = open_ledger(data_file, "sqlite")
+    assert [e.name for e in ledger.entries] == ["Ann", "Bob", "Tom"]
+    store.close()
@@ -0,0 +1,70 @@
+from conftest import make_character
+from lootLedger import LootLedger
+from storage import open_store
+from undoStack import UndoStack
+
+
+def test_redo_of_add_restores_the_record(tmp_path, roster):
+    store = open_store(str(tmp_path / "raid_data.json"), "sqlite")
+    ledger = LootLedger()
+    store.load(ledger)
+    store.import_entries(roster, [])
+    ledger.load(roster)
+    ledger.listeners.append(store.record)
+    undo = UndoStack(ledger)
+
+    kim = ledger.add(make_character("Kim", main="Ann"))
+    ledger.reactivate("Old")
+    ledger.increment(kim, "Gloves", 1)
+    order = ledger.order(kim)
+    for _ in range(3):
+        undo.undo()
+    assert "Kim" not in ledger and ledger.get("Ann").twinks == ["Tom"]
+    for _ in range(3):
+        undo.redo()
+    assert ledger.get("Kim") is kim and ledger.order(kim) == order
+    assert [e.name for e in ledger.entries] == ["Ann", "Bob", "Tom", "Old", "Kim"]
+    assert ledger.get("Ann").twinks == ["Tom", "Kim"] and kim["Gloves"] == 1
+
+    # The store still knows the record: later edits land on its row
+    ledger.increment(kim, "Boots", 2)
+    live = [e.to_dict() for e in ledger.entries]
+    store.close()
+    reloaded = LootLedger()
+    open_store(str(tmp_path / "raid_data.json"), "sqlite").load(reloaded)
+    assert [e.to_dict() for e in reloaded.entries] == live
+
+
+def roster_state(ledger):
+    return [e.to_dict() for e in ledger.entries], sorted(e.name for e in ledger.archived())
+
+
+def test_undo_redo_round_trip(roster):
+    ledger = LootLedger(roster)
+    undo = UndoStack(ledger)
+    states = [roster_state(ledger)]
+    steps = [lambda: ledger.increment(ledger.get("Ann"), "Helmet", 2),
+             lambda: ledger.add(make_character("Kim", main="Ann")),
+             lambda: ledger.remove(ledger.get("Tom")),
+             lambda: ledger.set_value(ledger.get("Kim"), "Legs", 3),
+             lambda: ledger.reactivate("Old"),
+             lambda: ledger.remove(ledger.get("Ann")),
+             lambda: ledger.reactivate("Tom")]
+    for step in steps:
+        step()
+        states.append(roster_state(ledger))
+    for state in reversed(states[:-1]):
+        assert undo.undo() is not None
+        assert roster_state(ledger) == state
+    assert not undo.can_undo() and undo.undo() is None
+    for state in states[1:]:
+        assert undo.redo() is not None
+        assert roster_state(ledger) == state
+    assert not undo.can_redo()
+
+    # A new change drops the redo history, a raid the whole history
+    undo.undo()
+    ledger.increment(ledger.get("Bob"), "Boots", 1)
+    assert not undo.can_redo()
+    ledger.commit_raid(["Bob"], [], "2026-10-01")
+    assert not undo.can_undo()
@@ -0,0 +1,122 @@
+from collections import deque
+
+
+class UndoStack:
+    # Undo/redo over the ledger's own change events: a "set" is one (name, key,
+    # old, new) delta, structural events carry what is needed to put them back
+    # (cascaded twinks, list position, the added entry). Undoing or redoing runs
+    # the matching ledger call, so the change is journaled like any other edit.
+    # Redoing an add brings back the very record the undo discarded, at its old
+    # roster position, so state keyed by the record (roster order, store ids)
+    # stays valid.
+    # Both stacks keep at most `depth` steps. Raid sessions have their own revert
+    # in the raid log and start a fresh history, as do bulk imports.
+    def __init__(self, ledger, depth=100):
+        self.ledger = ledger
+        self._undo = deque(maxlen=depth)
+        self._redo = deque(maxlen=depth)
+        self._applying = False
+        ledger.listeners.append(self._on_event)
+
+    def _on_event(self, event):
+        if self._applying:
+            return
+        if event["op"] in ("raid", "revert_raid", "import"):
+            self.clear()
+            return
+        self._undo.append(dict(event))  # own copy, an undone add keeps its record on it
+        self._redo.clear()
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        # Returns (op, entry, key) of the change undone, or None
+        if not self._undo:
+            return None
+        event = self._undo.pop()
+        result = self._run(self._revert, event)
+        if result is not None:
+            self._redo.append(event)
+        return result
+
+    def redo(self):
+        if not self._redo:
+            return None
+        event = self._redo.pop()
+        result = self._run(self._replay, event)
+        if result is not None:
+            self._undo.append(event)
+        return result
+
+    def _run(self, step, event):
+        self._applying = True
+        try:
+            result = step(event)
+        finally:
+            self._applying = False
+        if result is None:
+            # The roster no longer matches the history (e.g. the name was re-added)
+            self.clear()
+        return result
+
+    def _revert(self, event):
+        ledger, op = self.ledger, event["op"]
+        if op == "set":
+            e = ledger.get(event["name"])
+            if e is None:
+                return None
+            ledger.set_value(e, event["key"], event["old"])
+            return op, e, event["key"]
+        if op == "add":
+            e = ledger.get(event["entry"]["Name"])
+            if e is None:
+                return None
+            event["restore"] = (e, ledger.order(e))
+            ledger.discard(e)
+            return op, e, None
+        if op == "remove":
+            e = ledger.reactivate(event["name"], event.get("index"))
+            if e is None:
+                return None
+            for tname in event.get("twinks", []):
+                ledger.reactivate(tname)
+            return op, e, None
+        if op == "reactivate":
+            e = ledger.get(event["name"])
+            if e is None:
+                return None
+            ledger.remove(e)
+            return op, e, None
+        return None
+
+    def _replay(self, event):
+        ledger, op = self.ledger, event["op"]
+        if op == "set":
+            e = ledger.get(event["name"])
+            if e is None:
+                return None
+            ledger.set_value(e, event["key"], event["new"])
+            return op, e, event["key"]
+        if op == "add":
+            e, order = event.pop("restore")
+            if e.name in ledger:
+                return None
+            return op, ledger.add(e, order), None
+        if op == "remove":
+            e = ledger.get(event["name"])
+            if e is None:
+                return None
+            ledger.remove(e)
+            return op, e, None
+        if op == "reactivate":
+            e = ledger.reactivate(event["name"], event.get("index"))
+            return None if e is None else (op, e, None)
+        return None